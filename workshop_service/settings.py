@@ -42,6 +42,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'workshops.middleware.StaticFilesMiddleware',
+    'workshops.middleware.RequestProfilingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -68,18 +70,130 @@ TEMPLATES = [
     },
 ]
 
+if not DEBUG:
+    # Compile each template once per process (explicit for production; with
+    # DEBUG the default loaders are used and templates reload on change).
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'workshop_service.wsgi.application'
 
 
+# Caches: template fragments, MCDA/network results, portfolio charts.
+# Per-process memory by default; set REDIS_URL to share one cache between
+# worker processes (needs the `redis` package).
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
+# {% cache %} fragments are keyed by ProjectProgress.revision, so old
+# entries are never served; this only bounds how long they linger.
+TEMPLATE_FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+# Request profiling (NOTES.md, section 10): "off", "on" (every request) or
+# "sampled" (REQUEST_PROFILING_SAMPLE_RATE of requests, for production).
+REQUEST_PROFILING = os.environ.get('REQUEST_PROFILING', 'off').lower()
+REQUEST_PROFILING_SAMPLE_RATE = float(os.environ.get('REQUEST_PROFILING_SAMPLE_RATE', '0.05'))
+if REQUEST_PROFILING in ('on', 'sampled'):
+    # Same engine and options (and alias); its templates report their render time
+    TEMPLATES[0]['BACKEND'] = 'workshops.utils.profiling.ProfilingTemplates'
+    TEMPLATES[0]['NAME'] = 'django'
+
+# Portfolio PDF jobs (NOTES.md, section 12): threads per web process that
+# start new jobs at once. 0 leaves them all to `manage.py run_portfolio_jobs`.
+PORTFOLIO_INLINE_WORKERS = int(os.environ.get('PORTFOLIO_INLINE_WORKERS', '2'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'workshops.profiling': {
+            'handlers': ['console'],
+            'level': os.environ.get('REQUEST_PROFILING_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# SQLite is the default for local work. Set DB_ENGINE=postgres (plus the
+# POSTGRES_* variables) for production; see NOTES.md, section 5.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite').lower()
+
+if DB_ENGINE in ('postgres', 'postgresql'):
+    # With DB_POOL_MAX_SIZE > 0 each process keeps a psycopg connection pool
+    # (Django 5.1+, needs psycopg[pool]); otherwise connections persist for
+    # DB_CONN_MAX_AGE seconds. Django does not allow both at once.
+    DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '10'))
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'workshops'),
+            'USER': os.environ.get('POSTGRES_USER', 'workshops'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': 0 if DB_POOL_MAX_SIZE else int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'sslmode': os.environ.get('POSTGRES_SSLMODE', 'prefer'),
+                'connect_timeout': 10,
+            },
+        }
+    }
+    if DB_POOL_MAX_SIZE:
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': 10,
+        }
+else:
+    # Concurrency mode, on unless SQLITE_TUNING=0: WAL lets readers run while
+    # one writer commits, "timeout" is the busy timeout (seconds) a writer waits
+    # for the lock instead of failing with "database is locked", and IMMEDIATE
+    # transactions take the write lock at BEGIN so read-modify-write blocks
+    # never deadlock on a lock upgrade. See NOTES.md, section 6.
+    SQLITE_TUNING = os.environ.get('SQLITE_TUNING', '1') != '0'
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 128 * 1024 * 1024,
+        'cache_size': -16000,  # KiB
+        'temp_store': 'MEMORY',
+    }
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'timeout': 20,
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': ';'.join(f'PRAGMA {k}={v}' for k, v in SQLITE_PRAGMAS.items()),
+            } if SQLITE_TUNING else {},
+        }
     }
-}
 
 
 # Password validation
@@ -117,6 +231,18 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+# `python manage.py collectstatic` fingerprints file names and writes .gz/.br
+# variants here; StaticFilesMiddleware (or nginx) serves them. Vendored
+# libraries live in workshops/static/vendor (see `vendor_static`).
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+# Load a library from its pinned CDN URL when its vendored file is missing.
+# Off outside DEBUG: collectstatic and {% vendor_asset %} then fail instead.
+VENDOR_CDN_FALLBACK = os.environ.get('VENDOR_CDN_FALLBACK', '1' if DEBUG else '0') == '1'
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'workshops.utils.static_files.PrecompressedManifestStaticFilesStorage'},
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -131,4 +257,4 @@ LOGIN_URL = '/accounts/login/'        # if user not logged in
 
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
\ No newline at end of file
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', os.path.join(BASE_DIR, 'media'))
\ No newline at end of file
@@ -0,0 +1,41 @@
+"""
+Settings for `python manage.py test --settings=workshop_service.settings_test`.
+The database follows DB_ENGINE like settings.py, so the same suite runs on
+SQLite (default) and on PostgreSQL (DB_ENGINE=postgres); see NOTES.md, section 5.
+"""
+import os
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+
+# Password hashing is deliberately slow; tests log in a lot
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Uploads, variants and portfolio PDFs go to a throwaway folder
+MEDIA_ROOT = tempfile.mkdtemp(prefix='workshops-test-media-')
+
+# Jobs are run explicitly by the tests that need them
+PORTFOLIO_INLINE_WORKERS = 0
+REQUEST_PROFILING = 'off'
+# Pages render without downloading the vendored libraries first
+VENDOR_CDN_FALLBACK = True
+
+# On SQLite the test database is a file, not the in-memory default, so the
+# concurrency tests run with the same WAL / busy timeout / IMMEDIATE
+# locking as production.
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':  # noqa: F405
+    DATABASES['default']['TEST'] = {  # noqa: F405
+        'NAME': os.path.join(tempfile.gettempdir(), 'workshops-test.sqlite3'),
+    }
+
+# Source database of the copy_sqlite_data tests. The test runner creates and
+# migrates it like the default database, whichever engine that is.
+_COPY_SOURCE = os.path.join(tempfile.gettempdir(), 'workshops-test-copy-source.sqlite3')
+DATABASES['sqlite_source'] = {  # noqa: F405
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': _COPY_SOURCE,
+    'TEST': {'NAME': _COPY_SOURCE},
+}
+
+# Tests that switch profiling on should not print a JSON line per request
+LOGGING['loggers']['workshops.profiling']['level'] = 'WARNING'  # noqa: F405
@@ -1,10 +1,11 @@
 from django.contrib import admin
-from .models import Project, Stakeholder, Problem , MasterIndicator, Indicator , SWOTItem
+from .models import Project, Stakeholder, StakeholderRelation, Problem , MasterIndicator, Indicator , SWOTItem
 
 # This "registers" our models, making them visible and manageable
 # in the admin interface.
 admin.site.register(Project)
 admin.site.register(Stakeholder)
+admin.site.register(StakeholderRelation)
 admin.site.register(Problem)
 
 
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class WorkshopsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'workshops'
+
+    def ready(self):
+        # Progress bookkeeping (ProjectProgress) on save/delete
+        from . import signals  # noqa: F401
@@ -0,0 +1,74 @@
+import statistics
+import time
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory, override_settings
+
+from workshops import views
+from workshops.models import Project
+
+PAGES = {
+    "workshop_list": views.workshop_list_view,
+    "indicator_selection": views.indicator_selection_view,
+    "project_overview": views.project_overview_view,
+    "scenario_results": views.scenario_results_view,
+}
+
+BENCH_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+class Command(BaseCommand):
+    help = (
+        "Time GET renders of the heavy project pages with an empty fragment cache "
+        "(every render from scratch) and a warm one. Uses a private in-memory cache, "
+        "so a shared production cache is not touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("project_id", type=int)
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--page", choices=sorted(PAGES), action="append", help="Only these pages")
+
+    def handle(self, *args, **options):
+        project = Project.objects.select_related("owner").filter(pk=options["project_id"]).first()
+        if project is None:
+            raise CommandError("No such project.")
+        factory = RequestFactory()
+        user = project.owner
+
+        def get(view):
+            request = factory.get("/")
+            request.user = user
+
+            async def auser():
+                return user
+
+            request.auser = auser
+            if iscoroutinefunction(view):
+                return async_to_sync(view)(request, project_id=project.id)
+            return view(request, project_id=project.id)
+
+        def timed(view, cold):
+            samples = []
+            for _ in range(options["iterations"]):
+                if cold:
+                    caches["default"].clear()
+                start = time.perf_counter()
+                response = get(view)
+                samples.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f"{view.__name__} returned {response.status_code}")
+            return statistics.median(samples), len(response.content)
+
+        self.stdout.write(f"{'page':<22} {'cold ms':>9} {'warm ms':>9} {'speedup':>8} {'KB':>6}")
+        with override_settings(CACHES=BENCH_CACHES):
+            for name in options["page"] or PAGES:
+                view = PAGES[name]
+                get(view)  # first render: template compilation, indicator cloning
+                cold, size = timed(view, cold=True)
+                warm, _ = timed(view, cold=False)
+                self.stdout.write(
+                    f"{name:<22} {cold:>9.2f} {warm:>9.2f} {cold / warm if warm else 0:>7.1f}x {size / 1024:>6.1f}"
+                )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from workshops.models import IndicatorData
+from workshops.utils.images import build_variants
+
+
+class Command(BaseCommand):
+    help = "Build thumbnail/display variants for uploaded indicator data images (backfill)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Rebuild variants that are already current")
+
+    def handle(self, *args, **options):
+        items = IndicatorData.objects.exclude(data_image="").exclude(data_image__isnull=True).order_by("id")
+        built = failed = 0
+        for item in items.iterator():
+            if not options["force"] and item.variants_source == item.data_image.name:
+                continue
+            try:
+                build_variants(item.id)
+                built += 1
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"  IndicatorData {item.id} ({item.data_image.name}): {e}")
+        self.stdout.write(self.style.SUCCESS(f"Built variants for {built} image(s), {failed} failed."))
@@ -0,0 +1,429 @@
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+USER_PREFIX = "loadtest-g"
+PASSWORD = "loadtest-pass"
+CATALOG_CSV = "List of Indicators 2024 - indicators_Originial.csv"
+SWOT_CATEGORIES = "SWOT"
+QSORT_SCORES = ["-3", "-2", "-1", "0", "1", "2", "3"]
+LOCKED = b"database is locked"
+
+DATA_ID = re.compile(r'data-id="(\d+)"')
+ACTION_ID = re.compile(r'data-action-id="(\d+)"')
+INDICATOR_STATE = re.compile(r'<script id="indicatorState" type="application/json">(.*?)</script>', re.S)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Time each URL on its own: a 302 is the answer, not a hop to follow."""
+
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class VirtualStudent:
+    """
+    One browser: a cookie jar and a group login. Members of a group share the
+    group account and project, as teams do in class, so their autosaves hit
+    the same rows.
+    """
+
+    def __init__(self, base_url, username, project_id, record, timeout, think, downloads_pdf):
+        self.base_url = base_url.rstrip("/")
+        self.username = username
+        self.project_id = project_id
+        self.record = record
+        self.timeout = timeout
+        self.think = think
+        self.downloads_pdf = downloads_pdf
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect()
+        )
+
+    def csrf_token(self):
+        return next((c.value for c in self.cookies if c.name == "csrftoken"), "")
+
+    def request(self, name, path, form=None, json_body=None, xhr=False):
+        """Send one request and record (endpoint, ms, status, error kind). Returns (status, body)."""
+        headers = {}
+        data = None
+        if form is not None:
+            data = urllib.parse.urlencode({**form, "csrfmiddlewaretoken": self.csrf_token()}).encode()
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        elif json_body is not None:
+            data = json.dumps(json_body).encode()
+            headers["Content-Type"] = "application/json"
+        if data is not None:
+            headers["X-CSRFToken"] = self.csrf_token()
+        if xhr:
+            headers["X-Requested-With"] = "XMLHttpRequest"
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers)
+
+        start = time.perf_counter()
+        status, body, error = 0, b"", None
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                status, body = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read()
+        except (TimeoutError, socket.timeout):
+            error = "timeout"
+        except (urllib.error.URLError, ConnectionError) as e:
+            error = "timeout" if isinstance(getattr(e, "reason", None), socket.timeout) else "connection"
+        ms = (time.perf_counter() - start) * 1000
+
+        if error is None and status >= 400:
+            error = "locked" if LOCKED in body else f"http_{status // 100}xx"
+        self.record(name, ms, status, error)
+        return status, body
+
+    def pause(self):
+        if self.think:
+            time.sleep(self.think * random.uniform(0.5, 1.5))
+
+    def login(self):
+        self.request("login_page", "/accounts/login/")
+        status, _ = self.request("login", "/accounts/login/", form={"username": self.username, "password": PASSWORD})
+        return status == 302
+
+    def run_round(self, n):
+        """One pass through the workshops, writing a little in each, like a student session."""
+        p = f"/workshops/project/{self.project_id}"
+        steps = [
+            self.overview, self.stakeholders, self.problem_tree, self.objective_tree,
+            self.indicators, self.swot, self.scenario,
+        ]
+        self.request("workshop_list", f"{p}/workshops/")
+        for step in steps:
+            self.pause()
+            step(p, n)
+        self.pause()
+        self.request("final_review", f"{p}/final-review/")
+        if self.downloads_pdf:
+            self.request("final_review_pdf", f"{p}/final-review/pdf/")
+
+    def overview(self, p, n):
+        self.request("project_overview", f"{p}/workshops/overview/")
+        box = random.choice(["A1", "A2", "B1", "B2", "C1", "C2", "C3", "D2"])
+        self.request("overview_save", f"{p}/workshops/overview/",
+                     json_body={"box": box, "text": f"Draft {n} by {threading.current_thread().name}"})
+
+    def stakeholders(self, p, n):
+        _, page = self.request("stakeholder_list", f"{p}/stakeholders/")
+        self.request("stakeholder_add", f"{p}/stakeholders/", xhr=True, form={
+            "name": f"Stakeholder {n}-{random.randint(0, 9999)}",
+            "interest": random.randint(0, 100), "power": random.randint(0, 100),
+        })
+        self.request("stakeholder_data", f"{p}/stakeholders/data/")
+        ids = DATA_ID.findall(page.decode(errors="replace"))
+        if ids:
+            self.request("stakeholder_update", f"/workshops/stakeholder/update/{random.choice(ids)}/",
+                         json_body={"field": random.choice(["interest", "power"]), "value": random.randint(0, 100)})
+
+    def _tree(self, name, page_path, data_path, type_field, root_type, child_type, n):
+        self.request(name, page_path)
+        status, body = self.request(f"{name}_data", data_path)
+        tree = json.loads(body) if status == 200 else {}
+        if "id" in tree:
+            form = {"description": f"Node {n}-{random.randint(0, 9999)}", type_field: child_type, "parent": tree["id"]}
+        else:
+            form = {"description": f"Root {n}", type_field: root_type, "parent": ""}
+        self.request(f"{name}_add", page_path, form={**form, "color": ""})
+
+    def problem_tree(self, p, n):
+        self._tree("problem_tree", f"{p}/problem-tree/", f"/workshops/api/project/{self.project_id}/problem-data/",
+                   "problem_type", "CORE", "CAUSE", n)
+
+    def objective_tree(self, p, n):
+        self._tree("objective_tree", f"{p}/objective-tree/", f"{p}/objective-tree/data/",
+                   "objective_type", "SITUATION", "OBJECTIVE", n)
+
+    def indicators(self, p, n):
+        _, page = self.request("indicator_selection", f"{p}/indicators/")
+        match = INDICATOR_STATE.search(page.decode(errors="replace"))
+        ids = [entry[0] for entry in json.loads(match.group(1)).values()] if match else []
+        if not ids:
+            return
+        selected = random.sample(ids, min(len(ids), random.randint(5, 12)))
+        self.request("indicator_save", f"{p}/indicators/save/", json_body={"selected_ids": selected})
+        self.pause()
+        self.request("indicator_ranking", f"{p}/ranking/")
+        random.shuffle(selected)
+        self.request("ranking_save", f"{p}/save-ranking/",
+                     json_body={"order": [str(i) for i in selected], "groups": []})
+
+    def swot(self, p, n):
+        self.request("swot_analysis", f"{p}/swot/")
+        self.request("swot_save", f"{p}/swot/save/", json_body={
+            "action": "add", "category": random.choice(SWOT_CATEGORIES),
+            "title": f"Item {n}", "description": "Added by the classroom load test.",
+        })
+
+    def scenario(self, p, n):
+        self.request("scenario_action_add", f"{p}/scenario/",
+                     form={"action_type": "add", "new_action": f"Action {n}-{random.randint(0, 9999)}"})
+        _, page = self.request("scenario_qsort", f"{p}/scenario/qsort/")
+        actions = sorted(set(ACTION_ID.findall(page.decode(errors="replace"))))
+        if actions:
+            distribution = {score: [] for score in QSORT_SCORES}
+            for action_id in actions:
+                distribution[random.choice(QSORT_SCORES)].append(action_id)
+            self.request("qsort_save", f"{p}/scenario/save/", form={
+                "mode": "qsort", "participant_label": f"Participant {n}", "role": "Student",
+                "distribution_json": json.dumps(distribution),
+            })
+        self.request("scenario_results", f"{p}/scenario/results/")
+
+
+def _percentiles(values):
+    p50, p90, p95, p99 = np.percentile(values, [50, 90, 95, 99])
+    return {"p50": p50, "p90": p90, "p95": p95, "p99": p99, "max": max(values)}
+
+
+class Command(BaseCommand):
+    help = (
+        "Classroom load test: starts the app on a local port against a scratch SQLite "
+        "database (or targets --url) and runs virtual student groups through every "
+        "workshop over HTTP (login, stakeholders, trees, indicator selection and ranking, "
+        "SWOT, q-sorts, final review PDF). Reports throughput, per-endpoint latency "
+        "percentiles and errors, including SQLite lock timeouts, per concurrency level."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--groups", type=int, nargs="+", default=[5, 10, 20],
+                            help="Concurrency levels: number of groups working at once")
+        parser.add_argument("--members", type=int, default=3, help="Virtual students per group (one shared login)")
+        parser.add_argument("--seconds", type=float, default=60.0, help="Duration of each level")
+        parser.add_argument("--think", type=float, default=1.0,
+                            help="Mean pause between steps in seconds (0 = no pauses)")
+        parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+        parser.add_argument("--server", choices=["runserver", "uvicorn"], default="runserver",
+                            help="How to start the local server (uvicorn must be installed)")
+        parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+        parser.add_argument("--port", type=int, default=0, help="Local port (default: a free one)")
+        parser.add_argument("--url", help="Target an already running server that uses this project's database")
+        parser.add_argument("--keep", action="store_true", help="With --url: keep the load-test users and projects")
+        parser.add_argument("--json", dest="json_path", help="Also write the full results as JSON to this file")
+        parser.add_argument("--seed", type=int, help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options["seed"]:
+            self.stdout.write(json.dumps(seed_groups(options["seed"])))
+            return
+        if min(options["groups"]) < 1 or options["members"] < 1:
+            raise CommandError("--groups and --members must be at least 1.")
+        total = max(options["groups"])
+
+        if options["url"]:
+            projects = seed_groups(total)
+            try:
+                results = self.run_levels(options["url"], projects, options, server_log=None)
+            finally:
+                if not options["keep"]:
+                    User.objects.filter(username__startswith=USER_PREFIX).delete()
+        else:
+            with tempfile.TemporaryDirectory() as tmp:
+                results = self.run_local(tmp, total, options)
+        if options["json_path"]:
+            with open(options["json_path"], "w") as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['json_path']}")
+
+    # -------------------------
+    # Local server on a scratch database
+    # -------------------------
+
+    def run_local(self, tmp, total, options):
+        manage = os.path.join(settings.BASE_DIR, "manage.py")
+        env = {
+            **os.environ,
+            "DB_ENGINE": "sqlite",
+            "SQLITE_PATH": os.path.join(tmp, "classroom.sqlite3"),
+            "MEDIA_ROOT": os.path.join(tmp, "media"),  # portfolio PDFs
+        }
+        self.stdout.write("Migrating a scratch database ...")
+        subprocess.run([sys.executable, manage, "migrate", "-v0"], env=env, check=True)
+        catalog = os.path.join(settings.BASE_DIR, CATALOG_CSV)
+        if os.path.exists(catalog):
+            subprocess.run([sys.executable, manage, "import_indicators", catalog], env=env,
+                           check=True, capture_output=True)
+        else:
+            self.stderr.write(f"{CATALOG_CSV} not found; indicator steps are skipped.")
+        seeded = subprocess.run([sys.executable, manage, "classroom_load_test", "--seed", str(total)],
+                                env=env, check=True, capture_output=True, text=True).stdout
+        projects = json.loads(seeded.strip().splitlines()[-1])
+
+        port = options["port"] or _free_port()
+        if options["server"] == "uvicorn":
+            cmd = [sys.executable, "-m", "uvicorn", "workshop_service.asgi:application",
+                   "--host", "127.0.0.1", "--port", str(port), "--workers", str(options["workers"]),
+                   "--no-access-log"]
+        else:
+            cmd = [sys.executable, manage, "runserver", f"127.0.0.1:{port}", "--noreload"]
+        log_path = os.path.join(tmp, "server.log")
+        with open(log_path, "wb") as log:
+            server = subprocess.Popen(cmd, env=env, cwd=settings.BASE_DIR, stdout=log, stderr=subprocess.STDOUT)
+            try:
+                base_url = f"http://127.0.0.1:{port}"
+                self.wait_for(base_url, server, log_path)
+                self.stdout.write(f"{options['server']} listening on {base_url}")
+                return self.run_levels(base_url, projects, options, server_log=log_path)
+            finally:
+                server.terminate()
+                try:
+                    server.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    server.kill()
+
+    def wait_for(self, base_url, server, log_path, seconds=30):
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                with open(log_path, errors="replace") as f:
+                    raise CommandError(f"The server exited:\n{f.read()[-2000:]}")
+            try:
+                urllib.request.urlopen(base_url + "/accounts/login/", timeout=2).close()
+                return
+            except (urllib.error.URLError, ConnectionError, TimeoutError):
+                time.sleep(0.2)
+        raise CommandError(f"The server did not answer within {seconds} s.")
+
+    # -------------------------
+    # Levels and reporting
+    # -------------------------
+
+    def run_levels(self, base_url, projects, options, server_log):
+        levels = []
+        for groups in options["groups"]:
+            log_offset = os.path.getsize(server_log) if server_log else 0
+            level = self.run_level(base_url, projects[:groups], options)
+            if server_log:
+                with open(server_log, "rb") as f:
+                    f.seek(log_offset)
+                    level["server_lock_errors"] = f.read().count(LOCKED)
+            levels.append(level)
+            self.report(level)
+        self.stdout.write("")
+        self.stdout.write(f"{'groups':>6} {'students':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'locked':>7}")
+        for level in levels:
+            overall = level["overall"]
+            self.stdout.write(
+                f"{level['groups']:>6} {level['students']:>8} {level['throughput']:>8.1f} "
+                f"{overall['p50']:>8.1f} {overall['p95']:>8.1f} {overall['p99']:>8.1f} "
+                f"{sum(level['errors'].values()):>7} {level['errors'].get('locked', 0) + level.get('server_lock_errors', 0):>7}"
+            )
+        return {"options": {k: options[k] for k in ("groups", "members", "seconds", "think", "server")}, "levels": levels}
+
+    def run_level(self, base_url, projects, options):
+        samples = []
+        lock = threading.Lock()
+
+        def record(name, ms, status, error):
+            with lock:
+                samples.append((name, ms, status, error))
+
+        deadline = time.monotonic() + options["seconds"]
+        rounds = defaultdict(int)
+
+        def student(username, project_id, member):
+            vs = VirtualStudent(base_url, username, project_id, record, options["timeout"],
+                                options["think"], downloads_pdf=member == 0)
+            if not vs.login():
+                return
+            n = 0
+            while time.monotonic() < deadline:
+                n += 1
+                vs.run_round(n)
+            with lock:
+                rounds[username] += n
+
+        threads = [
+            threading.Thread(target=student, args=(username, project_id, member), name=f"{username}.{member}")
+            for username, project_id in projects
+            for member in range(options["members"])
+        ]
+        self.stdout.write(f"\n== {len(projects)} groups x {options['members']} students, {options['seconds']:.0f} s ==")
+        start = time.monotonic()
+        for t in threads:
+            t.start()
+            time.sleep(0.05)  # students don't all click "log in" in the same millisecond
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - start
+
+        by_endpoint = defaultdict(list)
+        errors = defaultdict(int)
+        endpoint_errors = defaultdict(int)
+        for name, ms, status, error in samples:
+            by_endpoint[name].append(ms)
+            if error:
+                errors[error] += 1
+                endpoint_errors[name] += 1
+        return {
+            "groups": len(projects),
+            "students": len(threads),
+            "seconds": elapsed,
+            "requests": len(samples),
+            "rounds": sum(rounds.values()),
+            "throughput": len(samples) / elapsed if elapsed else 0.0,
+            "overall": _percentiles([s[1] for s in samples]) if samples else _percentiles([0.0]),
+            "errors": dict(errors),
+            "endpoints": {
+                name: {"count": len(values), "errors": endpoint_errors[name], **_percentiles(values)}
+                for name, values in sorted(by_endpoint.items())
+            },
+        }
+
+    def report(self, level):
+        self.stdout.write(
+            f"{level['requests']} requests, {level['rounds']} workshop rounds in {level['seconds']:.1f} s "
+            f"({level['throughput']:.1f} req/s); errors: {level['errors'] or 'none'}"
+        )
+        self.stdout.write(f"{'endpoint':<22} {'count':>6} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'max':>8} {'errors':>6}")
+        for name, s in level["endpoints"].items():
+            self.stdout.write(
+                f"{name:<22} {s['count']:>6} {s['p50']:>8.1f} {s['p90']:>8.1f} {s['p95']:>8.1f} "
+                f"{s['p99']:>8.1f} {s['max']:>8.1f} {s['errors']:>6}"
+            )
+
+
+def seed_groups(count):
+    """Create (or reuse) group accounts loadtest-g01.. with one project each. Returns [(username, project_id)]."""
+    from workshops.models import Project
+
+    password = make_password(PASSWORD)  # hash once; every group shares it
+    groups = []
+    for i in range(1, count + 1):
+        username = f"{USER_PREFIX}{i:02d}"
+        user, _ = User.objects.get_or_create(username=username, defaults={"password": password})
+        project = Project.objects.filter(owner=user).first() or Project.objects.create(
+            owner=user, title=f"Load test group {i}", group_name=f"Group {i}"
+        )
+        groups.append((username, project.id))
+    return groups
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
@@ -0,0 +1,124 @@
+import os
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
+
+SOURCE_ALIAS = "sqlite_source"
+
+
+def register_source(path):
+    """Add the SQLite file as an extra database alias for this process only."""
+    configured = connections.configure_settings({
+        DEFAULT_DB_ALIAS: {"ENGINE": "django.db.backends.sqlite3", "NAME": path},
+    })
+    connections.settings[SOURCE_ALIAS] = configured[DEFAULT_DB_ALIAS]
+
+
+def copied_models():
+    """Every concrete table, including M2M through tables (auth groups/permissions)."""
+    return [
+        model for model in apps.get_models(include_auto_created=True)
+        if model._meta.managed and not model._meta.proxy
+    ]
+
+
+@contextmanager
+def raw_timestamps(model):
+    """bulk_create runs pre_save(); keep created_at/updated_at as stored in the source."""
+    fields = [
+        f for f in model._meta.concrete_fields
+        if isinstance(f, models.DateField) and (f.auto_now or f.auto_now_add)
+    ]
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy every row from an existing SQLite database into the configured default "
+        "database (e.g. PostgreSQL). Run `migrate` against the target first; its tables "
+        "are flushed and filled in one transaction with the original primary keys."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Path to the SQLite file, e.g. db.sqlite3")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--noinput", "--no-input", action="store_false", dest="interactive")
+
+    def handle(self, *args, **options):
+        source = os.path.abspath(options["source"])
+        if not os.path.isfile(source):
+            raise CommandError(f"No such file: {source}")
+        target = connections[DEFAULT_DB_ALIAS]
+        if target.vendor == "sqlite" and os.path.abspath(str(target.settings_dict["NAME"])) == source:
+            raise CommandError("The source is the default database itself.")
+
+        register_source(source)
+        if target.introspection.table_names() and options["interactive"]:
+            answer = input(
+                f"All data in the {target.vendor} database '{target.settings_dict['NAME']}' "
+                "will be replaced. Type 'yes' to continue: "
+            )
+            if answer != "yes":
+                raise CommandError("Cancelled.")
+
+        source_tables = set(connections[SOURCE_ALIAS].introspection.table_names())
+        model_list = [m for m in copied_models() if m._meta.db_table in source_tables]
+        skipped = [m._meta.label for m in copied_models() if m._meta.db_table not in source_tables]
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f"Not in the source (older schema? run migrate on it first): {', '.join(skipped)}"
+            ))
+
+        batch_size = options["batch_size"]
+        counts = {}
+        # Foreign keys are checked at commit, so the table order does not matter.
+        # The flush is part of the transaction: a failed copy leaves the target as it was.
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            # contenttypes/permissions recreated by migrate would clash with the copied ids
+            call_command("flush", interactive=False, inhibit_post_migrate=True, verbosity=0)
+
+            for model in model_list:
+                rows = model._base_manager.using(SOURCE_ALIAS).order_by("pk").iterator(chunk_size=batch_size)
+                manager = model._base_manager.db_manager(DEFAULT_DB_ALIAS)
+                batch, total = [], 0
+                with raw_timestamps(model):
+                    for obj in rows:
+                        batch.append(obj)
+                        if len(batch) >= batch_size:
+                            manager.bulk_create(batch)
+                            total += len(batch)
+                            batch = []
+                    if batch:
+                        manager.bulk_create(batch)
+                        total += len(batch)
+                counts[model._meta.label] = total
+                if options["verbosity"] > 1:
+                    self.stdout.write(f"  {model._meta.label}: {total}")
+
+            # Serial/identity sequences still start at 1 after explicit-pk inserts
+            statements = target.ops.sequence_reset_sql(no_style(), model_list)
+            if statements:
+                with target.cursor() as cursor:
+                    for sql in statements:
+                        cursor.execute(sql)
+
+        mismatched = [
+            label for label, n in counts.items()
+            if apps.get_model(label)._base_manager.using(DEFAULT_DB_ALIAS).count() != n
+        ]
+        if mismatched:
+            raise CommandError(f"Row counts differ after copying: {', '.join(mismatched)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Copied {sum(counts.values())} row(s) in {len(counts)} table(s) from {source}."
+        ))
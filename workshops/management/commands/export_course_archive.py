@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from workshops.utils.archive import iter_course_archive
+
+
+class Command(BaseCommand):
+    help = "Write a ZIP archive of every project (or an id range) for end-of-semester archival."
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Path of the .zip file to write")
+        parser.add_argument("--start-id", type=int, help="First project id (resume point)")
+        parser.add_argument("--end-id", type=int, help="Last project id")
+        parser.add_argument("--pdf", action="store_true", help="Include the portfolio PDF of each project")
+
+    def handle(self, *args, **options):
+        written = 0
+        with open(options["output"], "wb") as f:
+            for chunk in iter_course_archive(options["start_id"], options["end_id"], options["pdf"]):
+                f.write(chunk)
+                written += len(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} bytes to {options['output']}."))
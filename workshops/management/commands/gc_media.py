@@ -0,0 +1,100 @@
+import os
+import re
+import time
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from workshops.models import ChunkedUpload, IndicatorData, IndicatorDataset, Project
+from workshops.utils.chunked_upload import expire_uploads, part_name
+from workshops.utils.portfolio import PORTFOLIO_DIR
+from workshops.utils.storage import rebuild_refcounts
+
+PORTFOLIO_FOLDER = re.compile(rf"^{PORTFOLIO_DIR}/project_(\d+)/")
+
+
+def walk_files(root, relative=""):
+    """Yield (name relative to MEDIA_ROOT, DirEntry) one directory at a time."""
+    with os.scandir(os.path.join(root, relative)) as entries:
+        for entry in entries:
+            name = f"{relative}/{entry.name}" if relative else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                yield from walk_files(root, name)
+            elif entry.is_file(follow_symlinks=False):
+                yield name, entry
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete media files no database row refers to (replaced uploads, variants of "
+        "deleted rows, portfolios of deleted projects) in one streaming pass over MEDIA_ROOT."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted")
+        parser.add_argument(
+            "--min-age", type=int, default=60,
+            help="Keep files younger than this many minutes (uploads/variants in flight). Default: 60",
+        )
+        parser.add_argument("--rebuild-refcounts", action="store_true", help="Recompute MediaBlob reference counts first")
+
+    def referenced(self):
+        names = set()
+        rows = IndicatorData.objects.exclude(data_image="").values_list("data_image", "variants")
+        for image, variants in rows.iterator(chunk_size=2000):
+            if image:
+                names.add(image)
+            for entry in (variants or {}).values():
+                names.update(v for k, v in entry.items() if k in ("webp", "jpeg"))
+        names.update(IndicatorDataset.objects.values_list("file", flat=True).iterator())
+        # uploads still in progress
+        names.update(part_name(u) for u in ChunkedUpload.objects.only("pk").iterator())
+        return names
+
+    def handle(self, *args, **options):
+        try:
+            root = default_storage.path("")
+        except NotImplementedError:
+            raise CommandError("gc_media needs a filesystem storage backend.")
+        if not os.path.isdir(root):
+            self.stdout.write("MEDIA_ROOT does not exist; nothing to do.")
+            return
+
+        expired = expire_uploads()
+        if expired:
+            self.stdout.write(f"Removed {expired} abandoned chunked upload(s).")
+        if options["rebuild_refcounts"]:
+            self.stdout.write(f"Reference counts rebuilt for {rebuild_refcounts()} file(s).")
+
+        referenced = self.referenced()
+        projects = set(Project.objects.values_list("id", flat=True).iterator())
+        cutoff = time.time() - options["min_age"] * 60
+        dry_run = options["dry_run"]
+
+        scanned = deleted = freed = 0
+        for name, entry in walk_files(root):
+            scanned += 1
+            if name in referenced:
+                continue
+            portfolio = PORTFOLIO_FOLDER.match(name)
+            if portfolio and int(portfolio.group(1)) in projects:
+                continue  # current revisions; generate_portfolio prunes old ones
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime > cutoff:
+                continue
+            deleted += 1
+            freed += stat.st_size
+            self.stdout.write(f"  {'would delete' if dry_run else 'deleted'} {name} ({stat.st_size} bytes)")
+            if not dry_run:
+                os.remove(entry.path)
+
+        if not dry_run:
+            # Drop directories emptied by the pass (bottom-up; MEDIA_ROOT itself stays)
+            for dirpath, dirnames, filenames in os.walk(root, topdown=False):
+                if dirpath != root and not os.listdir(dirpath):
+                    os.rmdir(dirpath)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {scanned} file(s): {deleted} orphan(s) {'found' if dry_run else 'deleted'}, "
+            f"{freed / 1e6:.1f} MB {'reclaimable' if dry_run else 'freed'}."
+        ))
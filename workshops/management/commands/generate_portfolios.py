@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from workshops.models import Project
+from workshops.utils.portfolio import generate_portfolio
+
+
+def _generate(project_id, force):
+    try:
+        return generate_portfolio(project_id, force)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = "Pre-generate portfolio PDFs for the current revision of every project (e.g. before grading)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("project_ids", nargs="*", type=int, help="Only these projects (default: all)")
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--force", action="store_true", help="Re-render even if the revision is stored")
+
+    def handle(self, *args, **options):
+        projects = Project.objects.order_by("id")
+        if options["project_ids"]:
+            projects = projects.filter(id__in=options["project_ids"])
+        ids = list(projects.values_list("id", flat=True))
+
+        failed = 0
+        with ThreadPoolExecutor(max_workers=max(1, options["workers"])) as pool:
+            futures = {pool.submit(_generate, pid, options["force"]): pid for pid in ids}
+            for future in as_completed(futures):
+                try:
+                    key = future.result()
+                    self.stdout.write(f"  project {futures[future]}: {key}")
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"  project {futures[future]}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(f"Generated {len(ids) - failed} portfolio(s), {failed} failed."))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from workshops.models import Project
+from workshops.utils.progress import rebuild_progress
+
+
+class Command(BaseCommand):
+    help = "Recompute ProjectProgress rows from scratch (backfill or repair after raw SQL changes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("project_ids", nargs="*", type=int, help="Only these projects (default: all)")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        projects = Project.objects.order_by("id")
+        if options["project_ids"]:
+            projects = projects.filter(id__in=options["project_ids"])
+
+        ids = list(projects.values_list("id", flat=True))
+        batch_size = options["batch_size"]
+        for start in range(0, len(ids), batch_size):
+            rebuild_progress(Project.objects.filter(id__in=ids[start:start + batch_size]))
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt progress for {len(ids)} project(s)."))
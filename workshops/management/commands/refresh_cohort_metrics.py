@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from workshops.utils.cohort import METRICS, refresh_cohort_metrics
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the cohort analytics snapshots (CohortMetric). "
+        "Schedule with cron, e.g. every 10 minutes with --stale-only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("keys", nargs="*", help=f"Metrics to refresh (default: all). One of: {', '.join(METRICS)}")
+        parser.add_argument("--stale-only", action="store_true", help="Only metrics whose inputs changed since last run")
+
+    def handle(self, *args, **options):
+        unknown = [k for k in options["keys"] if k not in METRICS]
+        if unknown:
+            raise CommandError(f"Unknown metric(s): {', '.join(unknown)}")
+
+        refreshed = refresh_cohort_metrics(keys=options["keys"] or None, stale_only=options["stale_only"])
+        self.stdout.write(self.style.SUCCESS(f"Refreshed {len(refreshed)} metric(s): {', '.join(refreshed) or '-'}"))
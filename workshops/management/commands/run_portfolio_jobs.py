@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from workshops.models import PortfolioJob
+from workshops.utils.portfolio import requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued portfolio PDF jobs (PortfolioJob). Jobs of web processes that "
+        "died are queued again. Use --loop to keep running as a worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep polling for new jobs instead of exiting")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds between polls with --loop. Default: 2")
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = requeue_stale_jobs()
+            if requeued:
+                self.stdout.write(f"Re-queued {requeued} stale job(s).")
+            ran = self.run_queued()
+            if ran:
+                self.stdout.write(f"Ran {ran} job(s).")
+            if not options["loop"]:
+                break
+            if not ran:
+                time.sleep(options["interval"])
+
+    def run_queued(self):
+        ran = 0
+        ids = list(PortfolioJob.objects.filter(status="queued").order_by("created_at").values_list("id", flat=True))
+        for job_id in ids:
+            # another worker or web process may have claimed it meanwhile
+            if run_job(job_id):
+                ran += 1
+        return ran
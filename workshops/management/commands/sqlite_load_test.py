@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+
+MODES = {"default": "0", "tuned": "1"}
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrent-writer load test for SQLite: replays the autosave writes "
+        "(overview box, SWOT add, stakeholder slider) from N threads against a scratch "
+        "copy of the schema, once with Django's default SQLite settings and once with "
+        "the concurrency mode (SQLITE_TUNING), and compares throughput and lock errors."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+        parser.add_argument("--seconds", type=float, default=5.0, help="Duration of each run")
+        parser.add_argument("--shared", action="store_true", help="All writers edit one project (a team) instead of one each")
+        parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("The default database is not SQLite.")
+        if options["worker"]:
+            return self.run_worker(options["writers"][0], options["seconds"], options["shared"])
+
+        manage = os.path.join(settings.BASE_DIR, "manage.py")
+        with tempfile.TemporaryDirectory() as tmp:
+            template = os.path.join(tmp, "template.sqlite3")
+            env = {**os.environ, "SQLITE_PATH": template, "SQLITE_TUNING": "0", "DB_ENGINE": "sqlite"}
+            self.stdout.write("Migrating a scratch database ...")
+            subprocess.run([sys.executable, manage, "migrate", "-v0"], env=env, check=True)
+
+            self.stdout.write(f"{'writers':>7} {'mode':>8} {'writes/s':>9} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8}")
+            for writers in options["writers"]:
+                for mode, tuning in MODES.items():
+                    db = os.path.join(tmp, f"{mode}-{writers}.sqlite3")
+                    shutil.copyfile(template, db)
+                    cmd = [sys.executable, manage, "sqlite_load_test", "--worker",
+                           "--writers", str(writers), "--seconds", str(options["seconds"])]
+                    if options["shared"]:
+                        cmd.append("--shared")
+                    out = subprocess.run(
+                        cmd, env={**env, "SQLITE_PATH": db, "SQLITE_TUNING": tuning},
+                        check=True, capture_output=True, text=True,
+                    ).stdout
+                    r = json.loads(out.strip().splitlines()[-1])
+                    self.stdout.write(
+                        f"{writers:>7} {mode:>8} {r['writes_per_s']:>9.1f} {r['errors']:>7} "
+                        f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f}"
+                    )
+
+    def run_worker(self, writers, seconds, shared):
+        from workshops.models import Project, Stakeholder, SWOTItem
+        from workshops.utils.writes import update_project_json
+
+        owner = User.objects.create_user("loadtest")
+        projects = [
+            Project.objects.create(owner=owner, title=f"Load test {i}")
+            for i in range(1 if shared else writers)
+        ]
+        stakeholders = [Stakeholder.objects.create(project=p, name="Stakeholder") for p in projects]
+        connection.close()
+
+        latencies, errors = [], []
+        lock = threading.Lock()
+        barrier = threading.Barrier(writers)
+
+        def writer(n):
+            project = Project.objects.get(pk=projects[n % len(projects)].pk)
+            stakeholder = Stakeholder.objects.get(pk=stakeholders[n % len(stakeholders)].pk)
+            box = ["A1", "A2", "B1", "B2", "C1", "C2", "C3"][n % 7]
+            mine, failed, i = [], 0, 0
+            barrier.wait()
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                i += 1
+                start = time.perf_counter()
+                try:
+                    if i % 3 == 0:
+                        update_project_json(
+                            project, "overview",
+                            lambda overview: overview.__setitem__(box, {"title": box, "text": f"draft {i}"}),
+                        )
+                    elif i % 3 == 1:
+                        with transaction.atomic():
+                            SWOTItem.objects.create(project=project, category="S", title=f"item {i}")
+                    else:
+                        stakeholder.power = i % 100
+                        with transaction.atomic():
+                            stakeholder.save()
+                except OperationalError:
+                    failed += 1
+                    continue
+                mine.append(time.perf_counter() - start)
+            connection.close()
+            with lock:
+                latencies.extend(mine)
+                errors.append(failed)
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.stdout.write(json.dumps({
+            "writes_per_s": len(latencies) / seconds,
+            "errors": sum(errors),
+            "p50_ms": _percentile(latencies, 0.50) * 1000,
+            "p95_ms": _percentile(latencies, 0.95) * 1000,
+        }))
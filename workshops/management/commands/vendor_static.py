@@ -0,0 +1,49 @@
+import hashlib
+import os
+import re
+import urllib.request
+
+from django.core.management.base import BaseCommand, CommandError
+
+from workshops.utils.static_files import VENDOR_LIBRARIES
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "static")
+# .map files are not vendored; drop the references so browsers don't request them
+SOURCE_MAP = re.compile(rb"\n?(//# sourceMappingURL=[^\n]*|/\*# sourceMappingURL=[^*]*\*/)\s*$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Download the pinned front-end libraries (VENDOR_LIBRARIES) into workshops/static/vendor/ "
+        "so pages load them locally instead of from CDNs. Commit the files, then run collectstatic."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("names", nargs="*", help="Only these libraries (default: all)")
+        parser.add_argument("--force", action="store_true", help="Download again even if present")
+
+    def handle(self, *args, **options):
+        names = options["names"] or list(VENDOR_LIBRARIES)
+        unknown = set(names) - set(VENDOR_LIBRARIES)
+        if unknown:
+            raise CommandError(f"Unknown libraries: {', '.join(sorted(unknown))}")
+
+        for name in names:
+            lib = VENDOR_LIBRARIES[name]
+            target = os.path.join(STATIC_DIR, *lib["path"].split("/"))
+            if os.path.exists(target) and not options["force"]:
+                self.stdout.write(f"{name} {lib['version']}: present")
+                continue
+            try:
+                with urllib.request.urlopen(lib["url"], timeout=30) as response:
+                    data = response.read()
+            except OSError as e:
+                raise CommandError(f"Downloading {name} from {lib['url']} failed: {e}")
+            data = SOURCE_MAP.sub(b"\n", data)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, "wb") as f:
+                f.write(data)
+            self.stdout.write(
+                f"{name} {lib['version']}: {len(data) // 1024} KB, sha384 {hashlib.sha384(data).hexdigest()[:16]}…"
+            )
+        self.stdout.write(self.style.SUCCESS("Done. Run `python manage.py collectstatic` to fingerprint and compress."))
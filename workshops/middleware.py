@@ -0,0 +1,206 @@
+import json
+import mimetypes
+import os
+import random
+from functools import lru_cache
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed, SuspiciousFileOperation
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+
+from .utils import profiling
+from .utils.static_files import HASHED_NAME
+
+FOREVER = "public, max-age=31536000, immutable"
+SHORT = "public, max-age=300"
+# Accept-Encoding token -> file suffix, in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+@lru_cache(maxsize=4096)
+def _static_file(name):
+    """(path, size, mtime, {encoding: (path, size)}) for a collected file, or None."""
+    try:
+        path = safe_join(settings.STATIC_ROOT, name)
+    except SuspiciousFileOperation:
+        return None
+    if not os.path.isfile(path):
+        return None
+    stat = os.stat(path)
+    variants = {}
+    for encoding, suffix in ENCODINGS:
+        if os.path.isfile(path + suffix):
+            variants[encoding] = (path + suffix, os.path.getsize(path + suffix))
+    return path, stat.st_size, int(stat.st_mtime), variants
+
+
+def _accepts(header, encoding):
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        if token.strip().lower() == encoding:
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class StaticFilesMiddleware:
+    """
+    Serve STATIC_ROOT (the collectstatic output) directly, for ASGI servers
+    and deployments without nginx in front. Picks the pre-built .br/.gz
+    variant the client accepts, and marks fingerprinted names as immutable
+    so repeat page loads fetch no script bytes at all. Everything else passes
+    through; under runserver with DEBUG the staticfiles app serves first.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.enabled = bool(settings.STATIC_ROOT)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.serve(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        return self.serve(request) or await self.get_response(request)
+
+    def serve(self, request):
+        if not self.enabled or request.method not in ("GET", "HEAD") or not request.path.startswith(self.prefix):
+            return None
+        name = request.path[len(self.prefix):]
+        found = _static_file(name)
+        if found is None:
+            return None
+        path, size, mtime, variants = found
+
+        etag = f'"{mtime:x}-{size:x}"'
+        cache_control = FOREVER if HASHED_NAME.search(name) else SHORT
+        if etag in request.headers.get("If-None-Match", ""):
+            response = HttpResponseNotModified()
+            response.headers["ETag"] = etag
+            response.headers["Cache-Control"] = cache_control
+            return response
+
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type in ("application/javascript", "text/javascript"):
+            content_type += "; charset=utf-8"
+        accept = request.headers.get("Accept-Encoding", "")
+        encoding = next((e for e, _ in ENCODINGS if e in variants and _accepts(accept, e)), None)
+        if encoding:
+            path, size = variants[encoding]
+
+        response = FileResponse(open(path, "rb"), content_type=content_type, filename=os.path.basename(name))
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        if variants:
+            response.headers["Vary"] = "Accept-Encoding"
+        response.headers["Content-Length"] = str(size)
+        response.headers["ETag"] = etag
+        response.headers["Last-Modified"] = http_date(mtime)
+        response.headers["Cache-Control"] = cache_control
+        response.headers.pop("Content-Disposition", None)
+        return response
+
+
+class RequestProfilingMiddleware:
+    """
+    Per-request view name, wall time, SQL query count and time, duplicate
+    queries and template render time (REQUEST_PROFILING=on, or =sampled
+    for a REQUEST_PROFILING_SAMPLE_RATE fraction of requests). Results go
+    out as a JSON line on the "workshops.profiling" logger and a
+    RequestSample row for the staff profiling page, and as a Server-Timing
+    header on responses to staff users (or everyone with DEBUG).
+    Streaming responses are timed until the response object is returned.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        mode = getattr(settings, "REQUEST_PROFILING", "off")
+        if mode not in ("on", "sampled"):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = 1.0 if mode == "on" else getattr(settings, "REQUEST_PROFILING_SAMPLE_RATE", 0.05)
+        connection_created.connect(profiling.install_query_wrapper, dispatch_uid="request-profiling")
+        for connection in connections.all(initialized_only=True):
+            profiling.install_query_wrapper(connection)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        profile, token = profiling.start_profile()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiling.stop_profile(token)
+        user = getattr(request, "user", None)
+        return self.finish(request, response, profile, user is not None and user.is_staff)
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+        profile, token = profiling.start_profile()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiling.stop_profile(token)
+        # request.user is lazy and loads the session user synchronously
+        user = await request.auser() if hasattr(request, "auser") else None
+        return self.finish(request, response, profile, user is not None and user.is_staff)
+
+    def finish(self, request, response, profile, is_staff):
+        total_ms = profile.total_ms
+        match = getattr(request, "resolver_match", None)
+        view_name = (match.view_name if match else None) or "<unresolved>"
+        duplicates = profile.duplicate_queries
+
+        # Timings would show outsiders which requests are expensive
+        if settings.DEBUG or is_staff:
+            response.headers["Server-Timing"] = ", ".join([
+                f"total;dur={total_ms:.1f}",
+                f'db;dur={profile.db_ms:.1f};desc="{profile.queries} queries"',
+                f"tpl;dur={profile.template_ms:.1f}",
+                f'dup;desc="{duplicates} duplicate queries"',
+            ])
+
+        record = {
+            "view": view_name,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(total_ms, 2),
+            "db_ms": round(profile.db_ms, 2),
+            "queries": profile.queries,
+            "duplicate_queries": duplicates,
+            "template_ms": round(profile.template_ms, 2),
+        }
+        profiling.logger.info(json.dumps(record))
+        for shape, count in profile.repeated_shapes():
+            profiling.logger.warning(json.dumps({
+                "view": view_name, "event": "repeated_query", "count": count, "sql": shape[:500],
+            }))
+
+        profiling.record_sample(
+            view_name=view_name[:200],
+            method=request.method[:10],
+            status=response.status_code,
+            total_ms=total_ms,
+            db_ms=profile.db_ms,
+            queries=profile.queries,
+            duplicate_queries=duplicates,
+            template_ms=profile.template_ms,
+        )
+        return response
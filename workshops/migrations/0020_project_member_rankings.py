@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshops', '0019_indicatordata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='member_rankings',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='ranking_consensus',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
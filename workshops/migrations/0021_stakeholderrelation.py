@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:59
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshops', '0020_project_member_rankings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StakeholderRelation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('relation_type', models.CharField(choices=[('INFLUENCE', 'Influence'), ('ALLIANCE', 'Alliance'), ('CONFLICT', 'Conflict')], default='INFLUENCE', max_length=10)),
+                ('weight', models.FloatField(default=1.0, validators=[django.core.validators.MinValueValidator(0.0), django.core.validators.MaxValueValidator(10.0)])),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stakeholder_relations', to='workshops.project')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outgoing_relations', to='workshops.stakeholder')),
+                ('target', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='incoming_relations', to='workshops.stakeholder')),
+            ],
+            options={
+                'unique_together': {('source', 'target', 'relation_type')},
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshops', '0021_stakeholderrelation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectProgress',
+            fields=[
+                ('project', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='progress', serialize=False, to='workshops.project')),
+                ('overview_done', models.BooleanField(default=False)),
+                ('ranking_done', models.BooleanField(default=False)),
+                ('stakeholders_count', models.PositiveIntegerField(default=0)),
+                ('problems_count', models.PositiveIntegerField(default=0)),
+                ('objectives_count', models.PositiveIntegerField(default=0)),
+                ('indicators_count', models.PositiveIntegerField(default=0)),
+                ('indicator_data_count', models.PositiveIntegerField(default=0)),
+                ('swot_count', models.PositiveIntegerField(default=0)),
+                ('actions_count', models.PositiveIntegerField(default=0)),
+                ('qsorts_count', models.PositiveIntegerField(default=0)),
+                ('scenarios_count', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveSmallIntegerField(default=0)),
+                ('section_updated_at', models.JSONField(blank=True, default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('revision', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshops', '0022_projectprogress'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CohortMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=50, unique=True)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('computed_at', models.DateTimeField()),
+                ('duration_ms', models.FloatField(default=0.0)),
+            ],
+        ),
+    ]
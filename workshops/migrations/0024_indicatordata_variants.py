@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshops', '0023_cohortmetric'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='indicatordata',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='indicatordata',
+            name='variants_source',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+    ]
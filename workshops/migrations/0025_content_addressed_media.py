@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:14
+
+import workshops.utils.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshops', '0024_indicatordata_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('refcount', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='indicatordata',
+            name='data_image',
+            field=models.ImageField(blank=True, null=True, storage=workshops.utils.storage.get_content_storage, upload_to='indicator_uploads/'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:15
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshops', '0025_content_addressed_media'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('indicator_id', models.CharField(max_length=50)),
+                ('indicator_name', models.CharField(max_length=255)),
+                ('filename', models.CharField(max_length=255)),
+                ('total_size', models.PositiveBigIntegerField()),
+                ('chunk_size', models.PositiveIntegerField()),
+                ('sha256', models.CharField(blank=True, default='', max_length=64)),
+                ('next_chunk', models.PositiveIntegerField(default=0)),
+                ('received_bytes', models.PositiveBigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('uploading', 'Uploading'), ('complete', 'Complete')], default='uploading', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunked_uploads', to='workshops.project')),
+            ],
+        ),
+    ]
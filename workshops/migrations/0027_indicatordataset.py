@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshops', '0026_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectprogress',
+            name='datasets_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='IndicatorDataset',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='indicator_datasets/')),
+                ('source_name', models.CharField(max_length=255)),
+                ('columns', models.JSONField(default=list)),
+                ('rows', models.PositiveIntegerField(default=0)),
+                ('index_column', models.CharField(blank=True, default='', max_length=255)),
+                ('value_column', models.CharField(blank=True, default='', max_length=255)),
+                ('stats', models.JSONField(blank=True, default=dict)),
+                ('stats_version', models.PositiveSmallIntegerField(default=0)),
+                ('uploaded_at', models.DateTimeField(auto_now=True)),
+                ('indicator', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='dataset', to='workshops.indicator')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='datasets', to='workshops.project')),
+            ],
+        ),
+    ]
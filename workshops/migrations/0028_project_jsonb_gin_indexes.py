@@ -0,0 +1,36 @@
+from django.db import migrations
+
+# Project JSON columns queried with __contains / __has_key (jsonb @> and ?).
+# GIN indexes only exist on PostgreSQL; on SQLite this migration is a no-op.
+GIN_INDEXES = {
+    "workshops_project_scenario_data_gin": "scenario_data",
+    "workshops_project_overview_gin": "overview",
+    "workshops_project_ranking_order_gin": "indicator_ranking_order",
+}
+
+
+def create_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name, column in GIN_INDEXES.items():
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "{name}" ON "workshops_project" USING gin ("{column}")'
+        )
+
+
+def drop_gin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in GIN_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS "{name}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshops', '0027_indicatordataset'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_gin_indexes, drop_gin_indexes),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshops', '0028_project_jsonb_gin_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestSample',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('view_name', models.CharField(db_index=True, max_length=200)),
+                ('method', models.CharField(max_length=10)),
+                ('status', models.PositiveSmallIntegerField()),
+                ('total_ms', models.FloatField()),
+                ('db_ms', models.FloatField(default=0.0)),
+                ('queries', models.PositiveIntegerField(default=0)),
+                ('duplicate_queries', models.PositiveIntegerField(default=0)),
+                ('template_ms', models.FloatField(default=0.0)),
+                ('created_at', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
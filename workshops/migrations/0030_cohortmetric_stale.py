@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshops', '0029_requestsample'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cohortmetric',
+            name='stale',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -1,8 +1,12 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db.models import JSONField
 
+from .utils.storage import get_content_storage
+
 
 class Project(models.Model):
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="projects")
@@ -12,6 +16,11 @@ class Project(models.Model):
     indicator_ranking_order = JSONField(default=list, blank=True)
     indicator_ranking_groups = JSONField(default=list, blank=True)
 
+    # 🗳️ Workshop 3.2 – one SRF ranking per team member + aggregated consensus
+    # {member_key: {label, order, groups, updated_at}}
+    member_rankings = JSONField(default=dict, blank=True)
+    ranking_consensus = JSONField(default=dict, blank=True)
+
 
     # 🧠 Store Workshop 0 / 1 data (overview, etc.)
     overview = models.JSONField(default=dict, blank=True)
@@ -74,6 +83,31 @@ class Stakeholder(models.Model):
         return self.name
 
 
+class StakeholderRelation(models.Model):
+    """Directed, weighted relationship between two stakeholders of the same project."""
+    RELATION_CHOICES = [
+        ('INFLUENCE', 'Influence'),
+        ('ALLIANCE', 'Alliance'),
+        ('CONFLICT', 'Conflict'),
+    ]
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='stakeholder_relations')
+    source = models.ForeignKey(Stakeholder, on_delete=models.CASCADE, related_name='outgoing_relations')
+    target = models.ForeignKey(Stakeholder, on_delete=models.CASCADE, related_name='incoming_relations')
+    relation_type = models.CharField(max_length=10, choices=RELATION_CHOICES, default='INFLUENCE')
+    weight = models.FloatField(
+        default=1.0,
+        validators=[MinValueValidator(0.0), MaxValueValidator(10.0)]
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('source', 'target', 'relation_type')
+
+    def __str__(self):
+        return f"{self.source} → {self.target} ({self.get_relation_type_display()})"
+
+
 class Problem(models.Model):
     PROBLEM_TYPE_CHOICES = [
         ('CORE', 'Core Problem'),
@@ -140,6 +174,8 @@ class MasterIndicator(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField(blank=True, null=True)
     unit = models.CharField(max_length=100, blank=True, null=True)
+    # part of utils.fragments.catalog_version, so admin edits re-render the catalog fragment
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -208,11 +244,206 @@ class IndicatorData(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='indicator_data')
     indicator_id = models.CharField(max_length=50) # The ID of the indicator selected in WS 3.1
     indicator_name = models.CharField(max_length=255)
-    data_image = models.ImageField(upload_to='indicator_uploads/', blank=True, null=True)
+    # Stored by content hash: identical uploads share one file (see utils/storage.py)
+    data_image = models.ImageField(
+        upload_to='indicator_uploads/', storage=get_content_storage, blank=True, null=True
+    )
     uploaded_at = models.DateTimeField(auto_now=True)
+    # Resized, EXIF-free copies built in the background (utils/images.py):
+    # {"thumb": {"webp": name, "jpeg": name, "width": w, "height": h}, "display": {...}}
+    variants = models.JSONField(default=dict, blank=True)
+    # data_image name the variants were built from; differs while a rebuild is pending
+    variants_source = models.CharField(max_length=255, blank=True, default="")
 
     class Meta:
         unique_together = ('project', 'indicator_id')
 
     def __str__(self):
-        return f"{self.indicator_name} Data - {self.project.title}"
\ No newline at end of file
+        return f"{self.indicator_name} Data - {self.project.title}"
+
+    def variant(self, size, fmt="jpeg"):
+        """Storage name of a current variant, or None if not built (yet)."""
+        if not self.data_image or self.variants_source != self.data_image.name:
+            return None
+        return (self.variants.get(size) or {}).get(fmt)
+
+class IndicatorDataset(models.Model):
+    """
+    Numeric data behind an accepted indicator (time series or spatial table),
+    uploaded as CSV and stored column by column in a compressed .npz file.
+    Summary statistics are computed once and cached in `stats` (utils/datasets.py).
+    """
+    indicator = models.OneToOneField(Indicator, on_delete=models.CASCADE, related_name='dataset')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='datasets')
+    file = models.FileField(upload_to='indicator_datasets/')
+    source_name = models.CharField(max_length=255)
+    # [{"name", "kind": "number"|"date"|"text", "unit"}] in file order
+    columns = models.JSONField(default=list)
+    rows = models.PositiveIntegerField(default=0)
+    index_column = models.CharField(max_length=255, blank=True, default="")
+    value_column = models.CharField(max_length=255, blank=True, default="")
+    stats = models.JSONField(default=dict, blank=True)
+    stats_version = models.PositiveSmallIntegerField(default=0)
+    uploaded_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source_name} ({self.rows} rows) - {self.indicator.name}"
+
+
+class ChunkedUpload(models.Model):
+    """An indicator data file being uploaded in numbered chunks (utils/chunked_upload.py)."""
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('complete', 'Complete'),
+    ]
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='chunked_uploads')
+    indicator_id = models.CharField(max_length=50)
+    indicator_name = models.CharField(max_length=255)
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True, default="")  # optional, whole file
+    next_chunk = models.PositiveIntegerField(default=0)
+    received_bytes = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='uploading')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received_bytes}/{self.total_size}) - {self.project.title}"
+
+    @property
+    def total_chunks(self):
+        return max(1, -(-self.total_size // self.chunk_size))
+
+
+class MediaBlob(models.Model):
+    """Reference count of a content-addressed media file."""
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
+
+class ProjectProgress(models.Model):
+    """
+    Denormalized workshop progress, one row per project.
+    Kept current by the signals in workshops/signals.py (and explicit refreshes
+    after bulk operations), so progress reads are a single primary-key lookup.
+    Rebuild with: python manage.py rebuild_progress
+    """
+    # (key, label, completion rule) in workshop order
+    WORKSHOPS = [
+        ('overview', 'Workshop 1 — Idea Canvas', lambda p: p.overview_done),
+        ('stakeholders', 'Workshop 2.1 — Stakeholder Analysis', lambda p: p.stakeholders_count > 0),
+        ('problem_tree', 'Workshop 2.2 — Problem Tree', lambda p: p.problems_count > 0),
+        ('objective_tree', 'Workshop 2.3 — Objective Tree', lambda p: p.objectives_count > 0),
+        ('indicator_selection', 'Workshop 3.1 — Indicator Selection', lambda p: p.indicators_count > 0),
+        ('indicator_ranking', 'Workshop 3.2 — Indicator Ranking', lambda p: p.ranking_done),
+        ('indicator_analysis', 'Workshop 4.1 — Indicator Analysis',
+         lambda p: p.indicator_data_count > 0 or p.datasets_count > 0),
+        ('swot', 'Workshop 4.2 — SWOT Analysis', lambda p: p.swot_count > 0),
+        ('scenario', 'Workshop 5 — Scenario Building', lambda p: p.qsorts_count > 0 or p.scenarios_count > 0),
+    ]
+
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, primary_key=True, related_name='progress')
+
+    overview_done = models.BooleanField(default=False)
+    ranking_done = models.BooleanField(default=False)
+    stakeholders_count = models.PositiveIntegerField(default=0)
+    problems_count = models.PositiveIntegerField(default=0)
+    objectives_count = models.PositiveIntegerField(default=0)
+    indicators_count = models.PositiveIntegerField(default=0)  # accepted indicators
+    indicator_data_count = models.PositiveIntegerField(default=0)
+    datasets_count = models.PositiveIntegerField(default=0)
+    swot_count = models.PositiveIntegerField(default=0)
+    actions_count = models.PositiveIntegerField(default=0)
+    qsorts_count = models.PositiveIntegerField(default=0)
+    scenarios_count = models.PositiveIntegerField(default=0)
+
+    completed = models.PositiveSmallIntegerField(default=0)
+    # {workshop key: ISO timestamp of the last change}
+    section_updated_at = JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Bumped on every change; use as a cache key for derived output
+    revision = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Progress: {self.project_id} ({self.completed}/{len(self.WORKSHOPS)})"
+
+    @property
+    def flags(self):
+        return {key: bool(rule(self)) for key, _, rule in self.WORKSHOPS}
+
+    @property
+    def total(self):
+        return len(self.WORKSHOPS)
+
+    @property
+    def percent(self):
+        return int(self.completed * 100 / self.total)
+
+
+class CohortMetric(models.Model):
+    """
+    Materialized cross-project aggregate for the instructor analytics page.
+    Refreshed by `python manage.py refresh_cohort_metrics` (e.g. from cron)
+    or the refresh button on the page; see workshops/utils/cohort.py.
+    """
+    key = models.CharField(max_length=50, unique=True)
+    data = JSONField(default=dict, blank=True)
+    computed_at = models.DateTimeField()
+    duration_ms = models.FloatField(default=0.0)
+    # set when a project is deleted: no progress row is left to show the change
+    stale = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.key} ({self.computed_at:%Y-%m-%d %H:%M})"
+
+
+class RequestSample(models.Model):
+    """
+    One profiled request, written in batches by RequestProfilingMiddleware
+    (see workshops/utils/profiling.py). Read by the staff profiling page.
+    """
+    view_name = models.CharField(max_length=200, db_index=True)
+    method = models.CharField(max_length=10)
+    status = models.PositiveSmallIntegerField()
+    total_ms = models.FloatField()
+    db_ms = models.FloatField(default=0.0)
+    queries = models.PositiveIntegerField(default=0)
+    duplicate_queries = models.PositiveIntegerField(default=0)
+    template_ms = models.FloatField(default=0.0)
+    created_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.method} {self.view_name} {self.total_ms:.0f} ms"
+
+
+class PortfolioJob(models.Model):
+    """
+    A portfolio PDF render for one project revision (workshops/utils/portfolio.py).
+    The key is the storage path of the PDF, so every process and worker shares
+    one job per revision. Run by the in-process pool and/or
+    `python manage.py run_portfolio_jobs`.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    key = models.CharField(max_length=255, unique=True)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='portfolio_jobs')
+    force = models.BooleanField(default=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued', db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key} ({self.status})"
@@ -0,0 +1,119 @@
+import threading
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import IndicatorData, IndicatorDataset, Project
+from .utils.cohort import mark_cohort_metrics_stale
+from .utils.progress import (
+    CHILD_SECTIONS,
+    changed_project_sections,
+    rebuild_progress,
+    refresh_progress,
+    remember_project_json,
+)
+from .utils.storage import acquire, release
+
+
+@receiver(post_init, sender=Project)
+def project_loaded(sender, instance, **kwargs):
+    remember_project_json(instance)
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Keep the JSON-derived workshop flags (overview, ranking, scenario) current."""
+    if raw:
+        return
+    if created:
+        rebuild_progress(Project.objects.filter(pk=instance.pk))
+    else:
+        # title/description edits still bump the revision; only changed
+        # JSON sections get a new timestamp (and make cohort metrics stale)
+        refresh_progress(
+            instance.pk, project=instance,
+            project_sections=changed_project_sections(instance, update_fields),
+        )
+    remember_project_json(instance)
+
+
+# Projects being deleted in this thread: their cascaded child rows skip the
+# per-row progress refresh (the progress row goes away with the project).
+_deleting = threading.local()
+
+
+def _projects_being_deleted():
+    if not hasattr(_deleting, "ids"):
+        _deleting.ids = set()
+    return _deleting.ids
+
+
+@receiver(pre_delete, sender=Project)
+def project_deleting(sender, instance, **kwargs):
+    _projects_being_deleted().add(instance.pk)
+
+
+@receiver(post_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    _projects_being_deleted().discard(instance.pk)
+    mark_cohort_metrics_stale()
+
+
+def child_saved(sender, instance, created, raw=False, **kwargs):
+    """Update the one workshop section the saved row belongs to."""
+    if raw:
+        return
+    refresh_progress(instance.project_id, model=sender, delta=1 if created else 0)
+
+
+def child_deleted(sender, instance, **kwargs):
+    if instance.project_id in _projects_being_deleted():
+        return
+    refresh_progress(instance.project_id, model=sender, delta=-1)
+
+
+for model in CHILD_SECTIONS:
+    post_save.connect(child_saved, sender=model, dispatch_uid=f"progress_save_{model.__name__}")
+    post_delete.connect(child_deleted, sender=model, dispatch_uid=f"progress_delete_{model.__name__}")
+
+
+# -------------------------
+# Media reference counting
+# -------------------------
+
+@receiver(post_init, sender=IndicatorData)
+def remember_image(sender, instance, **kwargs):
+    # None when the field was deferred: the previous file is unknown
+    if "data_image" in instance.get_deferred_fields():
+        instance._stored_image = None
+    else:
+        instance._stored_image = str(instance.__dict__.get("data_image") or "")
+
+
+@receiver(post_save, sender=IndicatorData)
+def image_saved(sender, instance, raw=False, **kwargs):
+    """Move the reference from the previous file to the new one."""
+    if raw:
+        return
+    old, new = instance._stored_image, instance.data_image.name or ""
+    if old is None or old == new:
+        return
+    acquire(new, size=instance.data_image.size if new else None)
+    release(old)
+    instance._stored_image = new
+
+
+@receiver(post_delete, sender=IndicatorData)
+def image_deleted(sender, instance, **kwargs):
+    release(instance.data_image.name or "")
+    names = [v for entry in (instance.variants or {}).values() for k, v in entry.items() if k in ("webp", "jpeg")]
+    transaction.on_commit(lambda: [default_storage.delete(name) for name in names])
+
+
+@receiver(post_delete, sender=IndicatorDataset)
+def dataset_deleted(sender, instance, **kwargs):
+    name = instance.file.name
+    if name:
+        transaction.on_commit(lambda: default_storage.delete(name))
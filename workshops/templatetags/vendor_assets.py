@@ -0,0 +1,44 @@
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import ImproperlyConfigured
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from ..utils.static_files import VENDOR_LIBRARIES
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def _asset_url(name):
+    """
+    Local (fingerprinted) URL of a vendored library. Its pinned CDN URL only
+    with VENDOR_CDN_FALLBACK; otherwise a missing file is a configuration error.
+    """
+    lib = VENDOR_LIBRARIES[name]
+    path = lib["path"]
+    if settings.DEBUG:
+        vendored = finders.find(path) is not None
+    else:
+        vendored = path in getattr(staticfiles_storage, "hashed_files", {}) or staticfiles_storage.exists(path)
+    if vendored:
+        return static(path)
+    if not settings.VENDOR_CDN_FALLBACK:
+        raise ImproperlyConfigured(f"{path} is not vendored; run `python manage.py vendor_static`.")
+    return lib["url"]
+
+
+@register.simple_tag
+def vendor_asset(name):
+    """
+    <script>/<link> tag for a library from VENDOR_LIBRARIES.
+    Usage: {% load vendor_assets %}{% vendor_asset "d3" %}
+    """
+    url = _asset_url(name)
+    if VENDOR_LIBRARIES[name]["path"].endswith(".css"):
+        return format_html('<link href="{}" rel="stylesheet">', url)
+    return format_html('<script src="{}"></script>', url)
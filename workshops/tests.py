@@ -1,3 +1,779 @@
-from django.test import TestCase
+import hashlib
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from io import BytesIO, StringIO
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+import numpy as np
+from PIL import Image
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .management.commands.copy_sqlite_data import SOURCE_ALIAS
+from .models import ChunkedUpload, IndicatorData, MediaBlob, PortfolioJob, Project, ProjectProgress, Stakeholder
+from .templatetags.vendor_assets import _asset_url, vendor_asset
+from .utils import mcda, network, portfolio, sensitivity, storage, writes
+from .utils.consensus import _kemeny_local_search, aggregate_rankings
+from .utils.progress import get_progress
+from .utils.stakeholder_matrix import aggregate_stakeholder_matrix
+from .utils.static_files import VENDOR_LIBRARIES
+
+GIN_INDEXES = import_module("workshops.migrations.0028_project_jsonb_gin_indexes").GIN_INDEXES
+
+
+# -------------------------
+# Database backends (run with DB_ENGINE=sqlite and DB_ENGINE=postgres)
+# -------------------------
+
+class JSONLookupTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user("owner")
+        cls.with_scenarios = Project.objects.create(
+            owner=owner, title="A", overview={"A1": "Floods"}, scenario_data={"actions": [{"id": 1}], "round": 2},
+        )
+        cls.empty = Project.objects.create(owner=owner, title="B")
+
+    def test_has_key(self):
+        self.assertEqual(list(Project.objects.filter(overview__has_key="A1")), [self.with_scenarios])
+        self.assertEqual(list(Project.objects.exclude(scenario_data__has_key="actions")), [self.empty])
+
+    def test_key_transform(self):
+        self.assertEqual(list(Project.objects.filter(scenario_data__round=2)), [self.with_scenarios])
+        self.assertEqual(list(Project.objects.filter(overview__A1__icontains="flood")), [self.with_scenarios])
+
+    @skipUnlessDBFeature("supports_json_field_contains")
+    def test_contains(self):
+        # jsonb @> on PostgreSQL, served by the GIN indexes of migration 0028
+        self.assertEqual(list(Project.objects.filter(scenario_data__contains={"round": 2})), [self.with_scenarios])
+        self.assertEqual(list(Project.objects.filter(scenario_data__contains={"round": 3})), [])
+
+    @skipUnless(connection.vendor == "postgresql", "GIN indexes are PostgreSQL only")
+    def test_gin_indexes(self):
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Project._meta.db_table)
+        self.assertLessEqual(set(GIN_INDEXES), set(constraints))
+
+
+@skipUnless(SOURCE_ALIAS in settings.DATABASES, "needs workshop_service.settings_test")
+class CopySqliteDataTests(TransactionTestCase):
+    """copy_sqlite_data from a migrated SQLite file into the test database (either backend)."""
+
+    databases = {"default", SOURCE_ALIAS} if SOURCE_ALIAS in settings.DATABASES else {"default"}
+
+    def setUp(self):
+        self.path = settings.DATABASES[SOURCE_ALIAS]["NAME"]
+        self.owner = User.objects.db_manager(SOURCE_ALIAS).create_user("source-owner")
+        self.created = timezone.now() - timedelta(days=30)
+        self.project = Project.objects.using(SOURCE_ALIAS).create(owner=self.owner, title="Copied", id=41)
+        Project.objects.using(SOURCE_ALIAS).filter(pk=41).update(created_at=self.created)
+        Stakeholder.objects.using(SOURCE_ALIAS).create(project=self.project, name="Farmers")
+        self.addCleanup(ContentType.objects.clear_cache)
+
+    def test_copies_rows_with_keys_and_timestamps(self):
+        User.objects.create_user("replaced")
+        call_command("copy_sqlite_data", self.path, interactive=False, verbosity=0, stdout=StringIO())
+
+        self.assertEqual(list(User.objects.values_list("username", flat=True)), ["source-owner"])
+        project = Project.objects.get()
+        self.assertEqual((project.pk, project.title, project.owner_id), (41, "Copied", self.owner.pk))
+        self.assertEqual(project.created_at, self.created)
+        self.assertEqual(list(project.stakeholders.values_list("name", flat=True)), ["Farmers"])
+        # sequences were reset past the copied ids
+        self.assertGreater(Project.objects.create(owner=project.owner, title="New").pk, 41)
+
+    def test_failed_copy_keeps_target(self):
+        User.objects.create_user("kept")
+        with sqlite3.connect(self.path) as raw:
+            raw.execute("UPDATE workshops_project SET owner_id = 999")
+
+        with self.assertRaises((CommandError, IntegrityError)):
+            call_command("copy_sqlite_data", self.path, interactive=False, verbosity=0, stdout=StringIO())
+        self.assertEqual(list(User.objects.values_list("username", flat=True)), ["kept"])
+
+    def test_refuses_missing_source(self):
+        with self.assertRaisesMessage(CommandError, "No such file"):
+            call_command("copy_sqlite_data", self.path + ".missing", interactive=False, verbosity=0)
+
+
+# -------------------------
+# Concurrent writes (settings.py SQLite concurrency mode, utils/writes.py)
+# -------------------------
+
+def run_together(count, func):
+    """Call func(i) from `count` threads released together; returns the results in order."""
+    barrier = threading.Barrier(count)
+
+    def call(i):
+        barrier.wait()
+        try:
+            return func(i)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        return list(pool.map(call, range(count)))
+
+
+class ConcurrentWriteTests(TransactionTestCase):
+    def setUp(self):
+        self.project = Project.objects.create(owner=User.objects.create_user("owner"), title="P", overview={})
+
+    def test_json_update_is_not_lost(self):
+        def save_box(i):
+            def mutate(overview):
+                time.sleep(0.02)  # widen the read-modify-write window
+                overview[f"A{i}"] = f"box {i}"
+            # every team member starts from the same stale copy
+            async_to_sync(writes.aupdate_project_json)(Project.objects.get(pk=self.project.pk), "overview", mutate)
+
+        run_together(6, save_box)
+        self.project.refresh_from_db()
+        self.assertEqual(self.project.overview, {f"A{i}": f"box {i}" for i in range(6)})
+
+    def test_progress_counts_are_not_lost(self):
+        revision = get_progress(self.project).revision
+
+        def add(i):
+            return Stakeholder.objects.create(project_id=self.project.pk, name=f"s{i}").pk
+
+        ids = run_together(8, add)
+        run_together(3, lambda i: Stakeholder.objects.get(pk=ids[i]).delete())
+        progress = ProjectProgress.objects.get(pk=self.project.pk)
+        self.assertEqual(progress.stakeholders_count, 5)
+        self.assertEqual(progress.revision, revision + 11)
+
+    @skipUnless(connection.vendor == "sqlite" and settings.SQLITE_TUNING, "SQLite concurrency mode")
+    def test_sqlite_transactions_take_the_write_lock_at_begin(self):
+        self.assertEqual(connection.cursor().execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        locked = threading.Event()
+
+        def writer(i):
+            if i == 1:
+                locked.wait()
+            with transaction.atomic():
+                if i == 0:
+                    locked.set()
+                    time.sleep(0.2)  # the other writer's BEGIN waits here instead of reading
+                title = Project.objects.values_list("title", flat=True).get(pk=self.project.pk)
+                Project.objects.filter(pk=self.project.pk).update(title=f"{title}+{i}")
+
+        # DEFERRED transactions would both read "P" and one would fail on the lock upgrade
+        run_together(2, writer)
+        self.assertEqual(Project.objects.get(pk=self.project.pk).title, "P+0+1")
+
+
+# -------------------------
+# MCDA (utils/mcda.py)
+# -------------------------
+
+class MCDATests(SimpleTestCase):
+    # Three scenarios, one benefit and one cost criterion, equal weights:
+    #   oriented      [[1, -10], [2, -20], [3, -10]]
+    #   min-max       [[0, 1], [0.5, 0], [1, 1]]  -> weighted sum 0.5, 0.25, 1
+    MATRIX = [[1, 10], [2, 20], [3, 10]]
+    DIRECTIONS = ["benefit", "cost"]
+
+    def score(self, weights=(1, 1)):
+        return mcda.score_scenarios(["a", "b", "c"], [1, 2], self.MATRIX, list(weights), self.DIRECTIONS)
+
+    def test_weighted_sum(self):
+        ws = mcda.weighted_sum(np.array(self.MATRIX, dtype=float), np.array([0.5, 0.5]), self.DIRECTIONS)
+        np.testing.assert_allclose(ws, [0.5, 0.25, 1.0])
+
+    def test_topsis(self):
+        # v = (0.5 x / sqrt(14), 0.5 y / sqrt(600)); with a = 0.5/sqrt(14), b = 0.5/sqrt(6):
+        # a: d+ = 2a, d- = b           -> b / (2a + b)
+        # b: d+ = sqrt(a² + b²), d- = a -> a / (a + sqrt(a² + b²))
+        # c: is the ideal point          -> 1
+        a, b = 0.5 / np.sqrt(14), 0.5 / np.sqrt(6)
+        tp = mcda.topsis(np.array(self.MATRIX, dtype=float), np.array([0.5, 0.5]), self.DIRECTIONS)
+        np.testing.assert_allclose(tp, [b / (2 * a + b), a / (a + np.hypot(a, b)), 1.0])
+        np.testing.assert_allclose(tp, [0.4330, 0.3539, 1.0], atol=1e-4)
+
+    def test_electre(self):
+        net, concordance, discordance, outranks = mcda.electre_outranking(
+            np.array(self.MATRIX, dtype=float), np.array([0.5, 0.5]), self.DIRECTIONS
+        )
+        np.testing.assert_allclose(concordance, [[1, 0.5, 0.5], [0.5, 1, 0], [1, 1, 1]])
+        np.testing.assert_allclose(discordance, [[0, 0.5, 1], [1, 0, 1], [0, 0, 0]])
+        self.assertEqual(outranks.astype(int).tolist(), [[0, 0, 0], [0, 0, 0], [1, 1, 0]])
+        self.assertEqual(net.tolist(), [-1, -1, 2])
+
+    def test_score_scenarios_ranks_with_ties(self):
+        result = self.score()
+        self.assertEqual(result["weights"], [0.5, 0.5])
+        self.assertEqual(result["recommended"], "c")
+        rows = {r["scenario_id"]: r for r in result["scores"]}
+        self.assertEqual([r["scenario_id"] for r in result["scores"]], ["c", "a", "b"])
+        # a and b tie on ELECTRE net flow (-1) and share rank 2
+        self.assertEqual([rows[s]["rank_electre"] for s in "abc"], [2, 2, 1])
+        self.assertEqual([rows[s]["rank_weighted_sum"] for s in "abc"], [2, 3, 1])
+        self.assertEqual([rows[s]["mean_rank"] for s in "abc"], [2.0, 2.67, 1.0])
+
+    def test_zero_weights_become_equal(self):
+        self.assertEqual(self.score(weights=(0, 0))["weights"], [0.5, 0.5])
+        self.assertEqual(self.score(weights=(3, 1))["weights"], [0.75, 0.25])
+
+    def test_identical_scenarios_tie(self):
+        result = mcda.score_scenarios(["x", "y"], [1, 2], [[4, 4], [4, 4]], [1, 1], ["benefit", "benefit"])
+        for row in result["scores"]:
+            # constant columns scale to 1; TOPSIS has no distance to either pole
+            self.assertEqual((row["weighted_sum"], row["topsis"], row["electre_net_flow"]), (1.0, 0.5, 0))
+            self.assertEqual(row["mean_rank"], 1.0)
+        self.assertEqual(result["outranks"], [[0, 1], [1, 0]])
+
+    def test_empty_input(self):
+        for ids, indicators, matrix in ((["a"], [], [[]]), ([], [1, 2], np.empty((0, 2)))):
+            n = len(indicators)
+            result = mcda.score_scenarios(ids, indicators, matrix, [1.0] * n, ["benefit"] * n)
+            self.assertEqual(result["scores"], [])
+            self.assertIsNone(result["recommended"])
+
+
+# -------------------------
+# Ranking sensitivity (utils/sensitivity.py)
+# -------------------------
+
+class CohortSensitivityTests(SimpleTestCase):
+    def test_samples_share_the_budget(self):
+        jobs = [(k, [1, 2, "gap", 3], None, {"samples": 5000, "seed": k}) for k in range(4)]
+        results = sensitivity.cohort_weight_sensitivity(jobs, sample_budget=4000)
+        self.assertEqual([results[k]["samples"] for k in range(4)], [1000] * 4)
+        # a seeded run matches the single-project analysis
+        self.assertEqual(results[2], sensitivity.simos_weight_sensitivity([1, 2, "gap", 3], samples=1000, seed=2))
+
+    def test_minimum_samples(self):
+        jobs = [(k, [1, 2], None, {"samples": 5000}) for k in range(10)]
+        results = sensitivity.cohort_weight_sensitivity(jobs, sample_budget=100)
+        self.assertEqual({r["samples"] for r in results.values()}, {sensitivity.MIN_COHORT_SAMPLES})
+        self.assertEqual(sensitivity.cohort_weight_sensitivity([]), {})
+
+
+# -------------------------
+# Ranking consensus (utils/consensus.py)
+# -------------------------
+
+def member(key, order, groups=None):
+    # SRF orders run least -> most important
+    return {"key": key, "order": order, "groups": groups or []}
+
+
+class ConsensusTests(SimpleTestCase):
+    def test_three_members(self):
+        # ranks (1 = best) of indicators 1, 2, 3: m1 = m2 = (1, 2, 3), m3 = (2, 1, 3)
+        result = aggregate_rankings([member("m1", [3, 2, 1]), member("m2", [3, 2, 1]), member("m3", [3, 1, 2])])
+        # Borda rank sums 4, 5, 9
+        self.assertEqual(result["borda_order"], ["1", "2", "3"])
+        self.assertEqual(result["kemeny_order"], ["1", "2", "3"])
+        self.assertEqual(result["mean_rank"], {"1": 1.333, "2": 1.667, "3": 3.0})
+        # W = 12 * ((4-6)² + (5-6)² + (9-6)²) / (3² * (3³ - 3)) = 168 / 216
+        self.assertEqual(result["kendall_w"], round(168 / 216, 4))
+        # m1 vs m3: pair (1, 2) discordant, (1, 3) and (2, 3) concordant -> (2 - 1) / 3
+        self.assertEqual(result["kendall_tau"][0], [1.0, 1.0, 0.3333])
+        # m1 vs m3: 1 - 6 * (1 + 1 + 0) / (3 * (3² - 1))
+        self.assertEqual(result["spearman"][0], [1.0, 1.0, 0.5])
+        # normalized ranks of indicator 1: 1/3, 1/3, 2/3 -> population std sqrt(2)/9
+        self.assertEqual(result["disagreement"], {"3": 0.0, "2": 0.1571, "1": 0.1571})
+        self.assertEqual(result["weights"], {"3": 0.166667, "2": 0.333333, "1": 0.5})
+
+    def test_merged_group_shares_rank(self):
+        # m1 merges 1 and 2 (both rank 1.5), m2 ranks them 1, 2; 3 is last for both
+        result = aggregate_rankings([member("m1", [3, 1, 2], [[1, 2]]), member("m2", [3, 2, 1])])
+        self.assertEqual(result["mean_rank"], {"3": 3.0, "1": 1.25, "2": 1.75})
+        # rank sums 6, 2.5, 3.5 around a mean of 4: 12 * 6.5 / (2² * 24)
+        self.assertEqual(result["kendall_w"], 0.8125)
+        # tau-b: 4 concordant ordered pairs / sqrt(4 * 6)
+        self.assertEqual(result["kendall_tau"][0][1], round(4 / 24 ** 0.5, 4))
+        self.assertEqual(result["borda_order"], ["1", "2", "3"])
+
+    def test_opposed_members_tie(self):
+        result = aggregate_rankings([member("m1", [2, 1]), member("m2", [1, 2])])
+        self.assertEqual(result["mean_rank"], {"2": 1.5, "1": 1.5})
+        self.assertEqual(result["kendall_w"], 0.0)
+        self.assertEqual(result["kendall_tau"], [[1.0, -1.0], [-1.0, 1.0]])
+        # tied Borda keeps first-seen order and Kemeny has no majority to swap on
+        self.assertEqual(result["borda_order"], ["2", "1"])
+        self.assertEqual(result["kemeny_order"], ["2", "1"])
+
+    def test_unranked_indicators_share_worst_rank(self):
+        # m2 only ranked indicator 1; indicator 2 gets (1 + 1 + 2) / 2 = 2
+        result = aggregate_rankings([member("m1", [2, 1]), member("m2", [1])])
+        self.assertEqual(result["mean_rank"], {"2": 2.0, "1": 1.0})
+        self.assertEqual(result["kendall_w"], 1.0)
+
+    def test_kemeny_swaps_neighbours_on_majority(self):
+        # preference[a, b] = members ranking a above b; 2 beats 1 by 3 to 1
+        preference = np.array([[0, 2, 2], [1, 0, 0], [1, 3, 0]])
+        self.assertEqual(_kemeny_local_search([0, 1, 2], preference), [0, 2, 1])
+        # a tie never swaps
+        self.assertEqual(_kemeny_local_search([1, 0], np.array([[0, 1], [1, 0]])), [1, 0])
+
+    def test_single_member(self):
+        result = aggregate_rankings([member("solo", [2, 1])])
+        self.assertEqual(result["kemeny_order"], ["1", "2"])
+        self.assertEqual((result["kendall_w"], result["kendall_tau"], result["spearman"]), (1.0, [[1.0]], [[1.0]]))
+
+    def test_empty_input(self):
+        self.assertEqual(aggregate_rankings([]), {})
+        self.assertEqual(aggregate_rankings([member("m1", []), member("m2", [])]), {})
+
+
+# -------------------------
+# Stakeholder network (utils/network.py)
+# -------------------------
+
+def adjacency(n, pairs):
+    matrix = np.zeros((n, n))
+    for a, b in pairs:
+        matrix[a, b] = 1.0
+    return matrix
+
+
+class NetworkTests(SimpleTestCase):
+    def test_adjacency(self):
+        positive, conflict = network._adjacency([1, 2, 3], [
+            (1, 2, "INFLUENCE", 2),
+            (2, 3, "ALLIANCE", 1),
+            (1, 3, "CONFLICT", 1),
+            (1, 1, "INFLUENCE", 5),  # self loop: ignored
+            (1, 9, "INFLUENCE", 1),  # unknown node: ignored
+        ])
+        self.assertEqual(positive.tolist(), [[0, 2, 0], [0, 0, 1], [0, 1, 0]])
+        self.assertEqual(conflict.tolist(), [[0, 0, 1], [0, 0, 0], [1, 0, 0]])
+
+    def test_betweenness(self):
+        # path 0 -> 1 -> 2: node 1 is on the one 0 -> 2 path; 1 / ((3 - 1)(3 - 2))
+        np.testing.assert_allclose(network.betweenness_centrality(adjacency(3, [(0, 1), (1, 2)])), [0, 0.5, 0])
+        # star (both directions): all 6 ordered leaf pairs pass the centre; 6 / (3 * 2)
+        star = adjacency(4, [(0, 1), (1, 0), (0, 2), (2, 0), (0, 3), (3, 0)])
+        np.testing.assert_allclose(network.betweenness_centrality(star), [1, 0, 0, 0])
+        # diamond 0 -> {1, 2} -> 3: two tied shortest paths share the credit; 0.5 / 6
+        diamond = adjacency(4, [(0, 1), (0, 2), (1, 3), (2, 3)])
+        np.testing.assert_allclose(network.betweenness_centrality(diamond), [0, 1 / 12, 1 / 12, 0])
+        np.testing.assert_allclose(network.betweenness_centrality(adjacency(2, [(0, 1)])), [0, 0])
+
+    def test_pagerank(self):
+        # 0 -> 1, 1 dangling: r0 = 0.85 r1 / 2 + 0.075 and r0 + r1 = 1 -> r0 = 0.5 / 1.425
+        np.testing.assert_allclose(network.pagerank(adjacency(2, [(0, 1)])), [0.5 / 1.425, 0.925 / 1.425])
+        np.testing.assert_allclose(network.pagerank(np.zeros((3, 3))), [1 / 3] * 3)
+
+    def test_eigenvector(self):
+        # star K(1,2): centre sqrt(2) times each leaf
+        np.testing.assert_allclose(
+            network.eigenvector_centrality(adjacency(3, [(0, 1), (0, 2)])), [1, 2 ** -0.5, 2 ** -0.5]
+        )
+        np.testing.assert_allclose(network.eigenvector_centrality(np.zeros((2, 2))), [0, 0])
+
+    def test_communities(self):
+        # two disjoint triangles: Q = 2 * (1/2 - (1/2)²)
+        triangles = adjacency(6, [(0, 1), (1, 2), (0, 2), (3, 4), (4, 5), (3, 5)])
+        labels, modularity = network.label_propagation(triangles)
+        self.assertEqual(labels.tolist(), [0, 0, 0, 1, 1, 1])
+        self.assertAlmostEqual(modularity, 0.5)
+        # equal-sized communities keep first-seen order
+        labels, modularity = network.label_propagation(adjacency(4, [(0, 1), (2, 3)]))
+        self.assertEqual(labels.tolist(), [0, 0, 1, 1])
+        self.assertAlmostEqual(modularity, 0.5)
+
+    def test_network_metrics(self):
+        result = network.network_metrics(["a", "b", "c"], [("a", "b", "INFLUENCE", 1), ("b", "c", "INFLUENCE", 1)])
+        self.assertEqual(result["edges"], 2)
+        self.assertEqual(result["communities"], 1)
+        nodes = result["nodes"]
+        self.assertEqual([nodes[k]["out_degree"] for k in "abc"], [1, 1, 0])
+        self.assertEqual([nodes[k]["betweenness"] for k in "abc"], [0, 0.5, 0])
+
+    def test_empty_network(self):
+        self.assertEqual(
+            network.network_metrics([], []), {"nodes": {}, "communities": 0, "modularity": 0.0, "edges": 0}
+        )
+        result = network.network_metrics(["a", "b"], [])
+        # isolated nodes: own communities, uniform PageRank, no centrality
+        self.assertEqual(result["communities"], 2)
+        self.assertEqual([result["nodes"][k]["pagerank"] for k in "ab"], [0.5, 0.5])
+        self.assertEqual([result["nodes"][k]["eigenvector"] for k in "ab"], [0.0, 0.0])
+
+
+# -------------------------
+# Stakeholder matrix (utils/stakeholder_matrix.py)
+# -------------------------
+
+class StakeholderMatrixTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.objects.create(owner=User.objects.create_user("owner"), title="P")
+        points = [(10, 10), (11, 12), (12, 10), (60, 90), (100, 100)] + [(40, 40)] * 25
+        Stakeholder.objects.bulk_create(
+            Stakeholder(project=cls.project, name=f"s{i}", interest=interest, power=power)
+            for i, (interest, power) in enumerate(points)
+        )
+
+    def test_quadrants_and_grid(self):
+        result = aggregate_stakeholder_matrix(self.project.stakeholders.all(), bins=2)
+        self.assertEqual(result["total"], 30)
+        self.assertEqual([q["count"] for q in result["quadrants"]], [2, 0, 0, 28])
+        # rows are power bins; 100 falls in the last bin
+        self.assertEqual(result["grid"]["counts"], [[28, 0], [0, 2]])
+
+    def test_clusters(self):
+        with self.assertNumQueries(4):
+            result = aggregate_stakeholder_matrix(self.project.stakeholders.all(), merge=5)
+        clusters = {(c["interest"], c["power"]): c for c in result["clusters"]}
+        # (10, 10), (11, 12) and (12, 10) snap to (10, 10) and keep their mean position
+        self.assertEqual(clusters[(11.0, 10.67)]["count"], 3)
+        crowded = clusters[(40.0, 40.0)]
+        self.assertEqual((crowded["count"], len(crowded["members"]), crowded["more"]), (25, 20, 5))
+        self.assertEqual(len(result["clusters"]), 4)
+
+    def test_empty(self):
+        result = aggregate_stakeholder_matrix(Stakeholder.objects.none())
+        self.assertEqual((result["total"], result["clusters"]), (0, []))
+
+
+# -------------------------
+# Stakeholder batch updates (views.batch_update_stakeholders)
+# -------------------------
+
+class BatchUpdateStakeholdersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner")
+        cls.project = Project.objects.create(owner=cls.owner, title="P")
+        cls.a, cls.b, cls.c = Stakeholder.objects.bulk_create(
+            Stakeholder(project=cls.project, name=name) for name in "abc"
+        )
+
+    def post(self, changes):
+        self.client.force_login(self.owner)
+        return self.client.post(
+            reverse("batch_update_stakeholders", args=[self.project.pk]), {"changes": changes},
+            content_type="application/json",
+        )
+
+    def test_rows_only_write_the_fields_they_changed(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post([
+                {"id": self.a.pk, "field": "interest", "value": 80},
+                {"id": self.b.pk, "field": "power", "value": 10},
+                {"id": self.c.pk, "field": "interest", "value": 20},
+                {"id": self.c.pk, "field": "interest", "value": 30},  # later change wins
+            ])
+        self.assertEqual(response.json(), {"status": "success", "updated": 3})
+        updates = [q["sql"] for q in queries if q["sql"].startswith('UPDATE "workshops_stakeholder"')]
+        self.assertEqual(len(updates), 2)
+        for sql in updates:
+            self.assertNotEqual('"interest"' in sql, '"power"' in sql, sql)
+        self.assertEqual(
+            list(Stakeholder.objects.order_by("name").values_list("interest", "power")), [(80, 50), (50, 10), (30, 50)]
+        )
+
+    def test_invalid_value_changes_nothing(self):
+        response = self.post([
+            {"id": self.a.pk, "field": "interest", "value": 80},
+            {"id": self.b.pk, "field": "level", "value": "Galactic"},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Stakeholder.objects.get(pk=self.a.pk).interest, 50)
+
+
+# -------------------------
+# Media reference counting (utils/storage.py, signals.py)
+# -------------------------
+
+class MediaRefcountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.objects.create(owner=User.objects.create_user("owner"), title="P")
+
+    def setUp(self):
+        media = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+
+    def upload(self, content, row=None):
+        if row is None:
+            indicator_id = str(IndicatorData.objects.count() + 1)
+            row = IndicatorData(project=self.project, indicator_id=indicator_id, indicator_name="Water")
+        with self.captureOnCommitCallbacks(execute=True):
+            row.data_image.save("chart.png", ContentFile(content))
+        return row
+
+    def delete(self, row):
+        with self.captureOnCommitCallbacks(execute=True):
+            row.delete()
+
+    def refcount(self, name):
+        return MediaBlob.objects.filter(name=name).values_list("refcount", flat=True).first()
+
+    def test_identical_uploads_share_one_file(self):
+        first, second = self.upload(b"same"), self.upload(b"same")
+        name = first.data_image.name
+        self.assertEqual(second.data_image.name, name)
+        self.assertRegex(name, r"^indicator_uploads/[0-9a-f]{2}/[0-9a-f]{64}\.png$")
+        self.assertEqual(self.refcount(name), 2)
+        self.assertEqual(MediaBlob.objects.get(name=name).size, 4)
+
+        self.delete(first)
+        self.assertEqual(self.refcount(name), 1)
+        self.assertTrue(default_storage.exists(name))
+        self.delete(second)
+        self.assertIsNone(self.refcount(name))
+        self.assertFalse(default_storage.exists(name))
+
+    def test_replacing_moves_the_reference(self):
+        row = self.upload(b"old")
+        old = row.data_image.name
+        self.upload(b"new", row=row)
+        self.assertEqual((self.refcount(old), self.refcount(row.data_image.name)), (None, 1))
+        self.assertFalse(default_storage.exists(old))
+
+    def test_reupload_before_commit_keeps_the_file(self):
+        row = self.upload(b"same")
+        name = row.data_image.name
+        # release and re-upload in one transaction: the delete hook runs after both
+        with self.captureOnCommitCallbacks(execute=True):
+            row.delete()
+            again = IndicatorData(project=self.project, indicator_id="1", indicator_name="Water")
+            again.data_image.save("chart.png", ContentFile(b"same"))
+        self.assertEqual(self.refcount(name), 1)
+        self.assertTrue(default_storage.exists(name))
+
+    def test_rebuild_refcounts(self):
+        row = self.upload(b"a")
+        self.upload(b"a")
+        name = row.data_image.name
+        MediaBlob.objects.filter(name=name).update(refcount=7)
+        MediaBlob.objects.create(name="indicator_uploads/gone.png", refcount=3)
+        self.assertEqual(storage.rebuild_refcounts(), 1)
+        self.assertEqual(list(MediaBlob.objects.values_list("name", "refcount")), [(name, 2)])
+
+    def test_unreferenced_legacy_file_is_deleted(self):
+        # stored before content addressing: no MediaBlob row
+        name = default_storage.save("indicator_uploads/legacy.png", ContentFile(b"x"))
+        with self.captureOnCommitCallbacks(execute=True):
+            storage.release(name)
+        self.assertFalse(default_storage.exists(name))
+
+    def test_empty_names_are_ignored(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            storage.acquire("")
+            storage.release("")
+        self.assertEqual((callbacks, MediaBlob.objects.count()), ([], 0))
+
+
+# -------------------------
+# Chunked uploads (utils/chunked_upload.py)
+# -------------------------
+
+def png_bytes(seed=0):
+    pixels = np.random.default_rng(seed).integers(0, 256, size=(32, 32, 3), dtype=np.uint8)
+    buffer = BytesIO()
+    Image.fromarray(pixels).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@mock.patch("workshops.utils.chunked_upload.CHUNK_SIZE", 1024)
+class ChunkedUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user("owner")
+        cls.project = Project.objects.create(owner=cls.owner, title="P")
+        cls.image = png_bytes()
+        cls.chunks = [cls.image[i:i + 1024] for i in range(0, len(cls.image), 1024)]
+
+    def setUp(self):
+        media = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+        self.client.force_login(self.owner)
+
+    def start(self, sha256=None):
+        payload = {"indicator_id": "7", "indicator_name": "Water", "filename": "chart.png", "size": len(self.image)}
+        payload["sha256"] = hashlib.sha256(self.image).hexdigest() if sha256 is None else sha256
+        response = self.client.post(
+            reverse("start_chunked_upload", args=[self.project.pk]), payload, content_type="application/json"
+        )
+        return response.json()
+
+    def send(self, upload_id, index, data=None, checksum=None):
+        return self.client.post(
+            reverse("upload_chunk", args=[self.project.pk, upload_id, index]),
+            self.chunks[index] if data is None else data, content_type="application/octet-stream",
+            headers={"X-Chunk-SHA256": checksum} if checksum else None,
+        )
+
+    def complete(self, upload_id):
+        return self.client.post(reverse("complete_chunked_upload", args=[self.project.pk, upload_id]))
+
+    def test_resume_after_missing_chunk(self):
+        self.assertGreaterEqual(len(self.chunks), 3)
+        upload_id = self.start()["upload_id"]
+        self.assertEqual(self.send(upload_id, 0).status_code, 200)
+        # chunk 1 is lost: chunk 2 is refused and the client is told where to resume
+        response = self.send(upload_id, 2)
+        self.assertEqual((response.status_code, response.json()["next_chunk"]), (409, 1))
+        self.assertEqual(self.complete(upload_id).status_code, 409)
+
+        resumed = self.start()
+        self.assertEqual((resumed["upload_id"], resumed["next_chunk"]), (upload_id, 1))
+        self.assertEqual(self.send(upload_id, 0).status_code, 200)  # duplicate: acknowledged, not written
+        for index in range(1, len(self.chunks)):
+            self.assertEqual(self.send(upload_id, index).status_code, 200)
+        with self.captureOnCommitCallbacks():
+            response = self.complete(upload_id)
+        self.assertEqual(response.status_code, 200)
+        data = IndicatorData.objects.get(project=self.project, indicator_id="7")
+        with data.data_image.open("rb") as f:
+            self.assertEqual(f.read(), self.image)
+        self.assertFalse(ChunkedUpload.objects.exists())
+
+    def test_rejects_wrong_chunk_size_or_checksum(self):
+        upload_id = self.start()["upload_id"]
+        response = self.send(upload_id, 0, self.chunks[0][:-1])
+        self.assertEqual((response.status_code, response.json()["next_chunk"]), (422, 0))
+        self.assertEqual(self.send(upload_id, 0, checksum="0" * 64).status_code, 422)
+        self.assertEqual(self.send(upload_id, 0, checksum=hashlib.sha256(self.chunks[0]).hexdigest()).status_code, 200)
+        self.assertEqual(ChunkedUpload.objects.get(pk=upload_id).received_bytes, 1024)
+
+    def test_rejects_file_checksum_mismatch_on_complete(self):
+        upload_id = self.start(sha256=hashlib.sha256(b"something else").hexdigest())["upload_id"]
+        for index in range(len(self.chunks)):
+            self.send(upload_id, index)
+        response = self.complete(upload_id)
+        self.assertEqual(response.status_code, 422)
+        self.assertFalse(ChunkedUpload.objects.filter(pk=upload_id).exists())
+        self.assertFalse(IndicatorData.objects.filter(project=self.project).exists())
+
+
+# -------------------------
+# Portfolio jobs (utils/portfolio.py)
+# -------------------------
+
+@mock.patch("workshops.utils.portfolio.generate_portfolio")
+class PortfolioJobTests(TransactionTestCase):
+    def setUp(self):
+        project = Project.objects.create(owner=User.objects.create_user("owner"), title="P")
+        self.job = PortfolioJob.objects.create(key="portfolios/project_1/r1.pdf", project=project)
+
+    def test_claim_while_running_is_refused(self, generate):
+        # a second worker picks the job up while the first one is rendering it
+        generate.side_effect = lambda *args, **kwargs: self.assertFalse(portfolio.run_job(self.job.pk))
+        self.assertTrue(portfolio.run_job(self.job.pk))
+        self.assertFalse(portfolio.run_job(self.job.pk))
+        generate.assert_called_once()
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.attempts), ("done", 1))
+
+    def test_concurrent_claims_run_once(self, generate):
+        barrier = threading.Barrier(2)
+        generate.side_effect = lambda *args, **kwargs: time.sleep(0.2)
+
+        def claim():
+            barrier.wait()
+            return portfolio.run_job(self.job.pk)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            results = list(pool.map(lambda _: claim(), range(2)))
+        self.assertEqual(sorted(results), [False, True])
+        generate.assert_called_once()
+        self.assertEqual(PortfolioJob.objects.get(pk=self.job.pk).attempts, 1)
+
+
+# -------------------------
+# Streaming exports (utils/exports.py)
+# -------------------------
+
+class StreamingExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_user("staff", is_staff=True)
+        project = Project.objects.create(owner=cls.staff, title="P")
+        Stakeholder.objects.bulk_create(Stakeholder(project=project, name=f"s{i}") for i in range(3))
+
+    def test_wsgi_streams_sync_iterator(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse("staff_export", args=["stakeholders"]))
+        self.assertFalse(response.is_async)
+        self.assertEqual(b"".join(response.streaming_content).count(b"\n"), 4)
+
+    async def test_asgi_streams_async_iterator(self):
+        client = AsyncClient()
+        await client.aforce_login(self.staff)
+        response = await client.get(reverse("staff_export", args=["stakeholders"]), {"format": "ndjson"})
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(b"".join(chunks).count(b"\n"), 3)
+
+
+# -------------------------
+# Request profiling (middleware.py, utils/profiling.py)
+# -------------------------
+
+@override_settings(REQUEST_PROFILING="on", DEBUG=False)
+@mock.patch("workshops.utils.profiling.record_sample")
+class RequestProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user("student")
+        cls.staff = User.objects.create_user("staff", is_staff=True)
+        cls.project = Project.objects.create(owner=cls.student, title="P")
+
+    async def get_tree(self, user, project=None):
+        client = AsyncClient()
+        await client.aforce_login(user)
+        return await client.get(reverse("problem_tree_data_api", args=[(project or self.project).pk]))
+
+    async def test_async_view_profiled_for_student(self, record_sample):
+        response = await self.get_tree(self.student)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Server-Timing", response.headers)
+        record_sample.assert_called_once()
+        self.assertEqual(record_sample.call_args.kwargs["view_name"], "problem_tree_data_api")
+
+    async def test_async_view_sends_timings_to_staff(self, record_sample):
+        project = await sync_to_async(Project.objects.create)(owner=self.staff, title="Staff project")
+        response = await self.get_tree(self.staff, project)
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response.headers["Server-Timing"], r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries"')
+
+
+# -------------------------
+# Vendored static files (utils/static_files.py, templatetags/vendor_assets.py)
+# -------------------------
+
+class VendorAssetTests(SimpleTestCase):
+    def setUp(self):
+        _asset_url.cache_clear()
+        self.addCleanup(_asset_url.cache_clear)
+
+    @override_settings(VENDOR_CDN_FALLBACK=False, STATIC_ROOT=tempfile.mkdtemp(prefix="workshops-test-static-"))
+    def test_collectstatic_fails_without_vendored_files(self):
+        with mock.patch.dict(VENDOR_LIBRARIES, {"missing": {"version": "0", "url": "", "path": "vendor/missing.js"}}):
+            with self.assertRaisesMessage(ImproperlyConfigured, "missing"):
+                call_command("collectstatic", interactive=False, verbosity=0)
+
+    @override_settings(VENDOR_CDN_FALLBACK=False)
+    def test_tag_does_not_fall_back_to_cdn(self):
+        with mock.patch.dict(VENDOR_LIBRARIES, {"missing": {"version": "0", "url": "https://cdn/x.js", "path": "vendor/missing.js"}}):
+            with self.assertRaises(ImproperlyConfigured):
+                vendor_asset("missing")
+
+    @override_settings(VENDOR_CDN_FALLBACK=True)
+    def test_tag_falls_back_when_allowed(self):
+        with mock.patch.dict(VENDOR_LIBRARIES, {"missing": {"version": "0", "url": "https://cdn/x.js", "path": "vendor/missing.js"}}):
+            self.assertIn("https://cdn/x.js", vendor_asset("missing"))
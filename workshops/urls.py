@@ -12,7 +12,14 @@ urlpatterns = [
     # WORKSHOP 2.1 — Stakeholders
     path("project/<int:project_id>/stakeholders/", views.stakeholder_list, name="stakeholder_list"),
     path("project/<int:project_id>/stakeholders/download/", views.download_stakeholders_csv, name="download_stakeholders"),
+    path("project/<int:project_id>/stakeholders/import/", views.import_stakeholders_view, name="import_stakeholders"),
     path("project/<int:project_id>/stakeholders/data/", views.stakeholder_data, name="stakeholder_data_api"),
+    path("project/<int:project_id>/stakeholders/matrix/", views.stakeholder_matrix_data, name="stakeholder_matrix_api"),
+    path("stakeholders/matrix/", views.cohort_stakeholder_matrix_data, name="cohort_stakeholder_matrix_api"),
+    path("project/<int:project_id>/stakeholders/batch-update/", views.batch_update_stakeholders, name="batch_update_stakeholders"),
+    path("project/<int:project_id>/stakeholders/relations/", views.save_stakeholder_relation, name="save_stakeholder_relation"),
+    path("project/<int:project_id>/stakeholders/network/", views.stakeholder_network_data, name="stakeholder_network_api"),
+    path("stakeholder/relation/delete/<int:relation_id>/", views.delete_stakeholder_relation, name="delete_stakeholder_relation"),
     path("stakeholder/update/<int:stakeholder_id>/", views.update_stakeholder_details, name="update_stakeholder_details"),
     path("stakeholder/delete/<int:stakeholder_id>/", views.delete_stakeholder, name="delete_stakeholder"),
 
@@ -40,8 +47,11 @@ urlpatterns = [
     path("project/<int:project_id>/ranking/save/", views.indicator_ranking_view, name="indicator_ranking_view"),
     path("project/<int:project_id>/ranking/download/", views.download_indicators_csv, name="download_indicators_csv"),
     path("project/<int:project_id>/save-ranking/", views.save_indicator_ranking, name="save_indicator_ranking"),
+    path("project/<int:project_id>/save-ranking/member/", views.save_member_ranking, name="save_member_ranking"),
 
     path("project/<int:project_id>/simos-manual/", views.simos_manual_page,name="simos_manual"),
+    path("project/<int:project_id>/ranking/sensitivity/", views.ranking_sensitivity_view, name="ranking_sensitivity"),
+    path("ranking/sensitivity/cohort/", views.cohort_ranking_sensitivity_view, name="cohort_ranking_sensitivity"),
 
 
 
@@ -49,6 +59,13 @@ urlpatterns = [
 # WORKSHOP 4.1 — Indicator Analysis
     path("project/<int:project_id>/indicator-analysis/", views.indicator_analysis_view, name="indicator_analysis"),
     path("project/<int:project_id>/indicator-analysis/upload/", views.upload_indicator_image, name="upload_indicator_image"),
+    path("project/<int:project_id>/indicator-analysis/datasets/", views.upload_indicator_dataset, name="upload_indicator_dataset"),
+    path("project/<int:project_id>/indicator-analysis/datasets/<int:indicator_id>/", views.indicator_dataset, name="indicator_dataset"),
+    path("project/<int:project_id>/indicator-analysis/datasets/<int:indicator_id>/delete/", views.delete_indicator_dataset, name="delete_indicator_dataset"),
+    path("project/<int:project_id>/indicator-analysis/uploads/", views.start_chunked_upload, name="start_chunked_upload"),
+    path("project/<int:project_id>/indicator-analysis/uploads/<uuid:upload_id>/", views.chunked_upload_status, name="chunked_upload_status"),
+    path("project/<int:project_id>/indicator-analysis/uploads/<uuid:upload_id>/chunks/<int:index>/", views.upload_chunk, name="upload_chunk"),
+    path("project/<int:project_id>/indicator-analysis/uploads/<uuid:upload_id>/complete/", views.complete_chunked_upload, name="complete_chunked_upload"),
     path("project/<int:project_id>/swot/", swot_analysis_view, name="swot_analysis"),
     path("project/<int:project_id>/swot/save/", save_swot_entry, name="save_swot_entry"),
 
@@ -58,10 +75,20 @@ urlpatterns = [
     path("project/<int:project_id>/scenario/correlation/", views.correlation_matrix_view, name="scenario_correlation"),
     path("project/<int:project_id>/scenario/results/", views.scenario_results_view, name="scenario_results"),
     path("project/<int:project_id>/scenario/save/", views.save_scenario, name="save_scenario"),
+    path("project/<int:project_id>/scenario/scoring/", views.scenario_scoring_view, name="scenario_scoring"),
 
     # Workshop 8 — Final Review & Export
     path("project/<int:project_id>/final-review/", views.final_review_view, name="final_review"),
     path("project/<int:project_id>/final-review/pdf/", views.final_review_pdf, name="final_review_pdf"),
+    path("portfolios/generate/", views.generate_portfolios_view, name="generate_portfolios"),
+
+    # Staff exports (all projects)
+    path("exports/archive/", views.course_archive_view, name="course_archive"),
+    path("exports/<str:table>/", views.staff_export_view, name="staff_export"),
+
+    # Staff cohort analytics
+    path("analytics/", views.cohort_analytics_view, name="cohort_analytics"),
+    path("analytics/profiling/", views.request_profiling_view, name="request_profiling"),
 
     # Project Creation
     path("project/create/", views.create_project_view, name="create_project"),
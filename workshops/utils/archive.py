@@ -0,0 +1,149 @@
+import json
+import re
+import zipfile
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from .exports import Column, StreamBuffer, iter_csv
+from .portfolio import generate_portfolio
+
+COPY_CHUNK = 64 * 1024
+
+# Per-project tables: file stem -> (related manager name, ordering, CSV too?)
+ARCHIVE_TABLES = {
+    "stakeholders": ("stakeholders", ("id",), True),
+    "stakeholder_relations": ("stakeholder_relations", ("id",), True),
+    "problems": ("problems", ("id",), True),
+    "objectives": ("objectives", ("id",), True),
+    "indicators": ("indicators", ("order", "id"), True),
+    "rankings": ("rankings", ("id",), False),
+    "qsort_results": ("qsort_results", ("id",), False),
+    "swot": ("swot_items", ("category", "id"), True),
+    "indicator_data": ("indicator_data", ("id",), True),
+    "datasets": ("datasets", ("id",), True),
+}
+
+# Tables whose rows point at stored files: file stem -> (file field, archive subfolder)
+ARCHIVE_FILES = {
+    "indicator_data": ("data_image", "images"),
+    "datasets": ("file", "datasets"),
+}
+
+PROJECT_FIELDS = [
+    "id", "title", "owner__username", "created_at", "group_name", "members", "overview",
+    "indicator_ranking_order", "indicator_ranking_groups", "scenario_data",
+]
+
+
+def _json(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, indent=2)
+
+
+def _folder(project):
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", project["title"] or "").strip("-")[:40].lower()
+    return f"project_{project['id']:06d}" + (f"_{slug}" if slug else "")
+
+
+def _csv(rows):
+    if not rows:
+        return ""
+    columns = [Column(key, key) for key in rows[0]]
+    return "".join(iter_csv(rows, columns))
+
+
+def _copy_file(zf, buffer, arcname, name):
+    """Copy a stored file into the archive chunk by chunk, yielding compressed output."""
+    with default_storage.open(name, "rb") as src, zf.open(arcname, "w", force_zip64=True) as dst:
+        while chunk := src.read(COPY_CHUNK):
+            dst.write(chunk)
+            yield buffer.drain()
+
+
+def _related_model(stem):
+    from ..models import Project
+
+    manager = ARCHIVE_TABLES[stem][0]
+    return Project._meta.get_field(manager).related_model
+
+
+def archive_projects(start_id=None, end_id=None):
+    from ..models import Project
+
+    projects = Project.objects.order_by("id")
+    if start_id is not None:
+        projects = projects.filter(id__gte=start_id)
+    if end_id is not None:
+        projects = projects.filter(id__lte=end_id)
+    return projects
+
+
+def iter_course_archive(start_id=None, end_id=None, include_pdf=False):
+    """
+    Stream a ZIP of every project in [start_id, end_id]: one folder per project
+    with JSON snapshots of all rows and JSON fields, CSV tables, the uploaded
+    IndicatorData images and IndicatorDataset files and optionally the
+    portfolio PDF.
+
+    Projects are written in id order and MANIFEST.json at the end lists the
+    exported ids, so an interrupted download can be resumed with
+    start_id = last id in the partial archive. Memory stays bounded by one
+    project's rows plus COPY_CHUNK.
+    """
+    buffer = StreamBuffer()
+    exported, failed = [], []
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        # First bytes go out before any project is read so proxies see a live response.
+        zf.writestr("README.txt", (
+            f"Course archive generated {timezone.now():%Y-%m-%d %H:%M:%S %Z}\n"
+            f"Project range: {start_id or 'first'} .. {end_id or 'last'}\n"
+            f"Portfolio PDFs: {'included' if include_pdf else 'not included'}\n"
+            "One folder per project; MANIFEST.json (written last) lists the exported ids.\n"
+        ))
+        yield buffer.drain()
+
+        projects = archive_projects(start_id, end_id).values(*PROJECT_FIELDS)
+        for project in projects.iterator(chunk_size=100):
+            folder = _folder(project)
+            pid = project["id"]
+            zf.writestr(f"{folder}/project.json", _json(project))
+
+            files = []
+            for stem, (_, ordering, with_csv) in ARCHIVE_TABLES.items():
+                model = _related_model(stem)
+                rows = list(model.objects.filter(project_id=pid).order_by(*ordering).values())
+                zf.writestr(f"{folder}/{stem}.json", _json(rows))
+                if with_csv:
+                    zf.writestr(f"{folder}/{stem}.csv", _csv(rows))
+                if stem in ARCHIVE_FILES:
+                    field, subfolder = ARCHIVE_FILES[stem]
+                    files += [(subfolder, r["id"], r[field]) for r in rows if r[field]]
+            yield buffer.drain()
+
+            for subfolder, row_id, name in files:
+                arcname = f"{folder}/{subfolder}/{row_id}_{name.rsplit('/', 1)[-1]}"
+                try:
+                    yield from _copy_file(zf, buffer, arcname, name)
+                except OSError:
+                    failed.append({"project": pid, "file": name})
+
+            if include_pdf:
+                try:
+                    key = generate_portfolio(pid)
+                    yield from _copy_file(zf, buffer, f"{folder}/portfolio.pdf", key)
+                except Exception as e:
+                    failed.append({"project": pid, "file": "portfolio.pdf", "error": str(e)})
+
+            exported.append(pid)
+            yield buffer.drain()
+
+        zf.writestr("MANIFEST.json", _json({
+            "generated_at": timezone.now(),
+            "start_id": start_id,
+            "end_id": end_id,
+            "projects": exported,
+            "missing_files": failed,
+        }))
+    yield buffer.drain()
+
@@ -0,0 +1,201 @@
+import hashlib
+import os
+from datetime import timedelta
+
+from django.core.files import File, locks
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .storage import ALLOWED_EXTENSIONS
+
+CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024
+READ_BLOCK = 64 * 1024
+UPLOAD_DIR = "chunked_uploads"
+UPLOAD_EXPIRY = timedelta(hours=24)
+# finish_upload marks an upload complete before it checks and moves the part
+# file; complete rows younger than this may still be finishing
+FINISH_GRACE = timedelta(minutes=30)
+
+
+class UploadError(ValueError):
+    """A protocol violation the client can recover from (status code attached)."""
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+def part_name(upload):
+    return f"{UPLOAD_DIR}/{upload.pk}.part"
+
+
+def part_path(upload):
+    return default_storage.path(part_name(upload))
+
+
+def start_upload(project, indicator_id, indicator_name, filename, total_size, sha256=""):
+    """
+    Begin (or resume) an upload. An unfinished upload of the same file for the
+    same indicator is returned as is, so the client continues at next_chunk.
+    """
+    from ..models import ChunkedUpload
+
+    filename = os.path.basename(filename or "")
+    if os.path.splitext(filename)[1].lower() not in ALLOWED_EXTENSIONS:
+        raise UploadError("Unsupported file type. Upload an image.")
+    if not 0 < total_size <= MAX_UPLOAD_SIZE:
+        raise UploadError(f"Files must be between 1 byte and {MAX_UPLOAD_SIZE // (1024 * 1024)} MB.")
+    sha256 = (sha256 or "").lower()
+
+    existing = (
+        ChunkedUpload.objects.filter(
+            project=project, indicator_id=indicator_id, filename=filename,
+            total_size=total_size, sha256=sha256, status="uploading",
+            updated_at__gte=timezone.now() - UPLOAD_EXPIRY,
+        )
+        .order_by("-updated_at")
+        .first()
+    )
+    if existing is not None and os.path.exists(part_path(existing)):
+        return existing
+
+    upload = ChunkedUpload.objects.create(
+        project=project, indicator_id=indicator_id, indicator_name=indicator_name or "",
+        filename=filename, total_size=total_size, chunk_size=CHUNK_SIZE, sha256=sha256,
+    )
+    path = part_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+    return upload
+
+
+def write_chunk(upload_id, project, index, stream, checksum=""):
+    """
+    Write chunk `index` read from `stream` (the raw request body) straight to
+    the part file at its offset, hashing as it goes. Chunks must arrive in
+    order; re-sending a chunk that was already stored is acknowledged without
+    writing. The part file is locked while writing, so no database
+    transaction is held open during the (possibly slow) transfer.
+    """
+    from ..models import ChunkedUpload
+
+    upload = ChunkedUpload.objects.filter(pk=upload_id, project=project, status="uploading").first()
+    if upload is None:
+        raise UploadError("Unknown or finished upload.", status=404)
+
+    with open(part_path(upload), "r+b") as f:
+        locks.lock(f, locks.LOCK_EX)
+        try:
+            upload.refresh_from_db(fields=["next_chunk", "received_bytes"])
+            if index < upload.next_chunk:
+                return upload
+            if index > upload.next_chunk or index >= upload.total_chunks:
+                raise UploadError("Chunk out of order.", status=409, next_chunk=upload.next_chunk)
+
+            offset = index * upload.chunk_size
+            expected = min(upload.chunk_size, upload.total_size - offset)
+            digest = hashlib.sha256()
+            written = 0
+            f.seek(offset)
+            while written < expected:
+                block = stream.read(min(READ_BLOCK, expected - written))
+                if not block:
+                    break
+                digest.update(block)
+                f.write(block)
+                written += len(block)
+            if written != expected or stream.read(1) or (checksum and digest.hexdigest() != checksum.lower()):
+                f.truncate(offset)  # drop the bad chunk; the client resends it
+                raise UploadError("Chunk size or checksum mismatch.", status=422, next_chunk=index)
+            f.flush()
+
+            ChunkedUpload.objects.filter(pk=upload.pk, next_chunk=index).update(
+                next_chunk=index + 1, received_bytes=offset + written, updated_at=timezone.now()
+            )
+            upload.next_chunk, upload.received_bytes = index + 1, offset + written
+        finally:
+            locks.unlock(f)
+    return upload
+
+
+class _PartFile(File):
+    """Lets FileSystemStorage move the assembled part file instead of copying it."""
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def finish_upload(upload_id, project):
+    """
+    Verify the assembled file and hand it to IndicatorData. The part file is
+    read once in blocks for the whole-file checksum; the storage then moves it
+    into place. Returns the IndicatorData row.
+    """
+    from ..models import ChunkedUpload, IndicatorData
+    from .images import check_image, schedule_variants
+
+    # Claim the upload first so a double submit cannot store the file twice
+    claimed = ChunkedUpload.objects.filter(
+        pk=upload_id, project=project, status="uploading", received_bytes=F("total_size")
+    ).update(status="complete", updated_at=timezone.now())
+    upload = ChunkedUpload.objects.filter(pk=upload_id, project=project).first()
+    if upload is None or (not claimed and upload.status == "complete"):
+        raise UploadError("Unknown or finished upload.", status=404)
+    if not claimed:
+        raise UploadError("Upload is incomplete.", status=409, next_chunk=upload.next_chunk)
+
+    path = part_path(upload)
+    if upload.sha256:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            while block := f.read(READ_BLOCK):
+                digest.update(block)
+        if digest.hexdigest() != upload.sha256:
+            discard_upload(upload)
+            raise UploadError("File checksum mismatch; upload it again.", status=422)
+
+    with open(path, "rb") as f:
+        part = _PartFile(f, name=upload.filename)
+        try:
+            check_image(part)
+        except ValueError:
+            discard_upload(upload)
+            raise
+        # one transaction: the storage's blob lock is held until the row references the file
+        with transaction.atomic():
+            data, _ = IndicatorData.objects.get_or_create(
+                project=project, indicator_id=upload.indicator_id,
+                defaults={"indicator_name": upload.indicator_name},
+            )
+            data.data_image.save(upload.filename, part, save=False)
+            data.save()
+    schedule_variants(data)
+
+    discard_upload(upload)  # removes the part file if the content was already stored
+    return data
+
+
+def discard_upload(upload):
+    if os.path.exists(part_path(upload)):
+        os.remove(part_path(upload))
+    upload.delete()
+
+
+def expire_uploads():
+    """
+    Delete uploads idle for UPLOAD_EXPIRY, or stuck for FINISH_GRACE after
+    being marked complete, with their part files.
+    """
+    from ..models import ChunkedUpload
+
+    now = timezone.now()
+    stale = ChunkedUpload.objects.filter(
+        Q(status="complete", updated_at__lt=now - FINISH_GRACE) | Q(updated_at__lt=now - UPLOAD_EXPIRY)
+    )
+    count = 0
+    for upload in stale.iterator():
+        discard_upload(upload)
+        count += 1
+    return count
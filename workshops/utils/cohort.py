@@ -0,0 +1,225 @@
+import time
+from datetime import datetime
+
+from django.db.models import Avg, Count, F, IntegerField, Max, Min, Q
+from django.db.models.functions import Cast, Coalesce, Least
+from django.utils import timezone
+
+from ..models import CohortMetric, Indicator, Project, ProjectProgress, Stakeholder, SWOTItem
+from .progress import rebuild_progress
+
+WEIGHT_BINS = 20
+
+
+def _distribution(field):
+    """Projects per value of a ProjectProgress count field, plus summary stats."""
+    value = Coalesce(f"progress__{field}", 0)
+    rows = (
+        Project.objects.annotate(value=value).values("value")
+        .annotate(projects=Count("pk"))
+        .order_by("value")
+    )
+    stats = Project.objects.aggregate(avg=Avg(value), max=Max(value))
+    return {
+        "histogram": [{"size": r["value"], "projects": r["projects"]} for r in rows],
+        "avg": round(stats["avg"] or 0.0, 2),
+        "max": stats["max"] or 0,
+    }
+
+
+def workshop_completion():
+    """Projects per completed workshop, over every project (progress rows are joined)."""
+    counts = Project.objects.aggregate(**{
+        "projects": Count("pk"),
+        "stakeholders": Count("pk", filter=Q(progress__stakeholders_count__gt=0)),
+        "problem_tree": Count("pk", filter=Q(progress__problems_count__gt=0)),
+        "objective_tree": Count("pk", filter=Q(progress__objectives_count__gt=0)),
+        "indicator_selection": Count("pk", filter=Q(progress__indicators_count__gt=0)),
+        "indicator_analysis": Count(
+            "pk", filter=Q(progress__indicator_data_count__gt=0) | Q(progress__datasets_count__gt=0)
+        ),
+        "swot": Count("pk", filter=Q(progress__swot_count__gt=0)),
+        "overview": Count("pk", filter=Q(progress__overview_done=True)),
+        "indicator_ranking": Count("pk", filter=Q(progress__ranking_done=True)),
+        "scenario": Count("pk", filter=Q(progress__qsorts_count__gt=0) | Q(progress__scenarios_count__gt=0)),
+        "all": Count("pk", filter=Q(progress__completed=len(ProjectProgress.WORKSHOPS))),
+    })
+    return {
+        "projects": counts["projects"],
+        "workshops": [
+            {"key": key, "label": label, "projects": counts[key]}
+            for key, label, _ in ProjectProgress.WORKSHOPS
+        ],
+        "all_completed": counts["all"],
+    }
+
+
+def indicator_popularity(limit=50):
+    """How many projects accepted each master indicator (plus custom ones)."""
+    accepted = Indicator.objects.filter(accepted=True)
+    rows = (
+        accepted.filter(master_indicator__isnull=False)
+        .values("master_indicator_id", "master_indicator__name", "master_indicator__category")
+        .annotate(projects=Count("project", distinct=True))
+        .order_by("-projects", "master_indicator__name")[:limit]
+    )
+    return {
+        "top": [
+            {
+                "id": r["master_indicator_id"],
+                "name": r["master_indicator__name"],
+                "category": r["master_indicator__category"] or "",
+                "projects": r["projects"],
+            }
+            for r in rows
+        ],
+        "custom_indicators": accepted.filter(master_indicator__isnull=True).count(),
+    }
+
+
+def weight_distribution(limit=50):
+    """Histogram of Simos weights over all ranked indicators, and per-indicator spread."""
+    weighted = Indicator.objects.filter(accepted=True, weight__isnull=False)
+    buckets = (
+        weighted.annotate(bucket=Least(Cast(F("weight") * WEIGHT_BINS, IntegerField()), WEIGHT_BINS - 1))
+        .values("bucket")
+        .annotate(n=Count("id"))
+        .order_by("bucket")
+    )
+    histogram = [0] * WEIGHT_BINS
+    for r in buckets:
+        histogram[max(0, r["bucket"])] += r["n"]
+
+    per_indicator = (
+        weighted.filter(master_indicator__isnull=False)
+        .values("master_indicator_id", "master_indicator__name")
+        .annotate(n=Count("id"), avg=Avg("weight"), min=Min("weight"), max=Max("weight"))
+        .order_by("-avg")[:limit]
+    )
+    return {
+        "bins": WEIGHT_BINS,
+        "histogram": histogram,
+        "per_indicator": [
+            {
+                "name": r["master_indicator__name"],
+                "n": r["n"],
+                "avg": round(r["avg"], 4),
+                "min": round(r["min"], 4),
+                "max": round(r["max"], 4),
+            }
+            for r in per_indicator
+        ],
+    }
+
+
+def swot_counts():
+    labels = dict(SWOTItem.CATEGORY_CHOICES)
+    rows = (
+        SWOTItem.objects.values("category")
+        .annotate(items=Count("id"), projects=Count("project", distinct=True))
+        .order_by("category")
+    )
+    return {"categories": [{"label": labels.get(r["category"], r["category"]), **r} for r in rows]}
+
+
+def stakeholder_mix():
+    def grouped(field, choices):
+        labels = dict(choices)
+        rows = Stakeholder.objects.values(field).annotate(n=Count("id")).order_by("-n")
+        return [{"key": r[field], "label": labels.get(r[field], r[field]), "n": r["n"]} for r in rows]
+
+    return {
+        "typology": grouped("typology", Stakeholder.TYPOLOGY_CHOICES),
+        "level": grouped("level", Stakeholder.LEVEL_CHOICES),
+        "resources": grouped("resources", Stakeholder.RESOURCES_CHOICES),
+    }
+
+
+def tree_sizes():
+    return {"problems": _distribution("problems_count"), "objectives": _distribution("objectives_count")}
+
+
+def qsort_panels():
+    return _distribution("qsorts_count")
+
+
+# key -> (workshop sections the metric depends on, builder)
+METRICS = {
+    "completion": (None, workshop_completion),
+    "indicator_popularity": (["indicator_selection"], indicator_popularity),
+    "weight_distribution": (["indicator_selection", "indicator_ranking"], weight_distribution),
+    "swot_counts": (["swot"], swot_counts),
+    "stakeholder_mix": (["stakeholders"], stakeholder_mix),
+    "tree_sizes": (["problem_tree", "objective_tree"], tree_sizes),
+    "qsort_panels": (["scenario"], qsort_panels),
+}
+
+
+def stale_metrics():
+    """
+    Keys whose inputs changed since they were computed, using the per-section
+    timestamps kept in ProjectProgress. Only projects touched since the oldest
+    snapshot are read.
+    """
+    rows = CohortMetric.objects.values_list("key", "computed_at", "stale")
+    computed = {key: computed_at for key, computed_at, _ in rows}
+    missing = [key for key in METRICS if key not in computed]
+    missing += [key for key, _, stale in rows if stale and key in METRICS]
+    if len(missing) == len(METRICS):
+        return missing
+
+    since = min(computed.values())
+    changed = ProjectProgress.objects.filter(updated_at__gt=since).values_list("section_updated_at", flat=True)
+
+    latest = {}
+    for sections in changed.iterator():
+        for section, stamp in (sections or {}).items():
+            stamp = datetime.fromisoformat(stamp)
+            if section not in latest or stamp > latest[section]:
+                latest[section] = stamp
+
+    stale = set(missing)
+    for key, (sections, _) in METRICS.items():
+        if key in stale or key not in computed:
+            continue
+        relevant = latest.keys() if sections is None else sections
+        if any(s in latest and latest[s] > computed[key] for s in relevant):
+            stale.add(key)
+    return [key for key in METRICS if key in stale]
+
+
+def refresh_cohort_metrics(keys=None, stale_only=False):
+    """Recompute (all, given or only stale) metrics and store them. Returns refreshed keys."""
+    if stale_only:
+        keys = stale_metrics()
+    elif keys is None:
+        keys = list(METRICS)
+    if keys:
+        # progress rows are built lazily; aggregates need one per project
+        rebuild_progress(Project.objects.filter(progress__isnull=True))
+
+    for key in keys:
+        _, builder = METRICS[key]
+        computed_at = timezone.now()  # before reading, so concurrent edits count as newer
+        started = time.perf_counter()
+        data = builder()
+        CohortMetric.objects.update_or_create(
+            key=key,
+            defaults={
+                "data": data,
+                "computed_at": computed_at,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                "stale": False,
+            },
+        )
+    return keys
+
+
+def mark_cohort_metrics_stale():
+    """Flag every snapshot for recomputation (e.g. after a project was deleted)."""
+    CohortMetric.objects.filter(stale=False).update(stale=True)
+
+
+def load_cohort_metrics():
+    """All stored snapshots in one query: {key: CohortMetric}."""
+    return {m.key: m for m in CohortMetric.objects.all()}
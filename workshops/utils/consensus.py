@@ -0,0 +1,118 @@
+import numpy as np
+
+from .simos import simos_from_ranking
+
+
+def _member_ranks(order_list, groups_list, ids):
+    """
+    Rank vector aligned with ids (1 = most important, ties averaged).
+    Simos positions grow with importance, so the highest position gets rank 1.
+    Indicators the member did not rank share the remaining (worst) ranks.
+    """
+    positions = {
+        row["id"]: row["position"]
+        for row in simos_from_ranking(order_list, groups_list)["indicators"]
+    }
+    n = len(ids)
+    ranked = [i for i in ids if i in positions]
+    pos = np.array([positions[i] for i in ranked], dtype=float)
+
+    # average ranks: 1 + (#strictly better) + (#ties - 1) / 2
+    better = (pos[None, :] > pos[:, None]).sum(axis=1)
+    ties = (pos[None, :] == pos[:, None]).sum(axis=1)
+    rank_of = dict(zip(ranked, 1.0 + better + (ties - 1) / 2.0))
+
+    missing_rank = (len(ranked) + 1 + n) / 2.0
+    return np.array([rank_of.get(i, missing_rank) for i in ids], dtype=float)
+
+
+def _kemeny_local_search(order, preference):
+    """
+    Local Kemenization: swap neighbours while a majority prefers the lower one.
+    preference[a, b] = number of members ranking a above b.
+    """
+    order = list(order)
+    changed = True
+    while changed:
+        changed = False
+        for k in range(len(order) - 1):
+            a, b = order[k], order[k + 1]
+            if preference[b, a] > preference[a, b]:
+                order[k], order[k + 1] = b, a
+                changed = True
+    return order
+
+
+def aggregate_rankings(rankings):
+    """
+    Aggregate several members' SRF rankings into one consensus.
+
+    rankings: list of {"key", "label", "order", "groups"}.
+    Returns Borda and Kemeny-approximate consensus orders, Simos weights of the
+    consensus, pairwise Kendall tau / Spearman matrices between members,
+    per-indicator disagreement and Kendall's W.
+    """
+    rankings = [r for r in rankings if r.get("order")]
+    if not rankings:
+        return {}
+
+    ids = []
+    for r in rankings:
+        for row in simos_from_ranking(r["order"], r.get("groups"))["indicators"]:
+            if row["id"] not in ids:
+                ids.append(row["id"])
+    if not ids:
+        return {}
+
+    m, n = len(rankings), len(ids)
+    R = np.vstack([_member_ranks(r["order"], r.get("groups"), ids) for r in rankings])
+
+    # --- 1. Borda: lower rank sum = more important ---
+    rank_sum = R.sum(axis=0)
+    borda = list(np.argsort(rank_sum, kind="stable"))
+
+    # --- 2. Kemeny approximation from the Borda start ---
+    preference = (R[:, :, None] < R[:, None, :]).sum(axis=0)
+    kemeny = _kemeny_local_search(borda, preference)
+
+    # --- 3. Member agreement ---
+    S = np.sign(R[:, None, :] - R[:, :, None])  # (member, i, j)
+    concordant = np.einsum("aij,bij->ab", S, S)
+    informative = np.sqrt(np.abs(S).sum(axis=(1, 2)))
+    denom = np.outer(informative, informative)
+    tau = np.where(denom > 0, concordant / np.where(denom > 0, denom, 1.0), 0.0)
+    np.fill_diagonal(tau, 1.0)
+
+    if n > 1 and m > 1:
+        spearman = np.nan_to_num(np.corrcoef(R), nan=0.0)
+        np.fill_diagonal(spearman, 1.0)
+    else:
+        spearman = np.ones((m, m))
+
+    # Kendall's W (coefficient of concordance, 0 = no agreement, 1 = identical)
+    if m > 1 and n > 1:
+        deviations = ((rank_sum - rank_sum.mean()) ** 2).sum()
+        kendall_w = float(12.0 * deviations / (m ** 2 * (n ** 3 - n)))
+    else:
+        kendall_w = 1.0
+
+    # Per-indicator disagreement: spread of normalized ranks across members
+    spread = (R / n).std(axis=0)
+
+    # --- 4. Consensus weights (Simos order runs least -> most important) ---
+    consensus_ids = [ids[k] for k in kemeny]
+    simos = simos_from_ranking(list(reversed(consensus_ids)))
+    weights = {row["id"]: row["normalized_weight"] for row in simos["indicators"]}
+
+    return {
+        "members": [{"key": r["key"], "label": r.get("label") or r["key"]} for r in rankings],
+        "indicator_ids": ids,
+        "borda_order": [ids[k] for k in borda],
+        "kemeny_order": consensus_ids,
+        "weights": {k: round(v, 6) for k, v in weights.items()},
+        "mean_rank": {ids[k]: round(float(rank_sum[k] / m), 3) for k in range(n)},
+        "disagreement": {ids[k]: round(float(spread[k]), 4) for k in range(n)},
+        "kendall_tau": np.round(tau, 4).tolist(),
+        "spearman": np.round(spearman, 4).tolist(),
+        "kendall_w": round(kendall_w, 4),
+    }
@@ -0,0 +1,319 @@
+import csv
+import hashlib
+import io
+import re
+from functools import lru_cache
+
+import numpy as np
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024
+MAX_ROWS = 100_000
+MAX_COLUMNS = 50
+SPARK_POINTS = 60
+STATS_VERSION = 1  # bump when compute_stats changes; stored stats are recomputed on read
+
+_HEADER_UNIT = re.compile(r"^(.*?)\s*[\(\[]\s*([^\)\]]+?)\s*[\)\]]\s*$")
+_INDEX_NAMES = re.compile(r"^(year|date|time|period|month|day|region|area|zone|district|municipality|station|site)\b", re.I)
+
+# Conversion factors to a base unit, per dimension
+UNIT_FACTORS = {
+    "length": {"mm": 1e-3, "cm": 1e-2, "m": 1.0, "km": 1e3},
+    "area": {"m2": 1.0, "m²": 1.0, "ha": 1e4, "km2": 1e6, "km²": 1e6},
+    "mass": {"mg": 1e-6, "g": 1e-3, "kg": 1.0, "t": 1e3, "tonnes": 1e3, "tons": 1e3},
+    "volume": {"ml": 1e-6, "l": 1e-3, "m3": 1.0, "m³": 1.0},
+    "energy": {"wh": 1e-3, "kwh": 1.0, "mwh": 1e3, "gwh": 1e6},
+}
+PERCENT_UNITS = {"%", "percent", "percentage"}
+
+
+# -------------------------
+# CSV -> columns
+# -------------------------
+
+def _split_header(name, position):
+    name = (name or "").strip() or f"column_{position + 1}"
+    match = _HEADER_UNIT.match(name)
+    if match:
+        return match.group(1).strip() or f"column_{position + 1}", match.group(2)
+    return name, ""
+
+
+def _typed(values):
+    """Vectorized type inference for one column of strings: (kind, ndarray)."""
+    raw = np.char.strip(np.asarray(values, dtype=str))
+    empty = raw == ""
+    if empty.all():
+        return "text", raw
+
+    numeric = np.where(empty, "nan", raw)
+    for candidate in (numeric, np.char.replace(numeric, ",", ".")):  # then decimal commas
+        try:
+            return "number", candidate.astype(np.float64)
+        except ValueError:
+            pass
+    try:
+        return "date", np.where(empty, "NaT", raw).astype("datetime64[D]")
+    except ValueError:
+        return "text", raw
+
+
+def parse_csv(upload):
+    """
+    Read an uploaded CSV (delimiter sniffed, UTF-8 with or without BOM) into
+    typed numpy columns. Returns (columns meta, {name: ndarray}).
+    Raises ValueError with a message for the student.
+    """
+    if upload.size > MAX_UPLOAD_SIZE:
+        raise ValueError(f"CSV files are limited to {MAX_UPLOAD_SIZE // (1024 * 1024)} MB.")
+    upload.seek(0)
+    text = io.TextIOWrapper(getattr(upload, "file", upload), encoding="utf-8-sig", newline="")
+    try:
+        sample = text.read(8192)
+        text.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(text, dialect)
+        header = next(reader, None)
+        if not header:
+            raise ValueError("The file is empty.")
+        if len(header) > MAX_COLUMNS:
+            raise ValueError(f"At most {MAX_COLUMNS} columns are supported.")
+
+        width = len(header)
+        cells = [[] for _ in range(width)]
+        for n, row in enumerate(reader):
+            if n >= MAX_ROWS:
+                raise ValueError(f"At most {MAX_ROWS} rows are supported.")
+            if not any(c.strip() for c in row):
+                continue
+            row = (row + [""] * width)[:width]
+            for column, value in zip(cells, row):
+                column.append(value)
+    except UnicodeDecodeError as e:
+        raise ValueError("The file must be UTF-8 encoded CSV.") from e
+    except csv.Error as e:
+        raise ValueError(f"Could not read the CSV: {e}") from e
+    finally:
+        text.detach()
+    if not cells[0]:
+        raise ValueError("The file has a header but no data rows.")
+
+    meta, arrays, seen = [], {}, set()
+    for position, (name, values) in enumerate(zip(header, cells)):
+        name, unit = _split_header(name, position)
+        while name in seen:
+            name += "_"
+        seen.add(name)
+        kind, array = _typed(values)
+        meta.append({"name": name, "kind": kind, "unit": unit})
+        arrays[name] = array
+    if not any(m["kind"] == "number" for m in meta):
+        raise ValueError("No numeric column found.")
+    return meta, arrays
+
+
+def default_columns(meta):
+    """(index column, value column): a date/year/region-like key and the first numeric column after it."""
+    index = next((m["name"] for m in meta if m["kind"] == "date"), None)
+    if index is None:
+        index = next((m["name"] for m in meta if _INDEX_NAMES.match(m["name"])), meta[0]["name"])
+    value = next((m["name"] for m in meta if m["kind"] == "number" and m["name"] != index), "")
+    return index, value
+
+
+# -------------------------
+# Columnar storage (.npz, one array per column, no pickles)
+# -------------------------
+
+def _to_npz(meta, arrays):
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **{f"c{i}": arrays[m["name"]] for i, m in enumerate(meta)})
+    return buffer.getvalue()
+
+
+@lru_cache(maxsize=32)
+def _load_npz(name):
+    with default_storage.open(name, "rb") as f:
+        with np.load(io.BytesIO(f.read()), allow_pickle=False) as npz:
+            return {key: npz[key] for key in npz.files}
+
+
+def load_columns(dataset):
+    """{column name: ndarray} for a stored dataset (cached per file)."""
+    stored = _load_npz(dataset.file.name)
+    return {m["name"]: stored[f"c{i}"] for i, m in enumerate(dataset.columns)}
+
+
+def save_dataset(indicator, upload, index_column=None, value_column=None):
+    """Parse a CSV upload and store it as the indicator's dataset (replacing any previous one)."""
+    from ..models import IndicatorDataset
+
+    meta, arrays = parse_csv(upload)
+    names = [m["name"] for m in meta]
+    default_index, default_value = default_columns(meta)
+    index_column = index_column if index_column in names else default_index
+    value_column = value_column if value_column in names else default_value
+
+    payload = _to_npz(meta, arrays)
+    digest = hashlib.sha256(payload).hexdigest()[:16]
+    with transaction.atomic():
+        dataset = IndicatorDataset.objects.select_for_update().filter(indicator=indicator).first()
+        old_file = dataset.file.name if dataset else None
+        if dataset is None:
+            dataset = IndicatorDataset(indicator=indicator, project_id=indicator.project_id)
+        dataset.source_name = upload.name[:255]
+        dataset.columns = meta
+        dataset.rows = len(arrays[names[0]])
+        dataset.index_column, dataset.value_column = index_column, value_column
+        dataset.file.save(f"{indicator.project_id}/{indicator.id}-{digest}.npz", ContentFile(payload), save=False)
+        dataset.stats = compute_stats(dataset, arrays)
+        dataset.stats_version = STATS_VERSION
+        dataset.save()
+        if old_file and old_file != dataset.file.name:
+            transaction.on_commit(lambda: default_storage.delete(old_file))
+    return dataset
+
+
+# -------------------------
+# Vectorized statistics
+# -------------------------
+
+def unit_factor(column_unit, indicator_unit):
+    """Factor converting values in column_unit to indicator_unit (1.0 when unknown or incompatible)."""
+    source, target = (column_unit or "").strip().lower(), (indicator_unit or "").strip().lower()
+    if not source or not target or source == target:
+        return 1.0
+    for factors in UNIT_FACTORS.values():
+        if source in factors and target in factors:
+            return factors[source] / factors[target]
+    return 1.0
+
+
+def _axis(kind, values):
+    """Numeric x positions for a key column: fractional years for dates, values for numbers."""
+    if kind == "date":
+        days = values.astype("datetime64[D]").astype(np.float64)
+        days[np.isnat(values)] = np.nan
+        return 1970 + days / 365.25, True
+    if kind == "number":
+        return values.astype(np.float64), True
+    return np.arange(len(values), dtype=np.float64), False
+
+
+def _label(kind, value):
+    if kind == "date":
+        return str(value)
+    if kind == "number":
+        return f"{value:g}"
+    return str(value)
+
+
+def compute_stats(dataset, arrays=None):
+    """
+    Summary statistics, trend and unit-normalized values of the dataset's value
+    column, computed with vectorized numpy operations over the whole column.
+    """
+    arrays = arrays if arrays is not None else load_columns(dataset)
+    kinds = {m["name"]: m for m in dataset.columns}
+    value_meta = kinds.get(dataset.value_column)
+    if value_meta is None or value_meta["kind"] != "number":
+        return {}
+
+    indicator_unit = dataset.indicator.unit or ""
+    factor = unit_factor(value_meta["unit"], indicator_unit)
+    y = arrays[dataset.value_column].astype(np.float64) * factor
+
+    index_meta = kinds.get(dataset.index_column) or {"kind": "text"}
+    keys = arrays.get(dataset.index_column, np.arange(len(y)))
+    x, ordered = _axis(index_meta["kind"], keys)
+
+    valid = ~np.isnan(y) & ~np.isnan(x)
+    # Shares given as fractions for a percentage indicator
+    if indicator_unit.strip().lower() in PERCENT_UNITS and valid.any() and np.nanmax(np.abs(y[valid])) <= 1:
+        y = y * 100
+        factor *= 100
+
+    stats = {
+        "count": int(valid.sum()),
+        "missing": int(len(y) - valid.sum()),
+        "unit": indicator_unit or value_meta["unit"],
+        "unit_factor": factor,
+        "series": ordered,
+    }
+    if not valid.any():
+        return stats
+
+    xv, yv, kv = x[valid], y[valid], keys[valid]
+    if ordered:
+        order = np.argsort(xv, kind="stable")
+        xv, yv, kv = xv[order], yv[order], kv[order]
+
+    p25, median, p75 = np.percentile(yv, [25, 50, 75])
+    stats.update({
+        "min": float(yv.min()),
+        "max": float(yv.max()),
+        "mean": float(yv.mean()),
+        "std": float(yv.std(ddof=1)) if len(yv) > 1 else 0.0,
+        "median": float(median),
+        "p25": float(p25),
+        "p75": float(p75),
+    })
+
+    if ordered:
+        stats.update({
+            "first": float(yv[0]),
+            "last": float(yv[-1]),
+            "first_label": _label(index_meta["kind"], kv[0]),
+            "last_label": _label(index_meta["kind"], kv[-1]),
+        })
+        if len(yv) >= 2 and xv[-1] > xv[0]:
+            slope, _ = np.polyfit(xv, yv, 1)
+            span = xv[-1] - xv[0]
+            stats["slope"] = float(slope)
+            stats["slope_per"] = "year" if index_meta["kind"] == "date" else dataset.index_column
+            stats["change_pct"] = float((yv[-1] - yv[0]) / abs(yv[0]) * 100) if yv[0] else None
+            scale = np.abs(yv).mean() or 1.0
+            stats["trend"] = "flat" if abs(slope * span) < 0.01 * scale else ("up" if slope > 0 else "down")
+    else:
+        # Spatial / categorical table: where is the indicator highest and lowest
+        order = np.argsort(yv)
+        stats["lowest"] = [[str(kv[i]), float(yv[i])] for i in order[:3]]
+        stats["highest"] = [[str(kv[i]), float(yv[i])] for i in order[::-1][:3]]
+
+    # Min-max normalized values (0..1), downsampled for sparklines and charts
+    spread = yv.max() - yv.min()
+    normalized = (yv - yv.min()) / spread if spread else np.full_like(yv, 0.5)
+    picks = np.unique(np.linspace(0, len(yv) - 1, min(SPARK_POINTS, len(yv))).round().astype(int))
+    stats["normalized"] = np.round(normalized[picks], 4).tolist()
+    stats["chart"] = {"x": np.round(xv[picks], 4).tolist(), "y": np.round(yv[picks], 6).tolist()}
+    return stats
+
+
+def get_stats(dataset):
+    """Cached stats, recomputed (and stored) when STATS_VERSION changed."""
+    if dataset.stats_version != STATS_VERSION:
+        dataset.stats = compute_stats(dataset)
+        dataset.stats_version = STATS_VERSION
+        type(dataset).objects.filter(pk=dataset.pk).update(stats=dataset.stats, stats_version=STATS_VERSION)
+    return dataset.stats
+
+
+def sparkline_points(values, width=120, height=28):
+    """SVG polyline points for normalized (0..1) values."""
+    if not values:
+        return ""
+    if len(values) == 1:
+        values = values * 2
+    step = width / (len(values) - 1)
+    return " ".join(f"{i * step:.1f},{(1 - v) * (height - 2) + 1:.1f}" for i, v in enumerate(values))
+
+
+def project_dataset_stats(project):
+    """{indicator id: stats} for every dataset of the project (one query)."""
+    datasets = project.datasets.select_related("indicator")
+    return {d.indicator_id: {**get_stats(d), "source_name": d.source_name} for d in datasets}
@@ -0,0 +1,197 @@
+import csv
+import io
+import json
+import re
+import zipfile
+from collections import namedtuple
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+# One column of an export table.
+# value: attribute name on the row, or a callable taking the row.
+# key: NDJSON field name when the header is not unique (default: header).
+Column = namedtuple("Column", ["header", "value", "key"], defaults=(None,))
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+FLUSH_EVERY = 500  # rows per yielded chunk for XLSX / ZIP output
+
+
+def _cell(row, column):
+    if callable(column.value):
+        return column.value(row)
+    if isinstance(row, dict):
+        return row.get(column.value)
+    return getattr(row, column.value)
+
+
+class _Echo:
+    """csv.writer target that hands each written line straight back."""
+    def write(self, value):
+        return value
+
+
+class StreamBuffer(io.RawIOBase):
+    """
+    Non-seekable write target that collects bytes until drained.
+    zipfile falls back to streaming mode (data descriptors) on such files.
+    """
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_csv(rows, columns):
+    writer = csv.writer(_Echo())
+    yield writer.writerow([c.header for c in columns])
+    for row in rows:
+        yield writer.writerow([_cell(row, c) for c in columns])
+
+
+def iter_ndjson(rows, columns):
+    for row in rows:
+        record = {c.key or c.header: _cell(row, c) for c in columns}
+        yield json.dumps(record, default=str, ensure_ascii=False) + "\n"
+
+
+# --- Minimal streaming XLSX (SpreadsheetML with inline strings) ---
+
+_XLSX_STATIC_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+_ILLEGAL_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _xlsx_cell(value):
+    if value is None or value == "":
+        return "<c/>"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"<c><v>{value}</v></c>"
+    text = escape(_ILLEGAL_XML.sub("", str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _xlsx_row(values):
+    return "<row>" + "".join(_xlsx_cell(v) for v in values) + "</row>"
+
+
+def iter_xlsx(rows, columns):
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, xml in _XLSX_STATIC_PARTS.items():
+            zf.writestr(name, xml)
+        yield buffer.drain()
+
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row([c.header for c in columns]).encode("utf-8"))
+            for count, row in enumerate(rows, start=1):
+                sheet.write(_xlsx_row([_cell(row, c) for c in columns]).encode("utf-8"))
+                if count % FLUSH_EVERY == 0:
+                    yield buffer.drain()
+            sheet.write(b"</sheetData></worksheet>")
+    yield buffer.drain()
+
+
+_WRITERS = {"csv": iter_csv, "xlsx": iter_xlsx, "ndjson": iter_ndjson}
+
+
+def export_format(request, default="csv"):
+    """Read ?format= (or POST 'format'), falling back to default for unknown values."""
+    fmt = (request.GET.get("format") or request.POST.get("format") or default).lower()
+    return fmt if fmt in FORMATS else default
+
+
+async def _aiter_chunks(chunks):
+    """
+    Pull each chunk of a sync generator on Django's sync thread (where its
+    queryset cursor lives), so the event loop is never blocked by it.
+    """
+    chunks = iter(chunks)
+    try:
+        while True:
+            chunk = await sync_to_async(next)(chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+    finally:
+        if hasattr(chunks, "close"):
+            await sync_to_async(chunks.close)()
+
+
+def streaming_response(request, chunks, content_type):
+    """
+    StreamingHttpResponse over a sync chunk generator. Under ASGI Django
+    reads a sync iterator to the end before sending anything, so there the
+    generator is wrapped in an async iterator and really streams.
+    """
+    if isinstance(request, ASGIRequest):
+        chunks = _aiter_chunks(chunks)
+    return StreamingHttpResponse(chunks, content_type=content_type)
+
+
+def streaming_export(request, rows, columns, fmt, filename):
+    """
+    Stream rows (e.g. a queryset .iterator()) as CSV, XLSX or NDJSON.
+    filename is given without extension.
+    """
+    content_type, extension = FORMATS[fmt]
+    response = streaming_response(request, _WRITERS[fmt](rows, columns), content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{extension}"'
+    return response
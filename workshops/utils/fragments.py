@@ -0,0 +1,65 @@
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .progress import get_progress
+
+
+def fragment_timeout():
+    return getattr(settings, "TEMPLATE_FRAGMENT_TIMEOUT", 60 * 60 * 24)
+
+
+def project_fragment_context(project, user):
+    """
+    Context for {% cache fragment_timeout <name> fragment_rev %} blocks that
+    depend only on the project's state and the viewing user.
+    ProjectProgress.revision moves on every Project save and every child
+    row change, so a new revision simply renders under a new key; stale
+    entries expire on their own.
+    """
+    progress = get_progress(project)
+    return {
+        "progress": progress,
+        "fragment_rev": f"{project.pk}.{progress.revision}.{user.pk}",
+        "fragment_timeout": fragment_timeout(),
+    }
+
+
+def catalog_version():
+    """
+    Version of the MasterIndicator catalog: row count, highest id and the
+    latest edit, so imports and admin changes both start a new fragment.
+    """
+    from ..models import MasterIndicator
+
+    agg = MasterIndicator.objects.aggregate(n=Count("id"), last=Max("id"), edited=Max("updated_at"))
+    edited = int(agg["edited"].timestamp() * 1000) if agg["edited"] else 0
+    return f"{agg['n']}.{agg['last'] or 0}.{edited}"
+
+
+# Indicator fields the indicator selection fragment renders
+RENDERED_FIELDS = ("name", "description", "category", "criterion", "unit")
+
+
+def indicator_set_version(project):
+    """
+    Identifies the project's indicator rows and what the selection fragment
+    shows of them (not their accepted flags, which are patched in
+    client-side). Returns (version, shared): shared means every row is an
+    unedited catalog clone, so the catalog fragment rendered from
+    MasterIndicator shows exactly these rows.
+    """
+    master_fields = [f"master_indicator__{f}" for f in RENDERED_FIELDS]
+    rows = project.indicators.order_by("id").values_list(
+        "id", "master_indicator_id", *RENDERED_FIELDS, *master_fields
+    )
+    n = len(RENDERED_FIELDS)
+    shown, shared = [], True
+    for row in rows.iterator(chunk_size=2000):
+        own = [v or "" for v in row[2:2 + n]]
+        shown.append((row[0], own))
+        if row[1] is None or own != [v or "" for v in row[2 + n:]]:
+            shared = False
+    digest = hashlib.sha256(repr(shown).encode("utf-8")).hexdigest()[:16]
+    return f"{len(shown)}.{digest}", shared
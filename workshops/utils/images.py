@@ -0,0 +1,133 @@
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+VARIANT_DIR = "indicator_uploads/variants"
+# name -> longest side in px. "thumb" fills the 200px-high upload cards at 2x,
+# "display" is for full-screen viewing and the portfolio PDF.
+VARIANT_SIZES = {"thumb": 480, "display": 1600}
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+MAX_WORKERS = 2
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="image-variants")
+_pending = set()
+_lock = threading.Lock()
+
+
+def check_image(upload):
+    """Raise ValueError unless the upload is an image Pillow can read (header check only)."""
+    try:
+        with Image.open(upload) as img:
+            img.verify()
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise ValueError("The file is not a valid image.") from e
+    finally:
+        upload.seek(0)
+
+
+def _decode(name):
+    """Decode the original once: EXIF orientation applied, metadata dropped."""
+    with default_storage.open(name, "rb") as f:
+        img = Image.open(f)
+        # JPEG can decode at a reduced scale directly, far cheaper for phone photos
+        largest = max(VARIANT_SIZES.values())
+        img.draft("RGB", (largest, largest))
+        img = ImageOps.exif_transpose(img)
+        img.load()
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+    return img
+
+
+def _flatten(img):
+    """JPEG has no alpha: composite onto white."""
+    if img.mode != "RGBA":
+        return img
+    background = Image.new("RGB", img.size, "white")
+    background.paste(img, mask=img.getchannel("A"))
+    return background
+
+
+def _encode(img, fmt):
+    out = io.BytesIO()
+    if fmt == "webp":
+        img.save(out, "WEBP", quality=WEBP_QUALITY, method=4)
+    else:
+        _flatten(img).save(out, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def build_variants(data_id):
+    """
+    Build the thumb/display variants of one IndicatorData upload and store them
+    (no EXIF is written). Old variant files are removed. Skips rows whose
+    image changed again in the meantime; the newer upload schedules its own job.
+    """
+    from ..models import IndicatorData
+
+    item = IndicatorData.objects.filter(pk=data_id).only("id", "data_image", "variants").first()
+    if item is None or not item.data_image:
+        return None
+    source = item.data_image.name
+    img = _decode(source)
+
+    stem = os.path.splitext(os.path.basename(source))[0]
+    variants = {}
+    for size_name, longest in VARIANT_SIZES.items():
+        resized = img.copy()
+        resized.thumbnail((longest, longest), Image.Resampling.LANCZOS)
+        entry = {"width": resized.width, "height": resized.height}
+        for fmt, ext in (("webp", "webp"), ("jpeg", "jpg")):
+            name = f"{VARIANT_DIR}/{item.id}/{stem}-{size_name}.{ext}"
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            entry[fmt] = default_storage.save(name, ContentFile(_encode(resized, fmt)))
+        variants[size_name] = entry
+
+    updated = IndicatorData.objects.filter(pk=data_id, data_image=source).update(
+        variants=variants, variants_source=source
+    )
+    old = {v for entry in (item.variants or {}).values() for k, v in entry.items() if k in ("webp", "jpeg")}
+    new = {v for entry in variants.values() for k, v in entry.items() if k in ("webp", "jpeg")}
+    for name in (old - new) if updated else new:
+        default_storage.delete(name)
+    return variants if updated else None
+
+
+def _run(key):
+    try:
+        return build_variants(key[0])
+    except Exception:
+        logger.exception("Building image variants failed for IndicatorData %s", key[0])
+        raise
+    finally:
+        with _lock:
+            _pending.discard(key)
+        close_old_connections()
+
+
+def schedule_variants(item):
+    """
+    Queue variant generation for an IndicatorData row once the current
+    transaction commits. Jobs are shared per (row, uploaded file).
+    """
+    key = (item.id, item.data_image.name)
+
+    def submit():
+        with _lock:
+            if key in _pending:
+                return
+            _pending.add(key)
+        _executor.submit(_run, key)
+
+    transaction.on_commit(submit)
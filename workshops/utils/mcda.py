@@ -0,0 +1,141 @@
+import hashlib
+import json
+
+import numpy as np
+from django.core.cache import cache
+
+CACHE_TIMEOUT = 60 * 60
+
+
+def _oriented(matrix, directions):
+    """Flip cost criteria so that 'higher is better' holds for every column."""
+    sign = np.where(np.asarray(directions) == "cost", -1.0, 1.0)
+    return matrix * sign
+
+
+def _minmax(matrix):
+    """Column-wise min-max scaling to [0, 1]; constant columns become 1.0."""
+    lo = matrix.min(axis=0)
+    span = matrix.max(axis=0) - lo
+    safe = np.where(span > 0, span, 1.0)
+    return np.where(span > 0, (matrix - lo) / safe, 1.0)
+
+
+def weighted_sum(matrix, weights, directions):
+    """Simple additive weighting on min-max normalized, oriented criteria."""
+    return _minmax(_oriented(matrix, directions)) @ weights
+
+
+def topsis(matrix, weights, directions):
+    """
+    TOPSIS closeness coefficient (0..1, higher is better).
+    Vector normalization -> weighted -> distance to ideal / anti-ideal.
+    """
+    norms = np.linalg.norm(matrix, axis=0)
+    v = matrix / np.where(norms > 0, norms, 1.0) * weights
+
+    is_cost = np.asarray(directions) == "cost"
+    ideal = np.where(is_cost, v.min(axis=0), v.max(axis=0))
+    anti = np.where(is_cost, v.max(axis=0), v.min(axis=0))
+
+    d_plus = np.linalg.norm(v - ideal, axis=1)
+    d_minus = np.linalg.norm(v - anti, axis=1)
+    total = d_plus + d_minus
+    return np.where(total > 0, d_minus / np.where(total > 0, total, 1.0), 0.5)
+
+
+def electre_outranking(matrix, weights, directions, concordance_threshold=0.65,
+                       discordance_threshold=0.35):
+    """
+    ELECTRE I style outranking.
+    concordance[a, b] = weight share of criteria where a is at least as good as b.
+    discordance[a, b] = largest normalized amount by which b beats a.
+    a outranks b when concordance >= c* and discordance <= d*.
+    Returns (net_flow, concordance, discordance, outranks).
+    """
+    g = _oriented(matrix, directions)
+    diff = g[:, None, :] - g[None, :, :]  # (a, b, criterion)
+
+    concordance = ((diff >= 0) * weights).sum(axis=2)
+
+    span = g.max(axis=0) - g.min(axis=0)
+    scaled = -diff / np.where(span > 0, span, 1.0)
+    discordance = np.clip(scaled, 0.0, None).max(axis=2)
+
+    outranks = (concordance >= concordance_threshold) & (discordance <= discordance_threshold)
+    np.fill_diagonal(outranks, False)
+    net_flow = outranks.sum(axis=1) - outranks.sum(axis=0)
+    return net_flow, concordance, discordance, outranks
+
+
+def _ranks(scores):
+    """Rank 1 = best score, ties share the best rank."""
+    scores = np.asarray(scores, dtype=float)
+    return 1 + (scores[None, :] > scores[:, None]).sum(axis=1)
+
+
+def score_scenarios(scenario_ids, indicator_ids, matrix, weights, directions):
+    """
+    Run all three methods on a complete (scenarios x indicators) performance matrix.
+    Weights are re-normalized to sum to 1. With no scenarios or no indicators
+    nothing is scored and nothing is recommended.
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    if not len(scenario_ids) or not len(indicator_ids):
+        return {
+            "indicator_ids": list(indicator_ids),
+            "weights": [],
+            "scores": [],
+            "recommended": None,
+            "concordance": [],
+            "discordance": [],
+            "outranks": [],
+        }
+    weights = weights / weights.sum() if weights.sum() > 0 else np.full(len(weights), 1.0 / len(weights))
+
+    ws = weighted_sum(matrix, weights, directions)
+    tp = topsis(matrix, weights, directions)
+    net_flow, concordance, discordance, outranks = electre_outranking(matrix, weights, directions)
+
+    rank_table = np.vstack([_ranks(ws), _ranks(tp), _ranks(net_flow)])
+    mean_rank = rank_table.mean(axis=0)
+
+    rows = []
+    for i, sid in enumerate(scenario_ids):
+        rows.append({
+            "scenario_id": sid,
+            "weighted_sum": round(float(ws[i]), 4),
+            "topsis": round(float(tp[i]), 4),
+            "electre_net_flow": int(net_flow[i]),
+            "rank_weighted_sum": int(rank_table[0, i]),
+            "rank_topsis": int(rank_table[1, i]),
+            "rank_electre": int(rank_table[2, i]),
+            "mean_rank": round(float(mean_rank[i]), 2),
+        })
+    rows.sort(key=lambda r: (r["mean_rank"], -r["topsis"]))
+
+    return {
+        "indicator_ids": list(indicator_ids),
+        "weights": [round(float(w), 6) for w in weights],
+        "scores": rows,
+        "recommended": rows[0]["scenario_id"] if rows else None,
+        "concordance": np.round(concordance, 4).tolist(),
+        "discordance": np.round(discordance, 4).tolist(),
+        "outranks": outranks.astype(int).tolist(),
+    }
+
+
+def cached_score_scenarios(scenario_ids, indicator_ids, matrix, weights, directions):
+    """score_scenarios() memoized in the Django cache, keyed by a hash of the inputs."""
+    payload = json.dumps(
+        [list(scenario_ids), list(indicator_ids), np.asarray(matrix, dtype=float).tolist(),
+         [float(w) for w in weights], list(directions)],
+        separators=(",", ":"),
+    )
+    key = "mcda:" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    result = cache.get(key)
+    if result is None:
+        result = score_scenarios(scenario_ids, indicator_ids, matrix, weights, directions)
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
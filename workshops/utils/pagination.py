@@ -0,0 +1,56 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+
+def encode_cursor(values):
+    """Opaque, URL-safe cursor from the sort key of the last row on a page."""
+    raw = json.dumps(values, default=lambda v: v.isoformat()).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor(); raises ValueError on tampered input."""
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor.") from e
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError("Invalid cursor.")
+    return values
+
+
+def keyset_page(queryset, order_field, cursor=None, page_size=24):
+    """
+    Seek-method pagination on (order_field, id).
+
+    order_field may start with "-" for descending order. Unlike OFFSET, the
+    database jumps straight to the cursor through the index, so every page
+    costs the same. Returns (rows, next_cursor or None).
+    """
+    descending = order_field.startswith("-")
+    field = order_field.lstrip("-")
+    queryset = queryset.order_by(order_field, "-id" if descending else "id")
+
+    if cursor:
+        value, last_id = decode_cursor(cursor)
+        if field.endswith("_at") and isinstance(value, str):
+            value = datetime.fromisoformat(value)
+        op = "lt" if descending else "gt"
+        queryset = queryset.filter(
+            Q(**{f"{field}__{op}": value}) | Q(**{field: value, f"id__{op}": last_id})
+        )
+
+    rows = list(queryset[: page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+
+    rows = rows[:page_size]
+    last = rows[-1]
+    obj = last
+    for part in field.split("__"):
+        obj = getattr(obj, part)
+    return rows, encode_cursor([obj, last.id])
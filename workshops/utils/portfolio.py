@@ -0,0 +1,501 @@
+import io
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .progress import get_progress
+
+logger = logging.getLogger(__name__)
+
+PORTFOLIO_DIR = "portfolios"
+PORTFOLIO_VERSION = 2  # bump when the layout changes so stored PDFs are regenerated
+# Threads per web process that pick up new jobs at once; 0 leaves every job
+# to `manage.py run_portfolio_jobs` (see NOTES.md, section 12).
+INLINE_WORKERS = getattr(settings, "PORTFOLIO_INLINE_WORKERS", 2)
+# a "running" job not updated for this long belonged to a process that died
+STALE_RUNNING = timedelta(minutes=10)
+POLL_INTERVAL = 0.25
+
+_executor = ThreadPoolExecutor(max_workers=max(1, INLINE_WORKERS), thread_name_prefix="portfolio")
+_pending = set()
+_lock = threading.Lock()
+
+
+def portfolio_key(project, progress=None):
+    """
+    Storage path of the portfolio for the project's current content revision.
+    The progress timestamp is part of the key so a rebuilt ProjectProgress
+    (revision restarting) can never hit an old file.
+    """
+    progress = progress or get_progress(project)
+    stamp = int(progress.updated_at.timestamp())
+    return f"{PORTFOLIO_DIR}/project_{project.id}/r{progress.revision}-{stamp}-v{PORTFOLIO_VERSION}.pdf"
+
+
+OVERVIEW_BOXES = [
+    ("A1", "A1 — Problem"),
+    ("A2", "A2 — Context"),
+    ("B1", "B1 — Solution"),
+    ("B2", "B2 — Activities"),
+    ("C1", "C1 — Stakeholders"),
+    ("C2", "C2 — Resources"),
+    ("C3", "C3 — Dissemination"),
+    ("D2", "D2 — Impact on SDGs"),
+]
+MAX_DATA_IMAGES = 12
+
+
+def _nested_tree(rows, root, up_type, type_field):
+    """Nest flat rows (id, parent_id, ...) under root the way the D3 tree endpoints do."""
+    children = {}
+    for row in rows:
+        children.setdefault(row["parent_id"], []).append(row)
+
+    seen = set()
+
+    def build(node):
+        seen.add(node["id"])
+        causes, effects = [], []
+        for child in children.get(node["id"], []):
+            if child["id"] in seen:
+                continue
+            (effects if child[type_field] == up_type else causes).append(build(child))
+        return {"name": node["description"], "color": node["color"], "causes": causes, "effects": effects}
+
+    return build(root)
+
+
+def _problem_tree_spec(project):
+    rows = list(project.problems.values("id", "parent_id", "description", "color", "problem_type"))
+    root = next((r for r in rows if r["problem_type"] == "CORE"), None)
+    if root is None:
+        return None
+    return {"root": _nested_tree(rows, root, "EFFECT", "problem_type"), "total": len(rows)}
+
+
+def _objective_tree_spec(project):
+    rows = list(project.objectives.values("id", "parent_id", "description", "color", "objective_type"))
+    roots = [r for r in rows if r["parent_id"] is None]
+    root = next((r for r in roots if r["objective_type"] == "SITUATION"), roots[0] if roots else None)
+    if root is None:
+        return None
+    return {"root": _nested_tree(rows, root, "IMPACT", "objective_type"), "total": len(rows)}
+
+
+def _collect(project, progress):
+    """All data the portfolio needs, read up front (a fixed number of queries)."""
+    from ..views import compute_pearson_correlation, compute_scenario_scores, get_scenario_data
+    from .datasets import get_stats
+
+    scenario = get_scenario_data(project)
+    scoring, _ = compute_scenario_scores(project, scenario)
+    return {
+        "overview": project.overview or {},
+        "stakeholders": list(
+            project.stakeholders.order_by("-power", "-interest", "name")
+            .values_list("name", "interest", "power", "typology", "level")
+        ),
+        "problem_tree": _problem_tree_spec(project),
+        "objective_tree": _objective_tree_spec(project),
+        "indicators": list(
+            project.indicators.filter(accepted=True)
+            .order_by("order", "id")
+            .values_list("name", "category", "unit", "weight")
+        ),
+        "indicator_data": list(
+            project.indicator_data.exclude(data_image="").exclude(data_image__isnull=True)
+            .order_by("indicator_name")[:MAX_DATA_IMAGES]
+        ),
+        "datasets": [
+            (d, get_stats(d))
+            for d in project.datasets.select_related("indicator").order_by("indicator__order", "indicator_id")
+        ],
+        "swot": list(project.swot_items.order_by("category", "created_at", "id").values_list("category", "title")),
+        "scenario": scenario,
+        "correlation": compute_pearson_correlation(scenario),
+        "scoring": scoring,
+    }
+
+
+def _chart_jobs(data):
+    jobs = {}
+    if data["stakeholders"]:
+        jobs["stakeholders"] = ("stakeholder_matrix", {
+            "points": [[name, interest, power] for name, interest, power, _, _ in data["stakeholders"]],
+        })
+    if data["problem_tree"]:
+        jobs["problem_tree"] = ("tree", data["problem_tree"])
+    if data["objective_tree"]:
+        jobs["objective_tree"] = ("tree", data["objective_tree"])
+    weighted = sorted((i for i in data["indicators"] if i[3] is not None), key=lambda i: -i[3])
+    if weighted:
+        jobs["weights"] = ("bar_chart", {
+            "labels": [i[0] for i in weighted],
+            "values": [i[3] for i in weighted],
+            "value_format": "{:.4f}",
+        })
+    for dataset, stats in data["datasets"]:
+        if stats.get("series") and stats.get("chart"):
+            jobs[f"dataset_{dataset.pk}"] = ("line_chart", {
+                **stats["chart"],
+                "title": f"{dataset.indicator.name} — {dataset.value_column}",
+                "unit": stats.get("unit", ""),
+                "x_labels": [stats.get("first_label", ""), stats.get("last_label", "")],
+            })
+    if data["swot"]:
+        spec = {"S": [], "W": [], "O": [], "T": []}
+        for category, title in data["swot"]:
+            spec.setdefault(category, []).append(title)
+        jobs["swot"] = ("swot_grid", spec)
+    if len(data["correlation"].get("labels", [])) >= 2:
+        jobs["correlation"] = ("heatmap", data["correlation"])
+    if data["scoring"]:
+        rows = data["scoring"]["scores"]
+        jobs["scoring"] = ("bar_chart", {
+            "labels": [r["title"] for r in rows],
+            "values": [r["topsis"] for r in rows],
+            "value_format": "{:.3f}",
+        })
+    return jobs
+
+
+def render_portfolio_pdf(project, progress=None):
+    """
+    Full Workshop 1–5 portfolio: text sections, tables and server-rendered
+    charts (rendered in parallel, see portfolio_charts.render_charts),
+    assembled with reportlab platypus behind a table of contents.
+    Returns the PDF bytes.
+    """
+    from xml.sax.saxutils import escape
+
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import mm
+    from reportlab.lib.utils import ImageReader
+    from reportlab.platypus import (
+        Image, PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle,
+    )
+    from reportlab.platypus.tableofcontents import TableOfContents
+
+    from .portfolio_charts import render_charts
+
+    progress = progress or get_progress(project)
+    data = _collect(project, progress)
+    charts = render_charts(_chart_jobs(data))
+
+    styles = getSampleStyleSheet()
+    body, small = styles["BodyText"], styles["Italic"]
+    frame_w, frame_h = A4[0] - 36 * mm, A4[1] - 40 * mm
+
+    class PortfolioTemplate(SimpleDocTemplate):
+        def afterFlowable(self, flowable):
+            if isinstance(flowable, Paragraph) and flowable.style.name in ("Heading1", "Heading2"):
+                level = 0 if flowable.style.name == "Heading1" else 1
+                text = flowable.getPlainText()
+                key = f"h{id(flowable)}"
+                self.canv.bookmarkPage(key)
+                self.notify("TOCEntry", (level, text, self.page, key))
+
+    def text(value, style=body):
+        value = escape(str(value or "—")).replace("\n", "<br/>")
+        return Paragraph(value, style)
+
+    def image(png, max_height=frame_h * 0.7):
+        if not png:
+            return text("Chart not available (rendering timed out).", small)
+        w, h = ImageReader(io.BytesIO(png)).getSize()
+        scale = min(frame_w / w, max_height / h, 1.0 if w < frame_w else frame_w / w)
+        return Image(io.BytesIO(png), width=w * scale, height=h * scale)
+
+    def table(header, rows, widths=None):
+        t = Table([header] + rows, colWidths=widths, repeatRows=1)
+        t.setStyle(TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#0f172a")),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+            ("FONTSIZE", (0, 0), (-1, -1), 8),
+            ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#cbd5e1")),
+            ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor("#f1f5f9")]),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ]))
+        return t
+
+    h1, h2 = styles["Heading1"], styles["Heading2"]
+    overview = data["overview"]
+
+    toc = TableOfContents()
+    toc.levelStyles[0].fontSize = 12
+    story = [
+        Paragraph(escape(f"Project Portfolio — {project.title}"), styles["Title"]),
+        text(f"Group: {project.group_name or '—'}"),
+        text("Members: " + (", ".join(
+            f"{m.get('first', '')} {m.get('last', '')}".strip() for m in (project.members or []) if isinstance(m, dict)
+        ) or "—")),
+        text(f"Generated: {timezone.now():%Y-%m-%d %H:%M} · {progress.completed}/{progress.total} workshops completed"),
+        Spacer(1, 8 * mm),
+        Paragraph("Contents", h2),
+        toc,
+        PageBreak(),
+    ]
+
+    # Workshop 1
+    story.append(Paragraph("Workshop 1 — Idea Canvas", h1))
+    for key, label in OVERVIEW_BOXES:
+        box = overview.get(key)
+        story += [Paragraph(escape(label), styles["Heading4"]), text(box.get("text") if isinstance(box, dict) else "")]
+    sdgs = overview.get("D2_SDGS")
+    if isinstance(sdgs, dict) and sdgs.get("text"):
+        story.append(text(f"Selected SDGs: {sdgs['text']}"))
+
+    # Workshop 2
+    story += [PageBreak(), Paragraph("Workshop 2.1 — Stakeholder Analysis", h1)]
+    if data["stakeholders"]:
+        story += [image(charts.get("stakeholders")), Spacer(1, 4 * mm), table(
+            ["Stakeholder", "Interest", "Power", "Typology", "Level"],
+            [[text(name), interest, power, typology, level] for name, interest, power, typology, level in data["stakeholders"]],
+            widths=[70 * mm, 18 * mm, 18 * mm, 30 * mm, 30 * mm],
+        )]
+    else:
+        story.append(text("No stakeholders recorded."))
+
+    story.append(Paragraph("Workshop 2.2 — Problem Tree", h1))
+    story.append(image(charts.get("problem_tree")) if data["problem_tree"] else text("No core problem defined."))
+    story.append(Paragraph("Workshop 2.3 — Objective Tree", h1))
+    story.append(image(charts.get("objective_tree")) if data["objective_tree"] else text("No objectives defined."))
+
+    # Workshop 3
+    story += [PageBreak(), Paragraph("Workshop 3 — Indicators", h1)]
+    if data["indicators"]:
+        story.append(table(
+            ["Indicator", "Category", "Unit", "Weight"],
+            [[text(n), text(c), text(u), f"{w:.4f}" if w is not None else "—"] for n, c, u, w in data["indicators"]],
+            widths=[70 * mm, 55 * mm, 25 * mm, 20 * mm],
+        ))
+        if "weights" in charts:
+            story += [Paragraph("Simos weights", h2), image(charts["weights"])]
+    else:
+        story.append(text("No indicators selected."))
+
+    # Workshop 4
+    story.append(Paragraph("Workshop 4.1 — Indicator Analysis", h1))
+    if not data["indicator_data"] and not data["datasets"]:
+        story.append(text("No indicator data uploaded."))
+    for dataset, stats in data["datasets"]:
+        story.append(Paragraph(escape(f"{dataset.indicator.name} — data"), styles["Heading4"]))
+        if not stats.get("count"):
+            story.append(text(f"{dataset.source_name}: no numeric values."))
+            continue
+        fmt = "{:.4g}".format
+        rows = [
+            ["Source", text(f"{dataset.source_name} ({dataset.rows} rows, {dataset.value_column} by {dataset.index_column})")],
+            ["Values", f"n={stats['count']}, mean {fmt(stats['mean'])}, median {fmt(stats['median'])}, "
+                       f"range {fmt(stats['min'])}–{fmt(stats['max'])} {stats.get('unit', '')}"],
+        ]
+        if stats.get("series"):
+            trend = f"{stats.get('trend', '—')}, {fmt(stats['slope'])} per {stats['slope_per']}" if "slope" in stats else "—"
+            rows += [
+                ["Latest", f"{fmt(stats['last'])} ({stats['last_label']})"],
+                ["Trend", trend],
+            ]
+        elif stats.get("highest"):
+            rows.append(["Highest", ", ".join(f"{k} ({fmt(v)})" for k, v in stats["highest"])])
+        story.append(table(["Statistic", "Value"], rows, widths=[25 * mm, frame_w - 25 * mm]))
+        if f"dataset_{dataset.pk}" in charts or stats.get("series"):
+            story.append(image(charts.get(f"dataset_{dataset.pk}"), max_height=frame_h * 0.35))
+    for item in data["indicator_data"]:
+        # Prefer the EXIF-free display variant over a multi-megabyte original
+        name = item.variant("display") or item.data_image.name
+        try:
+            with default_storage.open(name, "rb") as f:
+                picture = f.read()
+        except (OSError, ValueError):
+            continue
+        story += [Paragraph(escape(item.indicator_name), styles["Heading4"]), image(picture, max_height=frame_h * 0.4)]
+
+    story += [PageBreak(), Paragraph("Workshop 4.2 — SWOT Analysis", h1)]
+    story.append(image(charts.get("swot")) if data["swot"] else text("No SWOT items recorded."))
+
+    # Workshop 5
+    scenario = data["scenario"]
+    story += [PageBreak(), Paragraph("Workshop 5 — Scenario Building", h1), text(
+        f"Actions: {len(scenario.get('actions') or [])} · Q-sorts: {len(scenario.get('qsorts') or [])}"
+        f" · Scenarios: {len(scenario.get('scenarios') or [])}"
+    )]
+    if "correlation" in charts:
+        story += [Paragraph("Participant correlation (Pearson)", h2), image(charts["correlation"])]
+    for s in scenario.get("scenarios") or []:
+        story += [Paragraph(escape(s.get("title") or "Scenario"), h2), text(s.get("description") or s.get("narrative"))]
+    if data["scoring"]:
+        rows = data["scoring"]["scores"]
+        story += [
+            Paragraph("Multi-criteria scoring", h2),
+            text(f"Recommended scenario: {rows[0]['title']}"),
+            table(
+                ["Scenario", "Weighted sum", "TOPSIS", "ELECTRE net", "Mean rank"],
+                [[text(r["title"]), r["weighted_sum"], r["topsis"], r["electre_net_flow"], r["mean_rank"]] for r in rows],
+            ),
+            image(charts.get("scoring")),
+        ]
+
+    buffer = io.BytesIO()
+    doc = PortfolioTemplate(
+        buffer, pagesize=A4, leftMargin=18 * mm, rightMargin=18 * mm, topMargin=20 * mm, bottomMargin=20 * mm,
+        title=f"Project Portfolio — {project.title}",
+    )
+
+    def page_number(canvas, doc):
+        canvas.setFont("Helvetica", 8)
+        canvas.drawRightString(A4[0] - 18 * mm, 10 * mm, f"{project.title} — page {doc.page}")
+
+    doc.multiBuild(story, onLaterPages=page_number)
+    return buffer.getvalue()
+
+
+def generate_portfolio(project_id, force=False):
+    """
+    Render and store the portfolio for the project's current revision
+    (no-op if that revision is already stored). Older revisions are removed.
+    Returns the storage key.
+    """
+    from ..models import Project
+
+    project = Project.objects.get(pk=project_id)
+    progress = get_progress(project)
+    key = portfolio_key(project, progress)
+    if not force and default_storage.exists(key):
+        return key
+
+    pdf = render_portfolio_pdf(project, progress)
+    if default_storage.exists(key):
+        default_storage.delete(key)
+    saved = default_storage.save(key, ContentFile(pdf))
+
+    folder = key.rsplit("/", 1)[0]
+    try:
+        _, files = default_storage.listdir(folder)
+    except (FileNotFoundError, NotImplementedError):
+        files = []
+    for name in files:
+        if f"{folder}/{name}" != saved:
+            default_storage.delete(f"{folder}/{name}")
+    return saved
+
+
+# -------------------------
+# Jobs
+# -------------------------
+
+def run_job(job_id):
+    """
+    Claim a queued PortfolioJob and render it. The claim is one conditional
+    UPDATE, so a job runs once even with several processes and workers.
+    Returns True if this call ran the job.
+    """
+    from ..models import PortfolioJob
+
+    try:
+        claimed = PortfolioJob.objects.filter(pk=job_id, status="queued").update(
+            status="running", attempts=F("attempts") + 1, updated_at=timezone.now()
+        )
+        if not claimed:
+            return False
+        job = PortfolioJob.objects.get(pk=job_id)
+        try:
+            generate_portfolio(job.project_id, force=job.force)
+        except ImportError:
+            _finish(job, "failed", "reportlab is not installed. Run: pip install reportlab")
+        except Exception as e:
+            logger.exception("Portfolio generation failed for project %s", job.project_id)
+            _finish(job, "failed", str(e) or e.__class__.__name__)
+        else:
+            _finish(job, "done")
+            # one row per revision: older rows of the project are history
+            PortfolioJob.objects.filter(project_id=job.project_id).exclude(pk=job.pk).exclude(
+                status__in=["queued", "running"]
+            ).delete()
+        return True
+    finally:
+        close_old_connections()
+
+
+def _finish(job, status, error=""):
+    type(job).objects.filter(pk=job.pk).update(status=status, error=error[:2000], updated_at=timezone.now())
+
+
+def _run_inline(job_id, key):
+    try:
+        run_job(job_id)
+    finally:
+        with _lock:
+            _pending.discard(key)
+
+
+def schedule_portfolio(project, force=False):
+    """
+    Record a render job for the project's current revision (one row per
+    revision; a failed one, or one whose file is gone, is queued again) and,
+    with inline workers, start it on this process's pool once the
+    transaction commits. Returns the key.
+    """
+    from ..models import PortfolioJob
+
+    key = portfolio_key(project)
+    job, created = PortfolioJob.objects.get_or_create(key=key, defaults={"project": project, "force": force})
+    if not created and (job.status == "failed" or (job.status == "done" and not default_storage.exists(key))):
+        # failed, or its file was removed since: run it again
+        PortfolioJob.objects.filter(pk=job.pk, status=job.status).update(
+            status="queued", force=force, error="", updated_at=timezone.now()
+        )
+
+    if INLINE_WORKERS:
+        def submit():
+            with _lock:
+                if key in _pending:
+                    return
+                _pending.add(key)
+            _executor.submit(_run_inline, job.pk, key)
+
+        transaction.on_commit(submit)
+    return key
+
+
+class PortfolioFailed(Exception):
+    pass
+
+
+def wait_for_portfolio(key, timeout):
+    """
+    Wait up to `timeout` seconds for the job of `key`, run by whichever
+    process or worker claimed it. True once the PDF is stored, False on
+    timeout; raises PortfolioFailed with the job's error.
+    """
+    from ..models import PortfolioJob
+
+    deadline = time.monotonic() + timeout
+    while True:
+        row = PortfolioJob.objects.filter(key=key).values_list("status", "error").first()
+        if row is not None and row[0] == "failed":
+            raise PortfolioFailed(row[1])
+        if (row is None or row[0] == "done") and default_storage.exists(key):
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(POLL_INTERVAL)
+
+
+def requeue_stale_jobs():
+    """Put "running" jobs of processes that died back in the queue. Returns how many."""
+    from ..models import PortfolioJob
+
+    return PortfolioJob.objects.filter(
+        status="running", updated_at__lt=timezone.now() - STALE_RUNNING
+    ).update(status="queued", updated_at=timezone.now())
@@ -0,0 +1,414 @@
+"""
+Server-side chart rasterization for the portfolio PDF.
+
+Every chart is a pure function of a JSON-serializable spec returning PNG bytes,
+so charts can be rendered in a process pool and cached by a hash of the spec.
+This module must not import Django models (it runs in worker processes).
+"""
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image, ImageDraw, ImageFont
+
+RENDER_VERSION = 1  # bump when the drawing code changes to invalidate the cache
+SCALE = 2  # render at 2x for print quality
+RENDER_TIMEOUT = 30  # seconds for a whole batch; unfinished charts are skipped
+RENDER_WORKERS = min(4, os.cpu_count() or 1)
+MAX_TREE_NODES = 120
+MAX_TREE_WIDTH = 2400
+MAX_HEATMAP_SIZE = 40
+MAX_BARS = 25
+MAX_LINE_POINTS = 400
+CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+QUADRANT_COLORS = {
+    "manage_closely": "#d9534f",
+    "keep_satisfied": "#f0ad4e",
+    "keep_informed": "#5bc0de",
+    "monitor": "#5cb85c",
+}
+SWOT_COLORS = {"S": "#16a34a", "W": "#dc2626", "O": "#2563eb", "T": "#d97706"}
+SWOT_TITLES = {"S": "Strengths", "W": "Weaknesses", "O": "Opportunities", "T": "Threats"}
+
+_fonts = {}
+
+
+def _font(size):
+    if size not in _fonts:
+        _fonts[size] = ImageFont.load_default(size=size * SCALE)
+    return _fonts[size]
+
+
+def _canvas(width, height):
+    image = Image.new("RGB", (width * SCALE, height * SCALE), "white")
+    return image, ImageDraw.Draw(image)
+
+
+def _png(image):
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def _s(*values):
+    """Scale logical coordinates to pixels."""
+    return [v * SCALE for v in values]
+
+
+def _truncate(text, limit):
+    text = " ".join(str(text or "").split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def _wrap(draw, text, font, width, max_lines=3):
+    words = " ".join(str(text or "").split()).split(" ")
+    lines, current = [], ""
+    for word in words:
+        candidate = f"{current} {word}".strip()
+        if draw.textlength(candidate, font=font) <= width * SCALE or not current:
+            current = candidate
+        else:
+            lines.append(current)
+            current = word
+    if current:
+        lines.append(current)
+    if len(lines) > max_lines:
+        lines = lines[:max_lines]
+        lines[-1] += "…"
+    return lines
+
+
+def _quadrant(interest, power):
+    if power >= 50:
+        return "manage_closely" if interest >= 50 else "keep_satisfied"
+    return "keep_informed" if interest >= 50 else "monitor"
+
+
+# -------------------------
+# Chart kinds
+# -------------------------
+def stakeholder_matrix(spec):
+    """spec: {"points": [[name, interest, power], ...]}"""
+    W, H, m = 760, 560, 60
+    image, draw = _canvas(W, H)
+    x0, y0, x1, y1 = m, 20, W - 20, H - m
+    xs = lambda v: x0 + (x1 - x0) * v / 100.0
+    ys = lambda v: y1 - (y1 - y0) * v / 100.0
+
+    tints = {"manage_closely": "#fdecea", "keep_satisfied": "#fef5e7", "keep_informed": "#eaf6fb", "monitor": "#eaf6ea"}
+    draw.rectangle(_s(xs(50), y0, x1, ys(50)), fill=tints["manage_closely"])
+    draw.rectangle(_s(x0, y0, xs(50), ys(50)), fill=tints["keep_satisfied"])
+    draw.rectangle(_s(xs(50), ys(50), x1, y1), fill=tints["keep_informed"])
+    draw.rectangle(_s(x0, ys(50), xs(50), y1), fill=tints["monitor"])
+    draw.rectangle(_s(x0, y0, x1, y1), outline="#334155", width=SCALE)
+    draw.line(_s(xs(50), y0, xs(50), y1), fill="#94a3b8", width=SCALE)
+    draw.line(_s(x0, ys(50), x1, ys(50)), fill="#94a3b8", width=SCALE)
+
+    label_font = _font(11)
+    for text, x, y in [
+        ("Keep satisfied", x0 + 8, y0 + 6), ("Manage closely", xs(50) + 8, y0 + 6),
+        ("Monitor", x0 + 8, ys(50) + 6), ("Keep informed", xs(50) + 8, ys(50) + 6),
+    ]:
+        draw.text(_s(x, y), text, fill="#64748b", font=label_font)
+    for v in (0, 25, 50, 75, 100):
+        draw.text(_s(xs(v) - 6, y1 + 6), str(v), fill="#475569", font=_font(9))
+        draw.text(_s(x0 - 26, ys(v) - 6), str(v), fill="#475569", font=_font(9))
+    draw.text(_s((x0 + x1) / 2 - 25, y1 + 24), "Interest", fill="#0f172a", font=_font(12))
+    draw.text(_s(8, y0 + 4), "Power", fill="#0f172a", font=_font(12))
+
+    name_font = _font(9)
+    for name, interest, power in spec["points"]:
+        cx, cy = xs(interest), ys(power)
+        draw.ellipse(_s(cx - 6, cy - 6, cx + 6, cy + 6), fill=QUADRANT_COLORS[_quadrant(interest, power)], outline="#334155")
+        draw.text(_s(cx + 8, cy - 6), _truncate(name, 24), fill="#0f172a", font=name_font)
+    return _png(image)
+
+
+def _tree_levels(root):
+    """Effects/impacts get negative levels (above the root), causes/means positive ones."""
+    levels = {0: [(root, None)]}
+    count = 1
+
+    def walk(node, parent_pos, level, direction):
+        nonlocal count
+        for child in node.get("effects" if direction < 0 else "causes", []):
+            if count >= MAX_TREE_NODES:
+                return
+            count += 1
+            levels.setdefault(level, []).append((child, parent_pos))
+            walk(child, (level, len(levels[level]) - 1), level + direction, direction)
+
+    walk(root, (0, 0), -1, -1)
+    walk(root, (0, 0), 1, 1)
+    return levels, count
+
+
+def tree(spec):
+    """spec: {"root": {name, color, causes: [...], effects: [...]}, "total": int}"""
+    levels, drawn = _tree_levels(spec["root"])
+    box_h, gap_x, gap_y = 54, 18, 40
+    widest = max(len(nodes) for nodes in levels.values())
+    # Shrink boxes on very wide levels so the image stays printable
+    box_w = max(70, min(150, (MAX_TREE_WIDTH - gap_x) / widest - gap_x))
+    W = int(max(760, widest * (box_w + gap_x) + gap_x))
+    order = sorted(levels)
+    H = len(order) * (box_h + gap_y) + gap_y + 20
+    image, draw = _canvas(W, H)
+    font = _font(9)
+
+    positions = {}
+    for row, level in enumerate(order):
+        nodes = levels[level]
+        span = len(nodes) * (box_w + gap_x) - gap_x
+        left = (W - span) / 2
+        top = gap_y / 2 + row * (box_h + gap_y)
+        for i, _ in enumerate(nodes):
+            positions[(level, i)] = (left + i * (box_w + gap_x), top)
+
+    # Edges: the lower box points up to the upper one (cause -> core -> effect)
+    for level in order:
+        for i, (_, parent) in enumerate(levels[level]):
+            if parent is None:
+                continue
+            cx, cy = positions[(level, i)]
+            px, py = positions[parent]
+            lower, upper = ((cx, cy), (px, py)) if level > 0 else ((px, py), (cx, cy))
+            sx, sy = lower[0] + box_w / 2, lower[1]
+            ex, ey = upper[0] + box_w / 2, upper[1] + box_h
+            draw.line(_s(sx, sy, ex, ey), fill="#64748b", width=SCALE)
+            draw.polygon(_s(ex, ey, ex - 4, ey + 8, ex + 4, ey + 8), fill="#64748b")
+
+    for level in order:
+        for i, (node, _) in enumerate(levels[level]):
+            x, y = positions[(level, i)]
+            fill = node.get("color") or ("#fee2e2" if level == 0 else "#dbeafe" if level > 0 else "#dcfce7")
+            try:
+                draw.rounded_rectangle(_s(x, y, x + box_w, y + box_h), radius=6 * SCALE, fill=fill, outline="#334155", width=SCALE)
+            except ValueError:
+                draw.rounded_rectangle(_s(x, y, x + box_w, y + box_h), radius=6 * SCALE, fill="#f1f5f9", outline="#334155", width=SCALE)
+            lines = _wrap(draw, node.get("name"), font, box_w - 10)
+            for k, text in enumerate(lines):
+                draw.text(_s(x + 5, y + 5 + k * 15), text, fill="#0f172a", font=font)
+
+    hidden = spec.get("total", drawn) - drawn
+    if hidden > 0:
+        draw.text(_s(10, H - 18), f"… {hidden} more node(s) not shown", fill="#64748b", font=font)
+    return _png(image)
+
+
+def swot_grid(spec):
+    """spec: {"S": [titles], "W": [...], "O": [...], "T": [...]}"""
+    W, H, pad = 760, 520, 10
+    image, draw = _canvas(W, H)
+    cell_w, cell_h = (W - 3 * pad) / 2, (H - 3 * pad) / 2
+    item_font, head_font = _font(10), _font(13)
+    for k, key in enumerate("SWOT"):
+        x = pad + (k % 2) * (cell_w + pad)
+        y = pad + (k // 2) * (cell_h + pad)
+        draw.rectangle(_s(x, y, x + cell_w, y + cell_h), outline=SWOT_COLORS[key], width=2 * SCALE)
+        draw.rectangle(_s(x, y, x + cell_w, y + 26), fill=SWOT_COLORS[key])
+        draw.text(_s(x + 8, y + 5), SWOT_TITLES[key], fill="white", font=head_font)
+        items = spec.get(key, [])
+        fits = int((cell_h - 36) // 16)
+        shown = items if len(items) <= fits else items[: fits - 1]
+        for n, title in enumerate(shown):
+            draw.text(_s(x + 8, y + 34 + n * 16), "• " + _truncate(title, 55), fill="#0f172a", font=item_font)
+        if len(shown) < len(items):
+            draw.text(_s(x + 8, y + 34 + len(shown) * 16), f"… +{len(items) - len(shown)} more", fill="#64748b", font=item_font)
+    return _png(image)
+
+
+def _diverging(value):
+    """-1 -> blue, 0 -> white, 1 -> red."""
+    v = max(-1.0, min(1.0, float(value)))
+    if v >= 0:
+        return (255, int(255 * (1 - v * 0.8)), int(255 * (1 - v * 0.8)))
+    return (int(255 * (1 + v * 0.8)), int(255 * (1 + v * 0.8)), 255)
+
+
+def heatmap(spec):
+    """spec: {"labels": [...], "matrix": [[...]]} with values in [-1, 1]"""
+    labels = spec["labels"][:MAX_HEATMAP_SIZE]
+    n = len(labels)
+    cell = max(14, min(44, 560 // max(n, 1)))
+    margin = 130
+    W, H = margin + n * cell + 20, margin + n * cell + 20
+    image, draw = _canvas(W, H)
+    label_font, value_font = _font(9), _font(8 if cell < 30 else 9)
+    for i in range(n):
+        draw.text(_s(6, margin + i * cell + cell / 2 - 6), _truncate(labels[i], 20), fill="#0f172a", font=label_font)
+        for j in range(n):
+            x, y = margin + j * cell, margin + i * cell
+            value = spec["matrix"][i][j]
+            draw.rectangle(_s(x, y, x + cell, y + cell), fill=_diverging(value), outline="#e2e8f0")
+            if cell >= 26:
+                draw.text(_s(x + 3, y + cell / 2 - 5), f"{value:.2f}", fill="#0f172a", font=value_font)
+    # Column labels rotated on a separate layer
+    header = Image.new("RGBA", (margin * SCALE, n * cell * SCALE), (255, 255, 255, 0))
+    header_draw = ImageDraw.Draw(header)
+    for j in range(n):
+        header_draw.text(_s(6, j * cell + cell / 2 - 6), _truncate(labels[j], 20), fill="#0f172a", font=label_font)
+    rotated = header.rotate(90, expand=True)
+    image.paste(rotated, (margin * SCALE, 0), rotated)
+    return _png(image)
+
+
+def bar_chart(spec):
+    """spec: {"labels": [...], "values": [...], "value_format": "{:.3f}"}"""
+    labels = spec["labels"][:MAX_BARS]
+    values = [float(v) for v in spec["values"][:MAX_BARS]]
+    row, label_w = 22, 250
+    W, H = 760, max(80, len(labels) * row + 30)
+    image, draw = _canvas(W, H)
+    font = _font(10)
+    top = max(values + [0.0]) or 1.0
+    bar_max = W - label_w - 80
+    fmt = spec.get("value_format", "{:.3f}")
+    for i, (label, value) in enumerate(zip(labels, values)):
+        y = 10 + i * row
+        draw.text(_s(6, y + 3), _truncate(label, 38), fill="#0f172a", font=font)
+        width = max(1.0, bar_max * max(value, 0.0) / top)
+        draw.rectangle(_s(label_w, y + 2, label_w + width, y + row - 4), fill="#0d6efd")
+        draw.text(_s(label_w + width + 6, y + 3), fmt.format(value), fill="#334155", font=font)
+    return _png(image)
+
+
+def line_chart(spec):
+    """spec: {"x": [numbers], "y": [numbers], "x_labels": [first, last], "title": str, "unit": str}"""
+    step = max(1, len(spec["x"]) // MAX_LINE_POINTS)
+    xs = [float(v) for v in spec["x"][::step]]
+    ys = [float(v) for v in spec["y"][::step]]
+    W, H = 760, 260
+    left, right, top, bottom = 70, 20, 30, 40
+    image, draw = _canvas(W, H)
+    font, small = _font(11), _font(9)
+    draw.text(_s(left, 8), _truncate(spec.get("title", ""), 90), fill="#0f172a", font=font)
+    draw.rectangle(_s(left, top, W - right, H - bottom), outline="#cbd5e1")
+    if not xs:
+        return _png(image)
+
+    x0, x1 = min(xs), max(xs)
+    y0, y1 = min(ys), max(ys)
+    if x1 == x0:
+        x1 = x0 + 1
+    if y1 == y0:
+        y0, y1 = y0 - 1, y1 + 1
+
+    def point(x, y):
+        return (
+            left + (x - x0) / (x1 - x0) * (W - left - right),
+            H - bottom - (y - y0) / (y1 - y0) * (H - top - bottom),
+        )
+
+    for frac in (0, 0.5, 1):
+        value = y0 + frac * (y1 - y0)
+        _, py = point(x0, value)
+        draw.line(_s(left, py, W - right, py), fill="#e2e8f0", width=SCALE)
+        draw.text(_s(6, py - 6), f"{value:.4g}", fill="#64748b", font=small)
+    points = [point(x, y) for x, y in zip(xs, ys)]
+    if len(points) > 1:
+        draw.line([c * SCALE for p in points for c in p], fill="#0d6efd", width=2 * SCALE, joint="curve")
+    for px, py in points if len(points) <= 60 else []:
+        draw.ellipse(_s(px - 2.5, py - 2.5, px + 2.5, py + 2.5), fill="#0d6efd")
+    labels = spec.get("x_labels") or [f"{x0:g}", f"{x1:g}"]
+    draw.text(_s(left, H - bottom + 6), str(labels[0]), fill="#64748b", font=small)
+    draw.text(_s(W - right - 60, H - bottom + 6), str(labels[-1]), fill="#64748b", font=small)
+    if spec.get("unit"):
+        draw.text(_s(6, top - 14), spec["unit"], fill="#64748b", font=small)
+    return _png(image)
+
+
+CHARTS = {
+    "stakeholder_matrix": stakeholder_matrix,
+    "tree": tree,
+    "swot_grid": swot_grid,
+    "heatmap": heatmap,
+    "bar_chart": bar_chart,
+    "line_chart": line_chart,
+}
+
+
+def render_chart(kind, spec):
+    return CHARTS[kind](spec)
+
+
+def chart_digest(kind, spec):
+    payload = json.dumps([RENDER_VERSION, kind, spec], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# One pool per process, started lazily. Workers are spawned, not forked:
+# render_charts runs on the portfolio threads of a multithreaded server, and
+# forking a process with running threads can deadlock the child.
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _chart_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=RENDER_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _discard_pool(pool):
+    """Terminate a pool whose workers are stuck past the timeout; the next batch starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+def render_charts(jobs, timeout=RENDER_TIMEOUT):
+    """
+    Render {name: (kind, spec)} to {name: png_bytes or None}.
+
+    Identical specs (same digest) are rendered once and reused from the cache;
+    the rest run in parallel in the module's process pool. Charts not finished
+    within `timeout` seconds come back as None so total generation time stays
+    bounded, and the pool's workers are terminated rather than left running.
+    """
+    from django.core.cache import cache
+
+    digests = {name: chart_digest(kind, spec) for name, (kind, spec) in jobs.items()}
+    cached = cache.get_many([f"chart:{d}" for d in set(digests.values())])
+    rendered = {key[len("chart:"):]: png for key, png in cached.items()}
+
+    todo = {}
+    for name, (kind, spec) in jobs.items():
+        if digests[name] not in rendered:
+            todo.setdefault(digests[name], (kind, spec))
+
+    if len(todo) == 1:
+        digest, (kind, spec) = next(iter(todo.items()))
+        rendered[digest] = render_chart(kind, spec)
+    elif todo:
+        pool = _chart_pool()
+        futures = {pool.submit(render_chart, kind, spec): digest for digest, (kind, spec) in todo.items()}
+        done, not_done = wait(futures, timeout=timeout)
+        broken = False
+        for future in done:
+            error = future.exception()
+            if error is None:
+                rendered[futures[future]] = future.result()
+            broken = broken or isinstance(error, BrokenProcessPool)
+        if not_done or broken:
+            _discard_pool(pool)
+
+    fresh = {f"chart:{d}": rendered[d] for d in todo if d in rendered}
+    if fresh:
+        cache.set_many(fresh, CACHE_TIMEOUT)
+    return {name: rendered.get(digests[name]) for name in jobs}
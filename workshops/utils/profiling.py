@@ -0,0 +1,224 @@
+import contextvars
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import numpy as np
+from django.db import close_old_connections
+from django.template.backends.django import DjangoTemplates
+from django.template.backends.django import Template as DjangoTemplate
+from django.utils import timezone
+
+logger = logging.getLogger("workshops.profiling")
+
+FLUSH_SIZE = 50
+FLUSH_INTERVAL = 10  # seconds
+RETENTION = timedelta(days=7)
+# the same statement shape this many times in one request is logged as a likely N+1
+N_PLUS_ONE_THRESHOLD = 5
+PERCENTILES = (50, 90, 95, 99)
+
+# Profile of the request being handled. Context variables are copied into
+# sync_to_async threads, so async views and their ORM calls report here too.
+_current = contextvars.ContextVar("request_profile", default=None)
+
+_buffer = []
+_last_flush = time.monotonic()
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="request-samples")
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN \((?:\s*(?:%s|\?|\d+)\s*,?)+\)", re.IGNORECASE)
+
+
+def query_shape(sql):
+    """SQL with literals and IN (...) lists collapsed, so N+1 lookups compare equal."""
+    return _IN_LIST.sub("IN (…)", _LITERALS.sub("?", sql))
+
+
+class RequestProfile:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.template_depth = 0
+        self.exact = Counter()
+        self.shapes = Counter()
+
+    def record_query(self, sql, params, ms):
+        self.queries += 1
+        self.db_ms += ms
+        try:
+            self.exact[(sql, repr(params))] += 1
+        except Exception:  # unreprable params: count the shape only
+            pass
+        self.shapes[query_shape(sql)] += 1
+
+    @property
+    def total_ms(self):
+        return (time.perf_counter() - self.start) * 1000
+
+    @property
+    def duplicate_queries(self):
+        """Queries that repeated an earlier one with identical SQL and parameters."""
+        return sum(n - 1 for n in self.exact.values() if n > 1)
+
+    def repeated_shapes(self, threshold=N_PLUS_ONE_THRESHOLD):
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+def current_profile():
+    return _current.get()
+
+
+def start_profile():
+    """Start profiling the current request; returns the token for stop_profile()."""
+    profile = RequestProfile()
+    return profile, _current.set(profile)
+
+
+def stop_profile(token):
+    _current.reset(token)
+
+
+# -------------------------
+# Instrumentation
+# -------------------------
+
+def query_wrapper(execute, sql, params, many, context):
+    """connection.execute_wrappers hook; a no-op outside profiled requests."""
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.record_query(sql, params, (time.perf_counter() - start) * 1000)
+
+
+def install_query_wrapper(connection, **kwargs):
+    """connection_created receiver. Wrappers stay on the wrapper object across reconnects."""
+    if query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_wrapper)
+
+
+class ProfiledTemplate(DjangoTemplate):
+    """
+    Backend template whose render() is added to template_ms. Includes and
+    {% extends %} render inside it, so only the outermost render of a
+    request counts (which therefore also contains queries run lazily from
+    templates).
+    """
+
+    def render(self, context=None, request=None):
+        profile = _current.get()
+        if profile is None:
+            return super().render(context, request)
+        profile.template_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            profile.template_depth -= 1
+            if profile.template_depth == 0:
+                profile.template_ms += (time.perf_counter() - start) * 1000
+
+
+class ProfilingTemplates(DjangoTemplates):
+    """DjangoTemplates returning ProfiledTemplate; settings.py uses it while REQUEST_PROFILING is on."""
+
+    def from_string(self, template_code):
+        return ProfiledTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return ProfiledTemplate(super().get_template(template_name).template, self)
+
+
+# -------------------------
+# Sample storage
+# -------------------------
+
+def _flush(batch):
+    from ..models import RequestSample
+
+    try:
+        RequestSample.objects.bulk_create([RequestSample(**fields) for fields in batch])
+        RequestSample.objects.filter(created_at__lt=timezone.now() - RETENTION).delete()
+    except Exception:
+        logger.exception("Writing %d request samples failed", len(batch))
+    finally:
+        close_old_connections()
+
+
+def record_sample(**fields):
+    """
+    Buffer one RequestSample row. Rows are written in batches on a
+    background thread, so profiled requests never wait on the insert.
+    """
+    global _last_flush
+    fields.setdefault("created_at", timezone.now())
+    with _lock:
+        _buffer.append(fields)
+        now = time.monotonic()
+        if len(_buffer) < FLUSH_SIZE and now - _last_flush < FLUSH_INTERVAL:
+            return
+        batch = _buffer[:]
+        _buffer.clear()
+        _last_flush = now
+    _executor.submit(_flush, batch)
+
+
+def flush_samples():
+    """Write out whatever is buffered and wait for it (tests, shutdown)."""
+    with _lock:
+        batch = _buffer[:]
+        _buffer.clear()
+    if batch:
+        _executor.submit(_flush, batch).result()
+
+
+# -------------------------
+# Aggregation
+# -------------------------
+
+def view_percentiles(since):
+    """
+    Per-view latency percentiles and DB/template averages for samples
+    created at or after `since`, busiest (most total time) first.
+    """
+    from ..models import RequestSample
+
+    rows = RequestSample.objects.filter(created_at__gte=since).values_list(
+        "view_name", "total_ms", "db_ms", "queries", "duplicate_queries", "template_ms", "status"
+    )
+    grouped = defaultdict(list)
+    for view_name, *values in rows.iterator(chunk_size=2000):
+        grouped[view_name].append(values)
+
+    stats = []
+    for view_name, values in grouped.items():
+        arr = np.asarray(values, dtype=float)
+        total = arr[:, 0]
+        p = np.percentile(total, PERCENTILES)
+        stats.append({
+            "view_name": view_name,
+            "count": len(arr),
+            **{f"p{q}": float(v) for q, v in zip(PERCENTILES, p)},
+            "max": float(total.max()),
+            "sum_s": float(total.sum()) / 1000,
+            "db_ms": float(arr[:, 1].mean()),
+            "db_share": float(arr[:, 1].sum() / total.sum()) if total.sum() else 0.0,
+            "queries": float(arr[:, 2].mean()),
+            "max_queries": int(arr[:, 2].max()),
+            "duplicates": float(arr[:, 3].mean()),
+            "template_ms": float(arr[:, 4].mean()),
+            "errors": int((arr[:, 5] >= 500).sum()),
+        })
+    stats.sort(key=lambda s: s["sum_s"], reverse=True)
+    return stats
@@ -0,0 +1,199 @@
+import json
+
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ..models import (
+    Indicator,
+    IndicatorData,
+    IndicatorDataset,
+    Objective,
+    Problem,
+    Project,
+    ProjectProgress,
+    Stakeholder,
+    StakeholderRelation,
+    SWOTItem,
+)
+
+# Child model -> (workshop key, count field, extra filter).
+# A count field of None means the model only bumps the revision.
+CHILD_SECTIONS = {
+    Stakeholder: ("stakeholders", "stakeholders_count", {}),
+    StakeholderRelation: ("stakeholders", None, {}),
+    Problem: ("problem_tree", "problems_count", {}),
+    Objective: ("objective_tree", "objectives_count", {}),
+    Indicator: ("indicator_selection", "indicators_count", {"accepted": True}),
+    IndicatorData: ("indicator_analysis", "indicator_data_count", {}),
+    IndicatorDataset: ("indicator_analysis", "datasets_count", {}),
+    SWOTItem: ("swot", "swot_count", {}),
+}
+
+# Workshops whose state lives in Project JSON fields, and those fields
+PROJECT_SECTION_FIELDS = {
+    "overview": ["overview"],
+    "indicator_ranking": ["indicator_ranking_order", "indicator_ranking_groups", "member_rankings", "ranking_consensus"],
+    "scenario": ["scenario_data"],
+}
+PROJECT_SECTIONS = list(PROJECT_SECTION_FIELDS)
+PROJECT_FIELDS = ["overview_done", "ranking_done", "actions_count", "qsorts_count", "scenarios_count"]
+
+
+def _project_values(project):
+    """Progress fields derived from the Project row itself (no queries)."""
+    overview = project.overview or {}
+
+    def box_text(key):
+        v = overview.get(key)
+        if isinstance(v, dict):
+            return (v.get("text") or "").strip()
+        return ""
+
+    scenario = project.scenario_data or {}
+    return {
+        # Workshop 1 is complete once A1 + B1 are filled
+        "overview_done": bool(box_text("A1")) and bool(box_text("B1")),
+        "ranking_done": bool(project.indicator_ranking_order),
+        "actions_count": len(scenario.get("actions") or []),
+        "qsorts_count": len(scenario.get("qsorts") or []),
+        "scenarios_count": len(scenario.get("scenarios") or []),
+    }
+
+
+def _fingerprint(value):
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def remember_project_json(project):
+    """Snapshot the loaded JSON fields, so a later save can tell which sections changed."""
+    deferred = project.get_deferred_fields()
+    project._json_snapshot = {
+        field: _fingerprint(project.__dict__.get(field))
+        for fields in PROJECT_SECTION_FIELDS.values()
+        for field in fields
+        if field not in deferred
+    }
+
+
+def changed_project_sections(project, update_fields=None):
+    """
+    JSON-derived sections whose fields were saved with a different value
+    than when the instance was loaded. Deferred fields are not saved and
+    count as unchanged; fields without a snapshot count as changed.
+    """
+    snapshot = getattr(project, "_json_snapshot", {})
+    deferred = project.get_deferred_fields()
+    changed = []
+    for section, fields in PROJECT_SECTION_FIELDS.items():
+        for field in fields:
+            if field in deferred or (update_fields is not None and field not in update_fields):
+                continue
+            if field not in snapshot or snapshot[field] != _fingerprint(getattr(project, field)):
+                changed.append(section)
+                break
+    return changed
+
+
+def _apply(progress, values, sections):
+    for field, value in values.items():
+        setattr(progress, field, value)
+    progress.completed = sum(progress.flags.values())
+    now = timezone.now().isoformat()
+    progress.section_updated_at = {**(progress.section_updated_at or {}), **{s: now for s in sections}}
+    progress.revision += 1
+
+
+def refresh_progress(project_id, model=None, project=None, delta=None, project_sections=None):
+    """
+    Incrementally refresh one project's progress row.
+
+    model: a child model class from CHILD_SECTIONS -> update just that section.
+    delta: with model, the row change that triggered the refresh: +1 created,
+        -1 deleted, 0 edited. The count is adjusted without a COUNT query;
+        None (bulk operations) recounts. Filtered counts (accepted
+        indicators) are always recounted.
+    project: a Project instance -> recompute the JSON-derived flags from it.
+    project_sections: which of those sections changed (their timestamps
+        move, see cohort.stale_metrics); None means all of them.
+    Does nothing if the row does not exist (e.g. during a cascade delete);
+    rows are created by rebuild_progress().
+    """
+    with transaction.atomic():
+        # counts are read under the row lock, so concurrent refreshes serialize
+        progress = ProjectProgress.objects.select_for_update().filter(pk=project_id).first()
+        if progress is None:
+            return None
+        values = {}
+        sections = []
+        if model is not None:
+            section, count_field, extra = CHILD_SECTIONS[model]
+            sections.append(section)
+            if count_field and (delta is None or extra):
+                values[count_field] = model.objects.filter(project_id=project_id, **extra).count()
+            elif count_field and delta:
+                values[count_field] = max(0, getattr(progress, count_field) + delta)
+        if project is not None:
+            sections.extend(PROJECT_SECTIONS if project_sections is None else project_sections)
+            values.update(_project_values(project))
+        _apply(progress, values, sections)
+        progress.save()
+    return progress
+
+
+def _count(model, **filters):
+    counts = (
+        model.objects.filter(project=OuterRef("pk"), **filters)
+        .order_by()
+        .values("project")
+        .annotate(c=Count("pk"))
+        .values("c")
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+def _annotate_counts(projects):
+    return projects.annotate(**{
+        count_field: _count(model, **extra)
+        for model, (_, count_field, extra) in CHILD_SECTIONS.items()
+        if count_field
+    })
+
+
+def rebuild_progress(projects):
+    """
+    Recompute progress rows for a Project queryset from scratch
+    (all counts in one annotated query) and upsert them. Returns the rows.
+    """
+    projects = list(_annotate_counts(projects))
+    existing = ProjectProgress.objects.in_bulk([p.pk for p in projects])
+    count_fields = [f for _, f, _ in CHILD_SECTIONS.values() if f]
+    all_sections = [key for key, _, _ in ProjectProgress.WORKSHOPS]
+
+    rows = []
+    for project in projects:
+        progress = existing.get(project.pk) or ProjectProgress(project=project)
+        values = {field: getattr(project, field) for field in count_fields}
+        values.update(_project_values(project))
+        _apply(progress, values, all_sections)
+        progress.updated_at = timezone.now()  # bulk upserts skip auto_now
+        rows.append(progress)
+    if not rows:
+        return rows
+
+    ProjectProgress.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["project"],
+        update_fields=count_fields + PROJECT_FIELDS + ["completed", "section_updated_at", "revision", "updated_at"],
+    )
+    return rows
+
+
+def get_progress(project):
+    """The project's progress row, built on first access."""
+    try:
+        return project.progress
+    except ProjectProgress.DoesNotExist:
+        return rebuild_progress(Project.objects.filter(pk=project.pk))[0]
@@ -0,0 +1,143 @@
+import numpy as np
+
+from .simos import simos_from_ranking
+
+DEFAULT_SAMPLES = 10000
+MAX_SAMPLES = 20000  # per request; samples x indicators floats per array
+# Samples for a whole cohort run, shared out between the rankings (at
+# least MIN_COHORT_SAMPLES each) so the request time does not grow with
+# both the cohort size and ?samples=.
+COHORT_SAMPLE_BUDGET = 200000
+MIN_COHORT_SAMPLES = 200
+
+
+def _competition_ranks(weights):
+    """
+    Rank 1 = highest weight. Ties share the best rank (1, 1, 3, ...).
+    Works on a single vector or on a (samples x indicators) matrix; one
+    sort per row, so memory stays O(samples x indicators).
+    """
+    w = np.atleast_2d(np.asarray(weights, dtype=float))
+    n = w.shape[1]
+    order = np.argsort(-w, axis=1, kind="stable")
+    ordered = np.take_along_axis(w, order, axis=1)
+    # a tie run starts where the value changes; every member gets the run's first slot
+    starts = np.ones(ordered.shape, dtype=bool)
+    starts[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    first = np.maximum.accumulate(np.where(starts, np.arange(n), 0), axis=1)
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, first + 1, axis=1)
+    return ranks if np.ndim(weights) > 1 else ranks[0]
+
+
+def simos_weight_sensitivity(order_list, groups_list=None, samples=DEFAULT_SAMPLES,
+                             swap_probability=0.3, gap_probability=0.2,
+                             z_spread=0.25, seed=None):
+    """
+    Monte-Carlo robustness check for the weights produced by simos_from_ranking.
+
+    Every sample perturbs the student's ranking by:
+      * swapping two neighbouring cards (with probability swap_probability),
+      * adding or removing one blank card between rank levels (gap_probability per gap),
+      * scaling the ratio z between the most and least important card (± z_spread).
+
+    All samples are recomputed at once as a (samples x indicators) matrix.
+    """
+    base = simos_from_ranking(order_list, groups_list)
+    rows = base["indicators"]
+    if not rows:
+        return {"samples": 0, "indicators": []}
+
+    ids = [row["id"] for row in rows]
+    positions = np.array([row["position"] for row in rows], dtype=float)
+    base_weights = np.array([row["normalized_weight"] for row in rows], dtype=float)
+    n = len(ids)
+
+    rng = np.random.default_rng(seed)
+
+    # --- 1. Gap changes: perturb the distance between consecutive rank levels ---
+    levels, level_idx = np.unique(positions, return_inverse=True)
+    increments = np.diff(levels, prepend=0.0)
+    inc = np.tile(increments, (samples, 1))
+    if len(levels) > 1:
+        half = gap_probability / 2.0
+        delta = rng.choice([-1.0, 0.0, 1.0], size=(samples, len(levels) - 1),
+                           p=[half, 1.0 - gap_probability, half])
+        inc[:, 1:] = np.maximum(inc[:, 1:] + delta, 1.0)
+    pos = np.cumsum(inc, axis=1)[:, level_idx]
+
+    # --- 2. Adjacent swaps between neighbouring cards ---
+    if n > 1:
+        by_position = np.argsort(positions, kind="stable")
+        swapped = np.nonzero(rng.random(samples) < swap_probability)[0]
+        k = rng.integers(0, n - 1, size=swapped.size)
+        a, b = by_position[k], by_position[k + 1]
+        pos_a = pos[swapped, a].copy()
+        pos[swapped, a] = pos[swapped, b]
+        pos[swapped, b] = pos_a
+
+    # --- 3. Vary z (ratio most / least important) and recompute weights ---
+    # z = max position reproduces simos_from_ranking exactly (raw weight = position).
+    p_min = pos.min(axis=1, keepdims=True)
+    p_max = pos.max(axis=1, keepdims=True)
+    factor = rng.uniform(1.0 - z_spread, 1.0 + z_spread, size=(samples, 1))
+    z = np.maximum(p_max / p_min * factor, 1.0)
+    span = np.where(p_max > p_min, p_max - p_min, 1.0)
+    raw = 1.0 + (z - 1.0) * (pos - p_min) / span
+    weights = raw / raw.sum(axis=1, keepdims=True)
+
+    # --- 4. Summaries ---
+    p05, p50, p95 = np.percentile(weights, [5, 50, 95], axis=0)
+    mean = weights.mean(axis=0)
+    std = weights.std(axis=0)
+
+    base_ranks = _competition_ranks(base_weights)
+    ranks = _competition_ranks(weights)
+    stability = (ranks == base_ranks).mean(axis=0)
+    rank_p05, rank_p95 = np.percentile(ranks, [5, 95], axis=0)
+
+    result = []
+    for i, ind_id in enumerate(ids):
+        result.append({
+            "id": ind_id,
+            "base_weight": round(float(base_weights[i]), 6),
+            "mean": round(float(mean[i]), 6),
+            "std": round(float(std[i]), 6),
+            "p05": round(float(p05[i]), 6),
+            "p50": round(float(p50[i]), 6),
+            "p95": round(float(p95[i]), 6),
+            "base_rank": int(base_ranks[i]),
+            "rank_p05": int(rank_p05[i]),
+            "rank_p95": int(rank_p95[i]),
+            "rank_stability": round(float(stability[i]), 4),
+        })
+
+    return {
+        "samples": samples,
+        "parameters": {
+            "swap_probability": swap_probability,
+            "gap_probability": gap_probability,
+            "z_spread": z_spread,
+            "seed": seed,
+        },
+        "indicators": result,
+    }
+
+
+def cohort_weight_sensitivity(jobs, sample_budget=COHORT_SAMPLE_BUDGET):
+    """
+    Run simos_weight_sensitivity for many rankings, one after the other: each
+    run is a handful of vectorized NumPy operations, so a process pool would
+    cost more in start-up and pickling than it saves.
+    jobs: iterable of (key, order, groups, options) tuples. Returns {key: result}.
+    """
+    jobs = list(jobs)
+    if not jobs:
+        return {}
+    cap = max(MIN_COHORT_SAMPLES, sample_budget // len(jobs))
+    return {
+        key: simos_weight_sensitivity(
+            order_list, groups_list, **{**options, "samples": min(options.get("samples", DEFAULT_SAMPLES), cap)}
+        )
+        for key, order_list, groups_list, options in jobs
+    }
@@ -0,0 +1,153 @@
+import csv
+import io
+from itertools import islice
+
+from ..models import Stakeholder
+
+BATCH_SIZE = 500
+MAX_ROWS = 10000
+COLUMNS = ["name", "interest", "power", "level", "typology", "resources"]
+
+
+def _choice_lookup(choices):
+    """Accept either the stored key or the display label (case-insensitive)."""
+    lookup = {}
+    for key, label in choices:
+        lookup[key.lower()] = key
+        lookup[label.lower()] = key
+    return lookup
+
+
+CHOICE_LOOKUPS = {
+    "level": _choice_lookup(Stakeholder.LEVEL_CHOICES),
+    "typology": _choice_lookup(Stakeholder.TYPOLOGY_CHOICES),
+    "resources": _choice_lookup(Stakeholder.RESOURCES_CHOICES),
+}
+
+
+def iter_table_rows(upload):
+    """
+    Yield rows (lists of cell values) from an uploaded .csv or .xlsx file
+    without loading the whole file into memory. The first row is the header.
+    """
+    name = (upload.name or "").lower()
+    if name.endswith(".xlsx"):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("openpyxl is not installed. Run: pip install openpyxl")
+        workbook = load_workbook(upload, read_only=True, data_only=True)
+        try:
+            for row in workbook.active.iter_rows(values_only=True):
+                yield list(row)
+        finally:
+            workbook.close()
+    elif name.endswith(".csv"):
+        text = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        try:
+            yield from csv.reader(text)
+        finally:
+            text.detach()
+    else:
+        raise ValueError("Unsupported file type. Upload a .csv or .xlsx file.")
+
+
+def _header_index(header):
+    index = {}
+    for pos, cell in enumerate(header):
+        key = str(cell or "").strip().lower()
+        if key in COLUMNS and key not in index:
+            index[key] = pos
+    if "name" not in index:
+        raise ValueError("Missing 'Name' column. Expected: Name, Interest, Power, Level, Typology, Resources")
+    return index
+
+
+def _build_stakeholder(project, cells, index):
+    """Validate one row. Returns (Stakeholder or None, [error messages])."""
+    def cell(col):
+        pos = index.get(col)
+        if pos is None or pos >= len(cells) or cells[pos] is None:
+            return ""
+        return str(cells[pos]).strip()
+
+    errors = []
+    values = {}
+
+    name = cell("name")
+    if not name:
+        errors.append("Name is required.")
+    elif len(name) > 150:
+        errors.append("Name is longer than 150 characters.")
+    values["name"] = name
+
+    for col in ("interest", "power"):
+        raw = cell(col)
+        if raw == "":
+            continue
+        try:
+            number = float(raw)
+        except ValueError:
+            errors.append(f"{col.title()} must be a number.")
+            continue
+        if not number.is_integer() or not 0 <= number <= 100:
+            errors.append(f"{col.title()} must be a whole number between 0 and 100.")
+            continue
+        values[col] = int(number)
+
+    for col, lookup in CHOICE_LOOKUPS.items():
+        raw = cell(col)
+        if raw == "":
+            continue
+        key = lookup.get(raw.lower())
+        if key is None:
+            errors.append(f"Unknown {col} '{raw}'.")
+            continue
+        values[col] = key
+
+    if errors:
+        return None, errors
+    return Stakeholder(project=project, **values), []
+
+
+def import_stakeholders(project, rows, max_errors=100):
+    """
+    Validate and insert stakeholder rows in batches.
+    rows: iterator of cell lists, header first.
+    Returns (created_count, errors). Callers should roll back when errors is non-empty.
+    """
+    rows = iter(rows)
+    header = next(rows, None)
+    if header is None:
+        raise ValueError("The file is empty.")
+    index = _header_index(header)
+
+    created = 0
+    errors = []
+    line = 1
+    while True:
+        chunk = list(islice(rows, BATCH_SIZE))
+        if not chunk:
+            break
+
+        batch = []
+        for cells in chunk:
+            line += 1
+            if not any(str(c or "").strip() for c in cells):
+                continue  # skip blank lines
+            obj, row_errors = _build_stakeholder(project, cells, index)
+            if row_errors:
+                errors.append({"row": line, "errors": row_errors})
+            else:
+                batch.append(obj)
+
+        if len(errors) >= max_errors:
+            break
+        if line - 1 > MAX_ROWS:
+            errors.append({"row": line, "errors": [f"Too many rows (max {MAX_ROWS})."]})
+            break
+        if not errors:
+            Stakeholder.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+            created += len(batch)
+
+    return created, errors[:max_errors]
@@ -0,0 +1,94 @@
+from django.db.models import Avg, Count, ExpressionWrapper, F, FloatField, Q, Value, Window
+from django.db.models.functions import Floor, Least, RowNumber
+
+# Mendelow power/interest grid, split at 50 on both axes.
+QUADRANTS = [
+    ("manage_closely", "Manage closely", Q(power__gte=50, interest__gte=50)),
+    ("keep_satisfied", "Keep satisfied", Q(power__gte=50, interest__lt=50)),
+    ("keep_informed", "Keep informed", Q(power__lt=50, interest__gte=50)),
+    ("monitor", "Monitor", Q(power__lt=50, interest__lt=50)),
+]
+
+MAX_MEMBERS_PER_CLUSTER = 20
+
+
+def _bucket(field, bins):
+    """Grid cell index 0..bins-1 of a 0-100 coordinate (100 falls in the last cell)."""
+    scaled = ExpressionWrapper(F(field) * Value(bins) / Value(100.0), output_field=FloatField())
+    return Least(Floor(scaled), Value(float(bins - 1)))
+
+
+def _snap(field, merge):
+    """Coordinate rounded to the nearest multiple of `merge` (halves round up)."""
+    if merge <= 0:
+        return F(field)
+    shifted = ExpressionWrapper((F(field) + Value(merge / 2)) / Value(float(merge)), output_field=FloatField())
+    return ExpressionWrapper(Floor(shifted) * Value(float(merge)), output_field=FloatField())
+
+
+def aggregate_stakeholder_matrix(queryset, bins=10, merge=0):
+    """
+    Summarize a Stakeholder queryset for the power/interest matrix.
+
+    Everything is grouped in SQL, so the cost does not grow with the number
+    of stakeholders beyond the scan itself:
+
+    * quadrant counts: one conditional aggregate,
+    * grid densities: counts per (power bin, interest bin),
+    * clusters: points within `merge` units of the same grid point, with their
+      mean coordinates, and at most MAX_MEMBERS_PER_CLUSTER names each.
+    """
+    queryset = queryset.order_by()
+    counts = queryset.aggregate(
+        total=Count("id"),
+        **{key: Count("id", filter=condition) for key, _, condition in QUADRANTS}
+    )
+    quadrants = [
+        {"key": key, "label": label, "count": counts[key]}
+        for key, label, _ in QUADRANTS
+    ]
+    if not counts["total"]:
+        return {"total": 0, "quadrants": quadrants, "grid": {"bins": bins, "counts": []}, "clusters": []}
+
+    grid = [[0] * bins for _ in range(bins)]
+    cells = (
+        queryset.annotate(row=_bucket("power", bins), col=_bucket("interest", bins))
+        .values("row", "col").annotate(n=Count("id"))
+    )
+    for cell in cells:
+        grid[int(cell["row"])][int(cell["col"])] = cell["n"]
+
+    snapped = queryset.annotate(ci=_snap("interest", merge), cp=_snap("power", merge))
+    groups = (
+        snapped.values("ci", "cp")
+        .annotate(n=Count("id"), mean_interest=Avg("interest"), mean_power=Avg("power"))
+        .order_by("ci", "cp")
+    )
+    members = {}
+    named = (
+        snapped.annotate(rank=Window(RowNumber(), partition_by=[F("ci"), F("cp")], order_by=F("id").asc()))
+        .filter(rank__lte=MAX_MEMBERS_PER_CLUSTER)
+        .order_by("id")
+        .values_list("ci", "cp", "id", "name", "typology")
+    )
+    for ci, cp, pk, name, typology in named:
+        members.setdefault((ci, cp), []).append({"id": pk, "name": name, "typology": typology})
+
+    clusters = []
+    for group in groups:
+        cluster_members = members.get((group["ci"], group["cp"]), [])
+        clusters.append({
+            # mean of the real coordinates, so merged points sit where they really are
+            "interest": round(float(group["mean_interest"]), 2),
+            "power": round(float(group["mean_power"]), 2),
+            "count": group["n"],
+            "members": cluster_members,
+            "more": group["n"] - len(cluster_members),
+        })
+
+    return {
+        "total": counts["total"],
+        "quadrants": quadrants,
+        "grid": {"bins": bins, "edges": [100 * i / bins for i in range(bins + 1)], "counts": grid},
+        "clusters": clusters,
+    }
@@ -0,0 +1,122 @@
+import gzip
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import ImproperlyConfigured
+
+# Third-party front-end libraries, pinned. `vendor_static` downloads them to
+# workshops/static/<path>. Only with settings.VENDOR_CDN_FALLBACK (on when
+# DEBUG) does {% vendor_asset %} fall back to `url` for a missing file.
+VENDOR_LIBRARIES = {
+    "bootstrap-css": {
+        "version": "5.3.3",
+        "url": "https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/css/bootstrap.min.css",
+        "path": "vendor/bootstrap/5.3.3/bootstrap.min.css",
+    },
+    "bootstrap-js": {
+        "version": "5.3.3",
+        "url": "https://cdn.jsdelivr.net/npm/bootstrap@5.3.3/dist/js/bootstrap.bundle.min.js",
+        "path": "vendor/bootstrap/5.3.3/bootstrap.bundle.min.js",
+    },
+    "d3": {
+        "version": "7.9.0",
+        "url": "https://cdn.jsdelivr.net/npm/d3@7.9.0/dist/d3.min.js",
+        "path": "vendor/d3/7.9.0/d3.min.js",
+    },
+    "sortable": {
+        "version": "1.15.2",
+        "url": "https://cdn.jsdelivr.net/npm/sortablejs@1.15.2/Sortable.min.js",
+        "path": "vendor/sortablejs/1.15.2/Sortable.min.js",
+    },
+    "html2canvas": {
+        "version": "1.4.1",
+        "url": "https://cdnjs.cloudflare.com/ajax/libs/html2canvas/1.4.1/html2canvas.min.js",
+        "path": "vendor/html2canvas/1.4.1/html2canvas.min.js",
+    },
+    "jspdf": {
+        "version": "2.5.1",
+        "url": "https://cdnjs.cloudflare.com/ajax/libs/jspdf/2.5.1/jspdf.umd.min.js",
+        "path": "vendor/jspdf/2.5.1/jspdf.umd.min.js",
+    },
+}
+
+COMPRESSIBLE = {".js", ".css", ".svg", ".json", ".txt", ".map", ".html", ".xml"}
+MIN_COMPRESS_SIZE = 256
+# <name>.<12 hex>.<ext>: names produced by ManifestStaticFilesStorage
+HASHED_NAME = re.compile(r"\.[0-9a-f]{12}\.[^./]+$")
+
+
+def missing_vendor_files(paths):
+    """VENDOR_LIBRARIES names whose file is not among `paths`."""
+    return [name for name, lib in VENDOR_LIBRARIES.items() if lib["path"] not in paths]
+
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def precompress(path):
+    """
+    Write path.gz (and path.br when the `brotli` package is installed) next
+    to a collected static file, unless they are up to date or would not be
+    smaller. Returns the encodings written.
+    """
+    written = []
+    with open(path, "rb") as f:
+        data = f.read()
+    mtime = os.path.getmtime(path)
+    brotli = _brotli()
+    encoders = [(".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encoders.append((".br", lambda d: brotli.compress(d, quality=11)))
+    for suffix, encode in encoders:
+        target = path + suffix
+        if os.path.exists(target) and os.path.getmtime(target) >= mtime:
+            continue
+        compressed = encode(data)
+        if len(compressed) >= len(data):
+            continue
+        with open(target, "wb") as f:
+            f.write(compressed)
+        written.append(suffix)
+    return written
+
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    collectstatic storage: content-hashed file names (so they can be cached
+    forever) plus pre-built .gz/.br variants of every text asset, which the
+    static middleware or nginx (gzip_static / brotli_static) serve as is.
+    """
+    # templates may still reference files that were never vendored/collected
+    manifest_strict = False
+    keep_intermediate_files = False
+    # Rewrite CSS url()/@import only: minified vendor files carry
+    # sourceMappingURL comments for .map files that are not shipped.
+    patterns = (
+        ("*.css", ManifestStaticFilesStorage.patterns[0][1][:2]),
+    )
+
+    def post_process(self, paths, dry_run=False, **options):
+        missing = missing_vendor_files(paths)
+        if missing and not settings.VENDOR_CDN_FALLBACK:
+            raise ImproperlyConfigured(
+                f"Vendored libraries missing: {', '.join(missing)}. "
+                "Run `python manage.py vendor_static` before collectstatic."
+            )
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE or not self.exists(name):
+                continue
+            path = self.path(name)
+            if os.path.getsize(path) >= MIN_COMPRESS_SIZE:
+                precompress(path)
@@ -0,0 +1,155 @@
+import hashlib
+import os
+import posixpath
+
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils.deconstruct import deconstructible
+
+HASH_CHUNK = 1024 * 1024
+ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tif", ".tiff"}
+
+
+def content_digest(content):
+    """sha256 hex digest of a Django File, read in chunks; rewinds afterwards."""
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK):
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores each file under <upload_to dir>/<aa>/<sha256><ext>, so identical
+    uploads share one file. Saving content that is already stored writes
+    nothing and returns the existing name. Lives in MEDIA_ROOT alongside
+    the default storage, so default_storage can read these names too.
+    """
+
+    def _save(self, name, content):
+        directory, filename = posixpath.split(name)
+        ext = os.path.splitext(filename)[1].lower()
+        if ext not in ALLOWED_EXTENSIONS:
+            ext = ""
+        digest = content_digest(content)
+        target = posixpath.join(directory, digest[:2], digest + ext)
+        # Under the blob lock, so a release() commit hook cannot delete the
+        # file between the exists() check and the caller's acquire(). Callers
+        # save the owning row in the same transaction to keep the lock.
+        with transaction.atomic():
+            _lock_blob(target, content.size)
+            if self.exists(target):
+                return target
+            return super()._save(target, content)
+
+
+content_storage = ContentAddressedStorage()
+
+
+def get_content_storage():
+    return content_storage
+
+
+# -------------------------
+# Reference counting
+# -------------------------
+
+def _lock_blob(name, size=0):
+    """Lock the MediaBlob row of a file, creating it with no references; call inside atomic()."""
+    from ..models import MediaBlob
+
+    blob, _ = MediaBlob.objects.select_for_update().get_or_create(name=name, defaults={"size": size})
+    return blob
+
+
+def _stored_size(name):
+    try:
+        return default_storage.size(name)
+    except OSError:
+        return 0
+
+
+def acquire(name, size=None):
+    """Count one more reference to a stored file."""
+    from ..models import MediaBlob
+
+    if not name:
+        return
+    with transaction.atomic():
+        blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+        if blob is None:
+            blob = _lock_blob(name, _stored_size(name) if size is None else size)
+        MediaBlob.objects.filter(pk=blob.pk).update(refcount=F("refcount") + 1)
+
+
+def release(name):
+    """
+    Drop one reference. When none are left, the file is deleted after the
+    transaction commits, provided it is still unreferenced at that point.
+    Files without a MediaBlob row (uploaded before content addressing) are
+    deleted when no row uses them.
+    """
+    from ..models import MediaBlob
+
+    if not name:
+        return
+    with transaction.atomic():
+        blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+        if blob is not None:
+            blob.refcount = max(0, blob.refcount - 1)
+            blob.save(update_fields=["refcount"])
+            if blob.refcount:
+                return
+        transaction.on_commit(lambda: _delete_if_unreferenced(name))
+
+
+def _delete_if_unreferenced(name):
+    """
+    Commit hook of release(). Re-checks under the blob lock: an identical
+    upload may have stored (and referenced) the same content in between.
+    """
+    from ..models import IndicatorData, MediaBlob
+
+    with transaction.atomic():
+        blob = MediaBlob.objects.select_for_update().filter(name=name).first()
+        if blob is not None and blob.refcount:
+            return
+        # refcounts can drift (e.g. queryset updates); the rows are authoritative
+        if IndicatorData.objects.filter(data_image=name).exists():
+            return
+        default_storage.delete(name)
+        if blob is not None:
+            blob.delete()
+
+
+def rebuild_refcounts():
+    """Recompute MediaBlob rows from the IndicatorData rows. Returns the number of blobs."""
+    from ..models import IndicatorData, MediaBlob
+
+    counts = (
+        IndicatorData.objects.exclude(data_image="").exclude(data_image__isnull=True)
+        .values("data_image").annotate(n=Count("id")).order_by()
+    )
+    with transaction.atomic():
+        existing = {b.name: b for b in MediaBlob.objects.all()}
+        seen = set()
+        for row in counts.iterator():
+            name = row["data_image"]
+            seen.add(name)
+            blob = existing.get(name)
+            if blob is None:
+                try:
+                    size = default_storage.size(name)
+                except OSError:
+                    size = 0
+                MediaBlob.objects.create(name=name, size=size, refcount=row["n"])
+            elif blob.refcount != row["n"]:
+                MediaBlob.objects.filter(pk=blob.pk).update(refcount=row["n"])
+        stale = [b.pk for name, b in existing.items() if name not in seen]
+        for i in range(0, len(stale), 500):
+            MediaBlob.objects.filter(pk__in=stale[i:i + 500]).delete()
+    return len(seen)
@@ -0,0 +1,47 @@
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+
+def update_project_json(project, field, mutate):
+    """
+    Read-modify-write one JSON field of `project` in a single write transaction.
+
+    The row is re-read under the lock (select_for_update on PostgreSQL; on
+    SQLite the IMMEDIATE transaction mode takes the database write lock at
+    BEGIN), so concurrent autosaves from team members apply one after the
+    other instead of overwriting each other or failing on a lock upgrade.
+    `mutate(value)` changes the freshly loaded value in place; its return
+    value is passed back, and an exception rolls everything back. The
+    progress refresh from the post_save signal commits in the same
+    transaction. `project` is updated to the saved value.
+    """
+    from ..models import Project
+
+    with transaction.atomic():
+        value = (
+            Project.objects.select_for_update()
+            .filter(pk=project.pk)
+            .values_list(field, flat=True)
+            .get()
+        )
+        result = mutate(value)
+        setattr(project, field, value)
+        project.save(update_fields=[field])
+    return result
+
+
+def _atomic_call(func, *args, **kwargs):
+    with transaction.atomic():
+        return func(*args, **kwargs)
+
+
+async def in_transaction(func, *args, **kwargs):
+    """
+    Run the sync write `func` in one transaction from an async view. The
+    async ORM has no transaction support, so multi-statement writes (and
+    the post_save progress refresh) hop to Django's sync thread once.
+    """
+    return await sync_to_async(_atomic_call)(func, *args, **kwargs)
+
+
+aupdate_project_json = sync_to_async(update_project_json)
@@ -1,18 +1,20 @@
 # workshops/views.py
 from collections import OrderedDict
 import math
-from datetime import datetime
-import csv
+from datetime import datetime, timedelta
 import json
 import re
 import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.urls import reverse
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
 from django.utils import timezone
 from django.db.models import Q
-from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse
-from django.shortcuts import render, redirect, get_object_or_404
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, HttpResponseBadRequest, HttpResponseNotModified, JsonResponse
+from django.shortcuts import aget_object_or_404, render, redirect, get_object_or_404
 from django.views.decorators.http import require_POST , require_http_methods
 from django.views.decorators.csrf import ensure_csrf_cookie
 from .forms import StakeholderForm, ProblemForm, IndicatorForm , ProjectCreateForm , ObjectiveForm
@@ -20,14 +22,41 @@ from .models import (
     Project,
     Problem,
     Stakeholder,
+    StakeholderRelation,
     Objective,
     Indicator,
     MasterIndicator,
     SWOTItem,
     QSortResult,
     IndicatorData,
+    IndicatorDataset,
+    ChunkedUpload,
+    ProjectProgress,
 )
 from .utils.simos import simos_from_ranking
+from .utils.mcda import cached_score_scenarios
+from .utils.consensus import aggregate_rankings
+from .utils.stakeholder_import import import_stakeholders, iter_table_rows
+from .utils.exports import Column, export_format, streaming_export, streaming_response
+from .utils.stakeholder_matrix import aggregate_stakeholder_matrix
+from .utils.network import cached_network_metrics
+from .utils.pagination import keyset_page
+from .utils.progress import get_progress, refresh_progress
+from .utils.portfolio import PortfolioFailed, portfolio_key, schedule_portfolio, wait_for_portfolio
+from .utils.archive import iter_course_archive
+from .utils.images import check_image, schedule_variants
+from .utils.chunked_upload import UploadError, finish_upload, start_upload, write_chunk
+from .utils.datasets import compute_stats, get_stats, project_dataset_stats, save_dataset, sparkline_points
+from .utils.writes import aupdate_project_json, in_transaction
+from .utils.fragments import catalog_version, fragment_timeout, indicator_set_version, project_fragment_context
+from .utils.cohort import METRICS as COHORT_METRICS, load_cohort_metrics, refresh_cohort_metrics
+from .utils.profiling import RETENTION as PROFILING_RETENTION, flush_samples, view_percentiles
+from .utils.sensitivity import (
+    DEFAULT_SAMPLES,
+    MAX_SAMPLES,
+    cohort_weight_sensitivity,
+    simos_weight_sensitivity,
+)
 
 def _get_project_for_user(request, project_id: int) -> Project:
     """Fetch a project with ownership enforcement for students; staff can access all."""
@@ -35,6 +64,14 @@ def _get_project_for_user(request, project_id: int) -> Project:
         return get_object_or_404(Project, id=project_id)
     return get_object_or_404(Project, id=project_id, owner=request.user)
 
+
+async def _aget_project_for_user(request, project_id: int) -> Project:
+    """Async twin of _get_project_for_user() for the async JSON endpoints."""
+    user = await request.auser()
+    if user.is_staff:
+        return await aget_object_or_404(Project, id=project_id)
+    return await aget_object_or_404(Project, id=project_id, owner=user)
+
 # -------------------------
 # Stakeholder Views
 # -------------------------
@@ -65,35 +102,70 @@ def stakeholder_list(request, project_id):
         form = StakeholderForm()
 
     stakeholders = project.stakeholders.all()
+    relations = project.stakeholder_relations.select_related("source", "target").order_by("source__name", "target__name")
 
     return render(
         request,
         "workshops/stakeholder_list.html",
-        {"project": project, "form": form, "stakeholders": stakeholders},
+        {
+            "project": project,
+            "form": form,
+            "stakeholders": stakeholders,
+            "relations": relations,
+            "relation_choices": StakeholderRelation.RELATION_CHOICES,
+        },
     )
 
+STAKEHOLDER_EXPORT_COLUMNS = [
+    Column("Name", "name"),
+    Column("Interest", "interest"),
+    Column("Power", "power"),
+    Column("Level", lambda s: s.get_level_display()),
+    Column("Typology", lambda s: s.get_typology_display()),
+    Column("Resources", lambda s: s.get_resources_display()),
+]
+
+
 @login_required
 def download_stakeholders_csv(request, project_id):
-    """Download CSV of stakeholders for the given project (owner-only)."""
+    """Download stakeholders for the given project (owner-only). ?format=csv|xlsx|ndjson"""
     project = get_object_or_404(Project, id=project_id, owner=request.user)
-    response = HttpResponse(
-        content_type="text/csv",
-        headers={"Content-Disposition": f'attachment; filename="project_{project_id}_stakeholders.csv"'},
+    rows = project.stakeholders.order_by("id").iterator()
+    return streaming_export(
+        request, rows, STAKEHOLDER_EXPORT_COLUMNS, export_format(request), f"project_{project_id}_stakeholders"
     )
-    writer = csv.writer(response)
-    writer.writerow(["Name", "Interest", "Power", "Level", "Typology", "Resources"])
-    for stakeholder in project.stakeholders.all():
-        writer.writerow(
-            [
-                stakeholder.name,
-                stakeholder.interest,
-                stakeholder.power,
-                stakeholder.get_level_display(),
-                stakeholder.get_typology_display(),
-                stakeholder.get_resources_display(),
-            ]
-        )
-    return response
+
+
+@login_required
+@require_POST
+def import_stakeholders_view(request, project_id):
+    """
+    Bulk-import stakeholders from an uploaded CSV/XLSX in the download format
+    (Name, Interest, Power, Level, Typology, Resources). All-or-nothing:
+    if any row is invalid nothing is inserted and per-row errors are returned.
+    """
+    project = get_object_or_404(Project, id=project_id, owner=request.user)
+    upload = request.FILES.get("file")
+    if not upload:
+        return JsonResponse({"status": "error", "message": "No file uploaded."}, status=400)
+
+    try:
+        with transaction.atomic():
+            created, errors = import_stakeholders(project, iter_table_rows(upload))
+            if errors:
+                transaction.set_rollback(True)
+    except Exception as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+
+    if errors:
+        return JsonResponse({
+            "status": "error",
+            "message": f"{len(errors)} row(s) have errors. Nothing was imported.",
+            "errors": errors,
+        }, status=400)
+
+    refresh_progress(project.id, model=Stakeholder)  # bulk_create sends no signals
+    return JsonResponse({"status": "ok", "created": created})
 
 
 @login_required
@@ -104,17 +176,55 @@ def stakeholder_data(request, project_id):
     return JsonResponse(stakeholders, safe=False)
 
 
+# Cohort-wide points are merged by default so the response stays a few
+# hundred clusters, not one per distinct (interest, power) pair.
+COHORT_MATRIX_MERGE = 5
+
+
+def _matrix_options(request, default_merge=0):
+    """Parse ?bins= (1-50) and ?merge= (0-25 units) for the matrix aggregation."""
+    bins = int(request.GET.get("bins", 10))
+    merge = float(request.GET.get("merge", default_merge))
+    if not (1 <= bins <= 50 and 0 <= merge <= 25):
+        raise ValueError("bins must be 1-50 and merge 0-25")
+    return bins, merge
+
+
+@login_required
+def stakeholder_matrix_data(request, project_id):
+    """Aggregated power/interest matrix (quadrants, grid, merged clusters) for one project."""
+    project = _get_project_for_user(request, project_id)
+    try:
+        bins, merge = _matrix_options(request)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+    return JsonResponse(aggregate_stakeholder_matrix(project.stakeholders.all(), bins=bins, merge=merge))
+
+
+@login_required
+def cohort_stakeholder_matrix_data(request):
+    """Staff only: the same aggregation over every project's stakeholders."""
+    if not request.user.is_staff:
+        return JsonResponse({"status": "error", "message": "Permission denied."}, status=403)
+    try:
+        bins, merge = _matrix_options(request, default_merge=COHORT_MATRIX_MERGE)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+    return JsonResponse(aggregate_stakeholder_matrix(Stakeholder.objects.all(), bins=bins, merge=merge))
+
+
 @login_required
 @require_POST
-def update_stakeholder_details(request, stakeholder_id):
+async def update_stakeholder_details(request, stakeholder_id):
     """
     AJAX endpoint to update one field for a stakeholder.
     Expects JSON: { "field": "...", "value": ... }
     """
     try:
-        stakeholder = get_object_or_404(Stakeholder, id=stakeholder_id)
+        stakeholder = await aget_object_or_404(Stakeholder.objects.select_related("project"), id=stakeholder_id)
         # Ensure user owns the project
-        if stakeholder.project.owner != request.user:
+        user = await request.auser()
+        if stakeholder.project.owner_id != user.id:
             return JsonResponse({"status": "error", "message": "Permission denied."}, status=403)
 
         data = json.loads(request.body.decode("utf-8"))
@@ -128,13 +238,74 @@ def update_stakeholder_details(request, stakeholder_id):
         else:
             return JsonResponse({"status": "error", "message": "Invalid field."}, status=400)
 
-        stakeholder.save()
+        # one write transaction for the row and its progress refresh
+        await in_transaction(stakeholder.save)
         return JsonResponse({"status": "success", "message": "Stakeholder updated."})
 
     except Exception as e:
         return JsonResponse({"status": "error", "message": str(e)}, status=400)
 
 
+@login_required
+@require_POST
+def batch_update_stakeholders(request, project_id):
+    """
+    AJAX endpoint to apply many stakeholder field changes for one project.
+    Expects JSON: { "changes": [{ "id": ..., "field": "...", "value": ... }, ...] }
+    Later changes to the same id/field win. Rows are bulk-updated in groups
+    that changed the same fields, so no row rewrites a column it didn't change.
+    """
+    try:
+        data = json.loads(request.body.decode("utf-8"))
+        changes = data.get("changes")
+        if not isinstance(changes, list) or not changes:
+            return JsonResponse({"status": "error", "message": "No changes."}, status=400)
+
+        ids = {int(c["id"]) for c in changes}
+        # Ownership is enforced in the same (joined) query that loads the rows
+        stakeholders = Stakeholder.objects.filter(
+            id__in=ids, project_id=project_id, project__owner=request.user
+        ).in_bulk()
+        if len(stakeholders) != len(ids):
+            return JsonResponse({"status": "error", "message": "Permission denied."}, status=403)
+
+        choices = {
+            "level": dict(Stakeholder.LEVEL_CHOICES),
+            "typology": dict(Stakeholder.TYPOLOGY_CHOICES),
+            "resources": dict(Stakeholder.RESOURCES_CHOICES),
+        }
+        touched = {}  # stakeholder id -> fields changed
+        for change in changes:
+            field = change.get("field")
+            value = change.get("value")
+            stakeholder = stakeholders[int(change["id"])]
+
+            if field in choices:
+                if value not in choices[field]:
+                    return JsonResponse({"status": "error", "message": f"Invalid {field}."}, status=400)
+                setattr(stakeholder, field, value)
+            elif field in ["interest", "power"]:
+                value = int(value)
+                if not 0 <= value <= 100:
+                    return JsonResponse({"status": "error", "message": f"Invalid {field}."}, status=400)
+                setattr(stakeholder, field, value)
+            else:
+                return JsonResponse({"status": "error", "message": "Invalid field."}, status=400)
+            touched.setdefault(stakeholder.id, set()).add(field)
+
+        groups = {}
+        for stakeholder_id, fields in touched.items():
+            groups.setdefault(tuple(sorted(fields)), []).append(stakeholders[stakeholder_id])
+        with transaction.atomic():
+            for fields, rows in groups.items():
+                Stakeholder.objects.bulk_update(rows, fields)
+            refresh_progress(project_id, model=Stakeholder)  # bulk_update sends no signals
+        return JsonResponse({"status": "success", "updated": len(stakeholders)})
+
+    except (KeyError, TypeError, ValueError) as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+
+
 @login_required
 @require_POST
 def delete_stakeholder(request, stakeholder_id):
@@ -147,6 +318,64 @@ def delete_stakeholder(request, stakeholder_id):
     return redirect("stakeholder_list", project_id=project_id)
 
 
+@login_required
+@require_POST
+def save_stakeholder_relation(request, project_id):
+    """
+    AJAX endpoint to add (or re-weight) a relationship between two stakeholders.
+    Expects JSON: { "source": id, "target": id, "relation_type": "INFLUENCE|ALLIANCE|CONFLICT", "weight": 0-10 }
+    """
+    project = get_object_or_404(Project, id=project_id, owner=request.user)
+    try:
+        data = json.loads(request.body.decode("utf-8"))
+        source_id = int(data["source"])
+        target_id = int(data["target"])
+        relation_type = data.get("relation_type", "INFLUENCE")
+        weight = float(data.get("weight", 1.0))
+    except (KeyError, TypeError, ValueError) as e:
+        return JsonResponse({"status": "error", "message": f"Invalid data: {e}"}, status=400)
+
+    if source_id == target_id:
+        return JsonResponse({"status": "error", "message": "A stakeholder cannot relate to itself."}, status=400)
+    if relation_type not in dict(StakeholderRelation.RELATION_CHOICES):
+        return JsonResponse({"status": "error", "message": "Invalid relation type."}, status=400)
+    if not 0 <= weight <= 10:
+        return JsonResponse({"status": "error", "message": "Weight must be between 0 and 10."}, status=400)
+    if project.stakeholders.filter(id__in=[source_id, target_id]).count() != 2:
+        return JsonResponse({"status": "error", "message": "Permission denied."}, status=403)
+
+    relation, created = StakeholderRelation.objects.update_or_create(
+        source_id=source_id,
+        target_id=target_id,
+        relation_type=relation_type,
+        defaults={"project": project, "weight": weight},
+    )
+    return JsonResponse({"status": "ok", "id": relation.id, "created": created})
+
+
+@login_required
+@require_POST
+def delete_stakeholder_relation(request, relation_id):
+    """Delete a stakeholder relationship (owner-only)."""
+    relation = get_object_or_404(StakeholderRelation, id=relation_id, project__owner=request.user)
+    relation.delete()
+    return JsonResponse({"status": "ok"})
+
+
+@login_required
+def stakeholder_network_data(request, project_id):
+    """
+    Centrality metrics (degree, eigenvector, PageRank, betweenness) and communities
+    for the project's stakeholder network. Cached per network revision.
+    """
+    project = _get_project_for_user(request, project_id)
+    node_ids = list(project.stakeholders.order_by("id").values_list("id", flat=True))
+    edges = list(
+        project.stakeholder_relations.values_list("source_id", "target_id", "relation_type", "weight")
+    )
+    return JsonResponse(cached_network_metrics(project.id, node_ids, edges))
+
+
 # -------------------------
 # Problem Tree Views
 # -------------------------
@@ -209,49 +438,52 @@ def update_problem_color(request, problem_id):
         return JsonResponse({"status": "ok"})
     except Exception as e:
         return JsonResponse({"status": "error", "message": str(e)}, status=400)
+def _tree_json(nodes, root, type_field, effect_type):
+    """
+    Nest tree nodes (dicts with id, parent_id, description, color and
+    type_field) under `root` for D3: children of type `effect_type` go to
+    "effects", all others to "causes". Nodes keep their query order.
+    """
+    children = {}
+    for node in nodes:
+        children.setdefault(node["parent_id"], []).append(node)
+
+    def build(node, seen):
+        out = {
+            "name": node["description"],
+            "id": node["id"],
+            "type": node[type_field],
+            "color": node["color"],
+            "causes": [],
+            "effects": [],
+        }
+        for child in children.get(node["id"], []):
+            if child["id"] in seen:  # guard against cycles in hand-edited data
+                continue
+            branch = "effects" if child[type_field] == effect_type else "causes"
+            out[branch].append(build(child, seen | {child["id"]}))
+        return out
+
+    return build(root, {root["id"]})
+
+
 @login_required
-def problem_tree_data(request, project_id):
+async def problem_tree_data(request, project_id):
     """
     API: return hierarchical problem tree JSON for D3.
+    One query for all nodes; the tree is assembled in memory.
     """
-    project = _get_project_for_user(request, project_id)
-    all_problems = Problem.objects.filter(project=project)
+    project = await _aget_project_for_user(request, project_id)
+    nodes = [
+        node async for node in Problem.objects.filter(project=project)
+        .order_by("id").values("id", "parent_id", "description", "problem_type", "color")
+    ]
 
-    core_problem = all_problems.filter(problem_type="CORE").first()
+    core_problem = next((n for n in nodes if n["problem_type"] == "CORE"), None)
     if not core_problem:
         return JsonResponse({"name": "No Core Problem Defined", "no_core_problem": True})
 
-    def get_children(parent_node):
-        children_data = {"causes": [], "effects": []}
-        child_problems = all_problems.filter(parent=parent_node)
-        for child in child_problems:
-            grand_children = get_children(child)
-            node_data = {
-                "name": child.description,
-                "id": child.id,
-                "type": child.problem_type,
-                "color": child.color,
-                "causes": grand_children["causes"],
-                "effects": grand_children["effects"],
-            }
-            if child.problem_type == "EFFECT":
-                children_data["effects"].append(node_data)
-            else:
-                children_data["causes"].append(node_data)
-        return children_data
-
-    core_children = get_children(core_problem)
-
-    tree_data = {
-        "name": core_problem.description,
-        "id": core_problem.id,
-        "type": core_problem.problem_type,
-        "color": core_problem.color,
-        "causes": core_children["causes"],
-        "effects": core_children["effects"],
-    }
-
-    return JsonResponse(tree_data)
+    return JsonResponse(_tree_json(nodes, core_problem, "problem_type", "EFFECT"))
 
 
 # -------------------------
@@ -289,49 +521,22 @@ def objective_tree_view(request, project_id):
 
 
 @login_required
-def objective_tree_data(request, project_id):
-    project = _get_project_for_user(request, project_id)
-    all_objs = Objective.objects.filter(project=project)
+async def objective_tree_data(request, project_id):
+    project = await _aget_project_for_user(request, project_id)
+    nodes = [
+        node async for node in Objective.objects.filter(project=project)
+        .order_by("id").values("id", "parent_id", "description", "objective_type", "color")
+    ]
 
     root = (
-            all_objs.filter(objective_type="SITUATION", parent__isnull=True).first()
-            or all_objs.filter(parent__isnull=True).first()
+            next((n for n in nodes if n["objective_type"] == "SITUATION" and n["parent_id"] is None), None)
+            or next((n for n in nodes if n["parent_id"] is None), None)
     )
 
     if not root:
         return JsonResponse({"name": "No Overall Objective Defined", "no_root": True})
 
-    def get_children(parent_node):
-        children_data = {"causes": [], "effects": []}
-        child_objs = all_objs.filter(parent=parent_node)
-        for child in child_objs:
-            grand_children = get_children(child)
-            node_data = {
-                "name": child.description,
-                "id": child.id,
-                "type": child.objective_type,
-                "color": child.color,
-                "causes": grand_children["causes"],
-                "effects": grand_children["effects"],
-            }
-            if child.objective_type == "IMPACT":
-                children_data["effects"].append(node_data)
-            else:
-                children_data["causes"].append(node_data)
-        return children_data
-
-    root_children = get_children(root)
-
-    tree_data = {
-        "name": root.description,
-        "id": root.id,
-        "type": root.objective_type,
-        "color": root.color,
-        "causes": root_children["causes"],
-        "effects": root_children["effects"],
-    }
-
-    return JsonResponse(tree_data)
+    return JsonResponse(_tree_json(nodes, root, "objective_type", "IMPACT"))
 
 
 @login_required
@@ -378,32 +583,13 @@ def update_objective_color(request, objective_id):
 def workshop_list_view(request, project_id):
     project = _get_project_for_user(request, project_id)
 
-    overview = project.overview or {}
-
-    def box_text(key: str) -> str:
-      v = overview.get(key)
-      if isinstance(v, dict):
-          return (v.get("text") or "").strip()
-      return ""
-
-    # ✅ Define what "Workshop 1 complete" means
-    # (You can tighten this rule later; for now A1+B1 is a good minimum)
-    overview_done = bool(box_text("A1")) and bool(box_text("B1"))
-
-    ws_flags = {
-        "overview": overview_done,
-        "stakeholders": project.stakeholders.exists(),
-        "problem_tree": project.problems.exists(),
-        "objective_tree": project.objectives.exists(),
-        "indicator_selection": project.indicators.filter(accepted=True).exists(),
-        "indicator_ranking": bool(getattr(project, "indicator_ranking_order", None)),
-        "swot": project.swot_items.exists(),
-        "scenario": bool((project.scenario_data or {}).get("qsorts")) or bool((project.scenario_data or {}).get("scenarios")),
-    }
+    # Completion rules live in ProjectProgress.WORKSHOPS (shared with the dashboard)
+    context = project_fragment_context(project, request.user)
 
     return render(request, "workshops/workshop_list.html", {
         "project": project,
-        "ws_flags": ws_flags,
+        "ws_flags": context["progress"].flags,
+        **context,
     })
 # -------------------------
 # Indicator Selection & SRF
@@ -430,6 +616,7 @@ def indicator_selection_view(request, project_id):
             )
         if to_create:
             Indicator.objects.bulk_create(to_create)
+            refresh_progress(project.id, model=Indicator)
 
     # Add custom indicator
     if request.method == "POST" and "add_indicator" in request.POST:
@@ -443,11 +630,49 @@ def indicator_selection_view(request, project_id):
     else:
         form = IndicatorForm()
 
-    indicators_qs = project.indicators.all().order_by("category", "name")
+    # The accordion markup is cached; accepted flags are patched in from
+    # indicator_state by the page script. Projects that only hold unedited
+    # catalog clones share one fragment per catalog version, keyed by
+    # master id; any other project gets its own, keyed by what it shows.
+    set_version, shared = indicator_set_version(project)
+    if not shared:
+        hierarchy_key = f"project.{project.id}.{set_version}"
+        rows = lambda: project.indicators.all().order_by("category", "name")
+        key_of = lambda ind: f"i{ind.id}"
+    else:
+        hierarchy_key = f"catalog.{catalog_version()}"
+        rows = lambda: MasterIndicator.objects.order_by("category", "name")
+        key_of = lambda ind: f"m{ind.id}"
+
+    indicator_state = {}
+    for ind_id, master_id, accepted in project.indicators.values_list("id", "master_indicator_id", "accepted"):
+        indicator_state[f"i{ind_id}"] = [ind_id, accepted]
+        if master_id:
+            indicator_state[f"m{master_id}"] = [ind_id, accepted]
+
+    return render(
+        request,
+        "workshops/indicator_selection.html",
+        {
+            "project": project,
+            "form": form,
+            # only built when the fragment is not cached
+            "hierarchy": lambda: _indicator_hierarchy(rows(), key_of),
+            "hierarchy_key": hierarchy_key,
+            "indicator_state": indicator_state,
+            "fragment_timeout": fragment_timeout(),
+        },
+    )
+
+
+def _indicator_hierarchy(indicators, key_of):
+    """Group indicators (ordered by category, name) as main -> sub -> rows by category token and name prefix."""
+    indicators = list(indicators)
 
     # Build categories and hierarchy (main -> sub -> indicators)
     categories = []
-    for c in indicators_qs.values_list("category", flat=True).distinct():
+    for ind in indicators:
+        c = ind.category
         if c and c not in categories:
             categories.append(c)
 
@@ -486,7 +711,8 @@ def indicator_selection_view(request, project_id):
             hierarchy[parent_token] = {"full": parent_token, "subs": OrderedDict()}
         hierarchy[parent_token]["subs"][sub_token] = {"full": sub_full, "indicators": []}
 
-    for ind in indicators_qs:
+    for ind in indicators:
+        ind.key = key_of(ind)
         name = (ind.name or "").strip()
         matched = False
         for main_token, main_dict in hierarchy.items():
@@ -507,16 +733,7 @@ def indicator_selection_view(request, project_id):
                     parent["subs"][fallback_key] = {"full": "Uncategorized", "indicators": []}
                 parent["subs"][fallback_key]["indicators"].append(ind)
 
-    return render(
-        request,
-        "workshops/indicator_selection.html",
-        {
-            "project": project,
-            "form": form,
-            "hierarchy": hierarchy,
-            "indicator_count": indicators_qs.count(),
-        },
-    )
+    return hierarchy
 
 
 @login_required
@@ -534,11 +751,27 @@ def toggle_indicator_accept(request, indicator_id):
         return JsonResponse({"status": "error", "message": str(e)}, status=400)
 
 
+def _member_choices(project):
+    """(key, label) for each team member in project.members."""
+    choices = []
+    for idx, m in enumerate(project.members or []):
+        if not isinstance(m, dict):
+            continue
+        key = str(m.get("number") or m.get("email") or f"member-{idx + 1}")
+        label = f"{m.get('first', '')} {m.get('last', '')}".strip() or key
+        choices.append((key, label))
+    return choices
+
+
 @login_required
 def ranking_page_view(request, project_id):
     project = get_object_or_404(Project, id=project_id, owner=request.user)
     indicators = project.indicators.filter(accepted=True).order_by("order", "id")[:15]
-    return render(request, "workshops/indicator_ranking.html", {"project": project, "indicators": indicators})
+    return render(request, "workshops/indicator_ranking.html", {
+        "project": project,
+        "indicators": indicators,
+        "members": _member_choices(project),
+    })
 
 
 @login_required
@@ -575,6 +808,7 @@ def indicator_ranking_view(request, project_id):
         with transaction.atomic():
             for ind_id_str, weight in weights.items():
                 Indicator.objects.filter(project=project, id=int(ind_id_str)).update(weight=weight)
+            refresh_progress(project.id, model=Indicator)
 
         return JsonResponse({"status": "success", "weights": weights})
 
@@ -582,26 +816,75 @@ def indicator_ranking_view(request, project_id):
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
 
+INDICATOR_EXPORT_COLUMNS = [
+    Column("Order", lambda i: i.order if i.order else ""),
+    Column("Indicator", "name"),
+    Column("Description", lambda i: i.description or ""),
+    Column("WhiteCardsAfter", "white_cards_after"),
+    Column("Weight", lambda i: "{:.6f}".format(i.weight) if i.weight is not None else ""),
+]
+
+
 @login_required
 def download_indicators_csv(request, project_id):
+    """Download accepted indicators (owner-only). ?format=csv|xlsx|ndjson"""
     project = get_object_or_404(Project, id=project_id, owner=request.user)
-    indicators = project.indicators.filter(accepted=True).order_by("order")
-    response = HttpResponse(
-        content_type="text/csv",
-        headers={"Content-Disposition": f'attachment; filename="project_{project_id}_indicators.csv"'},
+    rows = project.indicators.filter(accepted=True).order_by("order").iterator()
+    return streaming_export(
+        request, rows, INDICATOR_EXPORT_COLUMNS, export_format(request), f"project_{project_id}_indicators"
     )
-    writer = csv.writer(response)
-    writer.writerow(["Order", "Indicator", "Description", "WhiteCardsAfter", "Weight"])
-    for ind in indicators:
-        writer.writerow(
-            [
-                ind.order if ind.order else "",
-                ind.name,
-                ind.description or "",
-                ind.white_cards_after,
-                "{:.6f}".format(ind.weight) if ind.weight is not None else "",
-            ]
-        )
+
+
+STAFF_EXPORTS = {
+    "stakeholders": (
+        lambda: Stakeholder.objects.select_related("project").order_by("project_id", "id"),
+        [Column("Project ID", "project_id"), Column("Project", lambda s: s.project.title)] + STAKEHOLDER_EXPORT_COLUMNS,
+    ),
+    "indicators": (
+        lambda: Indicator.objects.filter(accepted=True).select_related("project").order_by("project_id", "order"),
+        [Column("Project ID", "project_id"), Column("Project", lambda i: i.project.title)] + INDICATOR_EXPORT_COLUMNS,
+    ),
+}
+
+
+@login_required
+def staff_export_view(request, table):
+    """Staff-only export of one table across every project. ?format=csv|xlsx|ndjson"""
+    if not request.user.is_staff:
+        return HttpResponse("Permission denied.", status=403)
+    if table not in STAFF_EXPORTS:
+        return HttpResponseBadRequest("Unknown table")
+
+    queryset, columns = STAFF_EXPORTS[table]
+    return streaming_export(
+        request, queryset().iterator(chunk_size=2000), columns, export_format(request), f"all_projects_{table}"
+    )
+
+
+@login_required
+def course_archive_view(request):
+    """
+    Staff-only ZIP of every project (JSON snapshots, CSV tables, uploaded images,
+    optionally portfolio PDFs), streamed while it is built.
+    ?start_id=&end_id= limit/resume by project id, ?pdf=1 includes portfolios.
+    """
+    if not request.user.is_staff:
+        return HttpResponse("Permission denied.", status=403)
+    try:
+        start_id = int(request.GET["start_id"]) if request.GET.get("start_id") else None
+        end_id = int(request.GET["end_id"]) if request.GET.get("end_id") else None
+    except ValueError:
+        return HttpResponseBadRequest("start_id and end_id must be integers")
+    include_pdf = request.GET.get("pdf") == "1"
+
+    response = streaming_response(
+        request, iter_course_archive(start_id, end_id, include_pdf), content_type="application/zip"
+    )
+    suffix = f"_{start_id or 'first'}-{end_id or 'last'}" if start_id or end_id else ""
+    response["Content-Disposition"] = (
+        f'attachment; filename="course_archive_{timezone.now():%Y%m%d}{suffix}.zip"'
+    )
+    response["X-Accel-Buffering"] = "no"  # don't let nginx hold the stream back
     return response
 
 
@@ -615,6 +898,7 @@ def save_indicator_selections(request, project_id):
     Indicator.objects.filter(project=project).update(accepted=False)
     if selected_ids:
         Indicator.objects.filter(project=project, id__in=selected_ids).update(accepted=True)
+    refresh_progress(project.id, model=Indicator)  # queryset .update() sends no signals
     return JsonResponse({"status": "success", "count": len(selected_ids)})
 
 
@@ -647,6 +931,46 @@ def save_indicator_ranking(request, project_id):
             "message": str(e)
         }, status=400)
 
+@login_required
+@require_POST
+def save_member_ranking(request, project_id):
+    """
+    Save one team member's SRF ranking and refresh the group consensus.
+    Expects JSON: { "member": key, "order": [...], "groups": [...] }
+    """
+    project = _get_project_for_user(request, project_id)
+
+    try:
+        data = json.loads(request.body.decode("utf-8"))
+        member = str(data.get("member") or "")
+        labels = dict(_member_choices(project))
+        if member not in labels:
+            return JsonResponse({"status": "error", "message": "Unknown member"}, status=400)
+
+        rankings = dict(project.member_rankings or {})
+        rankings[member] = {
+            "label": labels[member],
+            "order": data.get("order", []),
+            "groups": data.get("groups", []),
+            "updated_at": timezone.now().isoformat(),
+        }
+
+        project.member_rankings = rankings
+        project.ranking_consensus = aggregate_rankings(
+            [{"key": k, **v} for k, v in rankings.items()]
+        )
+        project.save(update_fields=["member_rankings", "ranking_consensus"])
+
+        return JsonResponse({
+            "status": "success",
+            "members_ranked": len(rankings),
+            "kendall_w": project.ranking_consensus.get("kendall_w"),
+        })
+
+    except Exception as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+
+
 @login_required
 def simos_manual_page(request, project_id):
     project = _get_project_for_user(request, project_id)
@@ -677,12 +1001,106 @@ def simos_manual_page(request, project_id):
             "normalized": round(row["normalized_weight"], 4)
         })
 
+    # Group consensus (only meaningful with 2+ members)
+    consensus = project.ranking_consensus or {}
+    group = None
+    if len(consensus.get("members", [])) >= 2:
+        group = {
+            "members": consensus["members"],
+            "kendall_w": consensus.get("kendall_w"),
+            "rows": [
+                {
+                    "name": indicators_map.get(str(ind_id), f"Indicator {ind_id}"),
+                    "weight": consensus["weights"].get(ind_id, 0.0),
+                    "mean_rank": consensus["mean_rank"].get(ind_id),
+                    "disagreement": consensus["disagreement"].get(ind_id),
+                }
+                for ind_id in consensus.get("kemeny_order", [])
+            ],
+            "tau": [
+                {"label": member["label"], "values": row}
+                for member, row in zip(consensus["members"], consensus.get("kendall_tau", []))
+            ],
+        }
+
     return render(request, "workshops/simos_manual.html", {
         "project": project,
         "indicators": indicators,
-        "total": simos["total_raw"]
+        "total": simos["total_raw"],
+        "group": group,
     })
 
+def _sensitivity_options(request):
+    """Parse Monte-Carlo parameters from the query string (raises ValueError)."""
+    samples = int(request.GET.get("samples", DEFAULT_SAMPLES))
+    swap_p = float(request.GET.get("swap_probability", 0.3))
+    gap_p = float(request.GET.get("gap_probability", 0.2))
+    z_spread = float(request.GET.get("z_spread", 0.25))
+    seed = request.GET.get("seed")
+
+    if not 1 <= samples <= MAX_SAMPLES:
+        raise ValueError(f"samples must be between 1 and {MAX_SAMPLES}")
+    if not (0.0 <= swap_p <= 1.0 and 0.0 <= gap_p <= 1.0 and 0.0 <= z_spread < 1.0):
+        raise ValueError("probabilities must be in [0, 1] and z_spread in [0, 1)")
+
+    return {
+        "samples": samples,
+        "swap_probability": swap_p,
+        "gap_probability": gap_p,
+        "z_spread": z_spread,
+        "seed": int(seed) if seed not in (None, "") else None,
+    }
+
+
+@login_required
+def ranking_sensitivity_view(request, project_id):
+    """
+    API: Monte-Carlo robustness of the Simos weights for one project.
+    Returns per-indicator weight intervals and rank-stability probabilities.
+    """
+    project = _get_project_for_user(request, project_id)
+    try:
+        options = _sensitivity_options(request)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+
+    result = simos_weight_sensitivity(
+        project.indicator_ranking_order, project.indicator_ranking_groups, **options
+    )
+
+    names = {str(k): v for k, v in project.indicators.values_list("id", "name")}
+    for row in result["indicators"]:
+        row["name"] = names.get(row["id"], f"Indicator {row['id']}")
+
+    return JsonResponse({"status": "ok", **result})
+
+
+@login_required
+def cohort_ranking_sensitivity_view(request):
+    """
+    API (staff only): run the sensitivity analysis for every ranked project.
+    ?samples= is capped so all projects share COHORT_SAMPLE_BUDGET; each
+    result reports the samples it used. Returns results keyed by project id.
+    """
+    if not request.user.is_staff:
+        return JsonResponse({"status": "error", "message": "Permission denied."}, status=403)
+    try:
+        options = _sensitivity_options(request)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+
+    projects = Project.objects.values_list(
+        "id", "indicator_ranking_order", "indicator_ranking_groups"
+    ).order_by("id")
+    jobs = [
+        (pid, order, groups, options)
+        for pid, order, groups in projects.iterator()
+        if order
+    ]
+    results = cohort_weight_sensitivity(jobs)
+
+    return JsonResponse({"status": "ok", "projects": {str(k): v for k, v in results.items()}})
+
 # -------------------------
 # SWOT Views
 # -------------------------
@@ -699,88 +1117,182 @@ def swot_analysis_view(request, project_id):
 
 @login_required
 @require_POST
-def save_swot_entry(request, project_id):
+async def save_swot_entry(request, project_id):
     """
     AJAX CRUD for SWOT items.
     Expects JSON: { action: "add"|"edit"|"delete"|"reorder", ... }
     """
-    project = get_object_or_404(Project, id=project_id, owner=request.user)
+    project = await aget_object_or_404(Project, id=project_id, owner=await request.auser())
     try:
         data = json.loads(request.body.decode("utf-8"))
-        action = data.get("action")
-
-        if action == "add":
-            item = SWOTItem.objects.create(
-                project=project,
-                category=data.get("category"),
-                title=data.get("title", ""),
-                description=data.get("description", ""),
-            )
-            return JsonResponse({"status": "ok", "id": item.id})
+        # Each action (plus its progress refresh) is one write transaction
+        return await in_transaction(_apply_swot_action, project, data)
+    except Exception as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
-        elif action == "edit":
-            item = get_object_or_404(SWOTItem, id=data.get("id"), project=project)
-            item.title = data.get("title", "")
-            item.description = data.get("description", "")
-            item.save()
-            return JsonResponse({"status": "ok"})
 
-        elif action == "delete":
-            item = get_object_or_404(SWOTItem, id=data.get("id"), project=project)
-            item.delete()
-            return JsonResponse({"status": "ok"})
+def _apply_swot_action(project, data):
+    action = data.get("action")
 
-        elif action == "reorder":
-            order = data.get("order", [])
-            for position, item_id in enumerate(order, start=1):
-                SWOTItem.objects.filter(id=item_id, project=project).update(order=position)
-            return JsonResponse({"status": "ok"})
+    if action == "add":
+        item = SWOTItem.objects.create(
+            project=project,
+            category=data.get("category"),
+            title=data.get("title", ""),
+            description=data.get("description", ""),
+        )
+        return JsonResponse({"status": "ok", "id": item.id})
 
-        else:
-            return JsonResponse({"status": "error", "message": "Unknown action"}, status=400)
+    elif action == "edit":
+        item = get_object_or_404(SWOTItem, id=data.get("id"), project=project)
+        item.title = data.get("title", "")
+        item.description = data.get("description", "")
+        item.save()
+        return JsonResponse({"status": "ok"})
+
+    elif action == "delete":
+        item = get_object_or_404(SWOTItem, id=data.get("id"), project=project)
+        item.delete()
+        return JsonResponse({"status": "ok"})
+
+    elif action == "reorder":
+        order = data.get("order", [])
+        for position, item_id in enumerate(order, start=1):
+            SWOTItem.objects.filter(id=item_id, project=project).update(order=position)
+        refresh_progress(project.id, model=SWOTItem)
+        return JsonResponse({"status": "ok"})
+
+    else:
+        return JsonResponse({"status": "error", "message": "Unknown action"}, status=400)
+
+
+DASHBOARD_PAGE_SIZE = 24
+DASHBOARD_SORTS = {
+    "title": ("title", "Title (A–Z)"),
+    "newest": ("-created_at", "Newest first"),
+    "oldest": ("created_at", "Oldest first"),
+    "owner": ("owner__username", "Owner"),
+}
 
-    except Exception as e:
-        return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
 @login_required
 def dashboard_view(request):
     """
     Student landing page after login.
     Shows one-card per project owned by user (staff sees all).
-    Also shows progress heuristic for each project.
+    Progress comes from the joined ProjectProgress row (one SQL statement per page).
+
+    Staff get keyset pagination plus ?q= (title / group / owner search),
+    ?sort= (see DASHBOARD_SORTS) and ?status=complete|incomplete.
     """
+    projects = Project.objects.select_related("owner", "progress").only(
+        "id", "title", "description", "owner__username", "progress__completed"
+    )
+    if not request.user.is_staff:
+        projects = projects.filter(owner=request.user)
+
+    query = request.GET.get("q", "").strip()
+    status = request.GET.get("status", "")
+    sort = request.GET.get("sort", "title")
+    if sort not in DASHBOARD_SORTS:
+        sort = "title"
+
     if request.user.is_staff:
-        projects = Project.objects.all().order_by('title')
-    else:
-        projects = Project.objects.filter(owner=request.user).order_by('title')
+        if query:
+            projects = projects.filter(
+                Q(title__icontains=query) | Q(group_name__icontains=query) | Q(owner__username__icontains=query)
+            )
+        all_done = Q(progress__completed=len(ProjectProgress.WORKSHOPS))
+        if status == "complete":
+            projects = projects.filter(all_done)
+        elif status == "incomplete":
+            projects = projects.exclude(all_done)
+
+    cursor = request.GET.get("after")
+    try:
+        page, next_cursor = keyset_page(
+            projects, DASHBOARD_SORTS[sort][0], cursor=cursor, page_size=DASHBOARD_PAGE_SIZE
+        )
+    except ValueError:
+        return redirect("dashboard")
 
     # 🚀 NEW: Automatically skip the dashboard if the user only has 1 project
-    if projects.count() == 1:
-        single_project = projects.first()
-        return redirect('workshop_list', project_id=single_project.id)
+    if len(page) == 1 and not (cursor or query or status):
+        return redirect('workshop_list', project_id=page[0].id)
 
-    # compute a simple progress score per project (0-100)
     project_cards = []
-    for p in projects:
-        # simple heuristics: flags for each workshop presence:
-        ws1 = p.stakeholders.exists() if hasattr(p, 'stakeholders') else False
-        ws2 = p.problems.exists() if hasattr(p, 'problems') else False
-        ws3 = p.indicators.filter(accepted=True).exists() if hasattr(p, 'indicators') else False
-        ws4 = p.swot_items.exists() if hasattr(p, 'swot_items') else False
-
-        completed = sum([1 if ws1 else 0, 1 if ws2 else 0, 1 if ws3 else 0, 1 if ws4 else 0])
-        total = 4
-        percent = int((completed / total) * 100)
-
+    for p in page:
+        progress = get_progress(p)
         project_cards.append({
             'project': p,
-            'completed': completed,
-            'total': total,
-            'percent': percent,
-            'ws_flags': {'ws1': ws1, 'ws2': ws2, 'ws3': ws3, 'ws4': ws4},
+            'completed': progress.completed,
+            'total': progress.total,
+            'percent': progress.percent,
         })
 
-    return render(request, 'workshops/dashboard.html', {'project_cards': project_cards})
+    next_url = None
+    if next_cursor:
+        params = request.GET.copy()
+        params["after"] = next_cursor
+        next_url = f"?{params.urlencode()}"
+
+    return render(request, 'workshops/dashboard.html', {
+        'project_cards': project_cards,
+        'next_url': next_url,
+        'is_paged': bool(cursor),
+        'filters': {'q': query, 'sort': sort, 'status': status},
+        'sort_choices': [(key, label) for key, (_, label) in DASHBOARD_SORTS.items()],
+    })
+
+@login_required
+def cohort_analytics_view(request):
+    """
+    Staff only: cross-project analytics read from the CohortMetric snapshots
+    (one query). POST refreshes the stale snapshots on demand.
+    """
+    if not request.user.is_staff:
+        return HttpResponse("Permission denied.", status=403)
+
+    if request.method == "POST":
+        refresh_cohort_metrics(stale_only=request.POST.get("mode") != "all")
+        return redirect("cohort_analytics")
+
+    metrics = load_cohort_metrics()
+    return render(request, "workshops/cohort_analytics.html", {
+        "metrics": {key: m.data for key, m in metrics.items()},
+        "computed_at": min((m.computed_at for m in metrics.values()), default=None),
+        "missing": [key for key in COHORT_METRICS if key not in metrics],
+    })
+
+
+PROFILING_WINDOWS = OrderedDict([("1h", 1), ("24h", 24), ("7d", 24 * 7)])
+
+
+@login_required
+def request_profiling_view(request):
+    """
+    Staff only: per-view latency percentiles, query counts and template time
+    from the RequestSample rows written by RequestProfilingMiddleware.
+    """
+    if not request.user.is_staff:
+        return HttpResponse("Permission denied.", status=403)
+
+    window = request.GET.get("window", "24h")
+    if window not in PROFILING_WINDOWS:
+        window = "24h"
+    flush_samples()
+    since = timezone.now() - timedelta(hours=PROFILING_WINDOWS[window])
+    stats = view_percentiles(since)
+    return render(request, "workshops/request_profiling.html", {
+        "stats": stats,
+        "window": window,
+        "windows": list(PROFILING_WINDOWS),
+        "samples": sum(s["count"] for s in stats),
+        "mode": settings.REQUEST_PROFILING,
+        "sample_rate": settings.REQUEST_PROFILING_SAMPLE_RATE,
+        "retention_days": PROFILING_RETENTION.days,
+    })
+
 
 @login_required
 @require_http_methods(["GET", "POST"])
@@ -816,82 +1328,90 @@ def create_project_view(request):
 
 
 
+def _default_overview():
+    return {
+        "A1": {"title": "Problem", "text": ""},
+        "A2": {"title": "Context", "text": ""},
+        "B1": {"title": "Solution", "text": ""},
+        "B2": {"title": "Activities", "text": ""},
+        "C1": {"title": "Stakeholders", "text": ""},
+        "C2": {"title": "Resources", "text": ""},
+        "C3": {"title": "Dissemination", "text": ""},
+        "D2": {"title": "Impact on SDGs", "text": ""}
+    }
+
+
 @login_required
 @ensure_csrf_cookie
-def project_overview_view(request, project_id):
-    project = _get_project_for_user(request, project_id)
-
-    # Initialize overview dict if empty
-    if not project.overview:
-        project.overview = {
-            "A1": {"title": "Problem", "text": ""},
-            "A2": {"title": "Context", "text": ""},
-            "B1": {"title": "Solution", "text": ""},
-            "B2": {"title": "Activities", "text": ""},
-            "C1": {"title": "Stakeholders", "text": ""},
-            "C2": {"title": "Resources", "text": ""},
-            "C3": {"title": "Dissemination", "text": ""},
-            "D2": {"title": "Impact on SDGs", "text": ""}
-        }
+async def project_overview_view(request, project_id):
+    project = await _aget_project_for_user(request, project_id)
 
     if request.method == "POST":
         try:
             data = json.loads(request.body.decode("utf-8"))
 
-            def save_overview():
-                # ✅ force JSONField dirty + save only overview
-                project.overview = dict(project.overview)
-                project.save(update_fields=["overview"])
-
-            # -------------------------
-            # Bulk save (Save & Continue)
-            # -------------------------
-            if data.get("all") is True:
-                values = data.get("values", {})
-                if not isinstance(values, dict):
-                    return JsonResponse({"status": "error", "message": "Invalid values payload"}, status=400)
-
-                for box, text in values.items():
-                    if box in project.overview and isinstance(project.overview.get(box), dict):
-                        project.overview[box]["text"] = text
-
-                sdg_ids = data.get("sdg_ids")
-                if sdg_ids is not None:
-                    project.overview.setdefault("D2_SDGS", {"title": "Selected SDGs", "text": ""})
-                    project.overview["D2_SDGS"]["text"] = str(sdg_ids).strip()
-
-                save_overview()
-                return JsonResponse({"status": "ok"})
-
-            # -------------------------
-            # Single box save
-            # -------------------------
-            box = data.get("box")
-            text = data.get("text", "")
-
-            if box in project.overview and isinstance(project.overview.get(box), dict):
-                project.overview[box]["text"] = text
+            def apply(overview):
+                # Runs on the freshly locked value, so concurrent box saves from
+                # team members all land. Raising ValueError rolls the save back.
+                if not overview:
+                    overview.update(_default_overview())
+
+                # -------------------------
+                # Bulk save (Save & Continue)
+                # -------------------------
+                if data.get("all") is True:
+                    values = data.get("values", {})
+                    if not isinstance(values, dict):
+                        raise ValueError("Invalid values payload")
+                    for box, text in values.items():
+                        if box in overview and isinstance(overview.get(box), dict):
+                            overview[box]["text"] = text
+
+                # -------------------------
+                # Single box save
+                # -------------------------
+                else:
+                    box = data.get("box")
+                    if not (box in overview and isinstance(overview.get(box), dict)):
+                        raise ValueError("Invalid box key")
+                    overview[box]["text"] = data.get("text", "")
 
                 sdg_ids = data.get("sdg_ids")
                 if sdg_ids is not None:
-                    project.overview.setdefault("D2_SDGS", {"title": "Selected SDGs", "text": ""})
-                    project.overview["D2_SDGS"]["text"] = str(sdg_ids).strip()
+                    overview.setdefault("D2_SDGS", {"title": "Selected SDGs", "text": ""})
+                    overview["D2_SDGS"]["text"] = str(sdg_ids).strip()
 
-                save_overview()
-                return JsonResponse({"status": "ok"})
-
-            return JsonResponse({"status": "error", "message": "Invalid box key"}, status=400)
+            try:
+                await aupdate_project_json(project, "overview", apply)
+            except ValueError as e:
+                return JsonResponse({"status": "error", "message": str(e)}, status=400)
+            return JsonResponse({"status": "ok"})
 
         except Exception as e:
             return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
-    return render(request, "workshops/project_overview.html", {"project": project, "overview": project.overview})
+    if not project.overview:
+        project.overview = _default_overview()
+    # template rendering may touch lazy relations (request.user): keep it sync
+    return await sync_to_async(_render_overview)(request, project)
+
+
+def _render_overview(request, project):
+    return render(request, "workshops/project_overview.html", {
+        "project": project,
+        "overview": project.overview,
+        **project_fragment_context(project, request.user),
+    })
 
 
 
 #//workshop6//
 def get_scenario_data(project: Project) -> dict:
-    data = project.scenario_data or {}
+    return _scenario_defaults(project.scenario_data or {})
+
+
+def _scenario_defaults(data: dict) -> dict:
+    """Fill the top-level scenario_data keys in place."""
     data.setdefault("actions", [])
     data.setdefault("qsorts", [])
     data.setdefault("scenarios", [])
@@ -1379,28 +1899,19 @@ def scenario_results_view(request, project_id):
             return redirect("scenario_results", project_id=project.id)
 
         elif mode == "export_csv":
-            # --- CSV EXPORT ENGINE ---
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = f'attachment; filename="project_{project.id}_scenarios.csv"'
-
-            writer = csv.writer(response)
             scenarios = data.get("scenarios", [])
-
-            # Header
-            header = ["Action ID", "Action Text"] + [s["title"] for s in scenarios]
-            writer.writerow(header)
-
-            # Rows
-            actions = data.get("actions", [])
-            for action in actions:
-                row = [action["id"], action["text"]]
-                for s in scenarios:
-                    # Get score safely
-                    score = s.get("composite_scores", {}).get(str(action["id"]), 0)
-                    row.append(f"{score:.2f}")
-                writer.writerow(row)
-
-            return response
+            columns = [Column("Action ID", "id"), Column("Action Text", "text")] + [
+                # titles can repeat; NDJSON fields are keyed by scenario id
+                Column(
+                    s["title"],
+                    lambda a, s=s: f"{s.get('composite_scores', {}).get(str(a['id']), 0):.2f}",
+                    key=f"scenario_{s['id']}",
+                )
+                for s in scenarios
+            ]
+            return streaming_export(
+                request, data.get("actions", []), columns, export_format(request), f"project_{project.id}_scenarios"
+            )
 
     actions = data.get("actions", [])
     scenarios = data.get("scenarios", [])
@@ -1446,26 +1957,132 @@ def scenario_results_view(request, project_id):
             "scenarios": scenarios,
             "actions": actions,
             "analysis": data.get("analysis", {}),
+            **project_fragment_context(project, request.user),
         },
     )
-@require_POST
+def compute_scenario_scores(project, data):
+    """
+    Combine the Workshop 3 indicator weights with the Workshop 5 performance table.
+    Only indicators with a value for every scenario are scored.
+    Returns (result_or_None, skipped_indicator_ids).
+    """
+    scenarios = data.get("scenarios", [])
+    performance = data.get("performance", {})
+    values = performance.get("values", {})
+    directions = performance.get("directions", {})
+
+    indicators = list(project.indicators.filter(accepted=True).order_by("order", "id"))
+    if not scenarios or not indicators:
+        return None, []
+
+    scenario_ids = [str(s["id"]) for s in scenarios]
+    complete, skipped = [], []
+    for ind in indicators:
+        key = str(ind.id)
+        if all(values.get(sid, {}).get(key) is not None for sid in scenario_ids):
+            complete.append(ind)
+        else:
+            skipped.append(ind.id)
+
+    if not complete:
+        return None, skipped
+
+    matrix = [[float(values[sid][str(ind.id)]) for ind in complete] for sid in scenario_ids]
+    weights = [ind.weight if ind.weight is not None else 1.0 for ind in complete]
+    dirs = [directions.get(str(ind.id), "benefit") for ind in complete]
+
+    result = cached_score_scenarios(scenario_ids, [ind.id for ind in complete], matrix, weights, dirs)
+
+    titles = {str(s["id"]): s.get("title") for s in scenarios}
+    for row in result["scores"]:
+        row["title"] = titles.get(row["scenario_id"], f"Scenario {row['scenario_id']}")
+    return result, skipped
+
+
 @login_required
-def save_scenario(request, project_id):
+@ensure_csrf_cookie
+def scenario_scoring_view(request, project_id):
+    """
+    Stage 5 – Multi-criteria scoring.
+    GET renders the performance table; POST (JSON) saves it and returns the scores.
+    Expects JSON: { "values": {scenario_id: {indicator_id: number}}, "directions": {indicator_id: "benefit"|"cost"} }
+    """
     project = get_object_or_404(Project, id=project_id, owner=request.user)
     data = get_scenario_data(project)
+
+    if request.method == "POST":
+        try:
+            payload = json.loads(request.body.decode("utf-8"))
+            raw_values = payload.get("values", {})
+            raw_directions = payload.get("directions", {})
+            if not isinstance(raw_values, dict) or not isinstance(raw_directions, dict):
+                return JsonResponse({"status": "error", "message": "Invalid payload"}, status=400)
+
+            def to_number(v):
+                if v in (None, ""):
+                    return None
+                number = float(v)
+                if not math.isfinite(number):
+                    raise ValueError(f"Invalid value: {v}")
+                return number
+
+            values = {
+                str(sid): {str(iid): to_number(v) for iid, v in (row or {}).items()}
+                for sid, row in raw_values.items()
+            }
+            directions = {
+                str(iid): ("cost" if d == "cost" else "benefit")
+                for iid, d in raw_directions.items()
+            }
+        except (ValueError, TypeError, AttributeError) as e:
+            return JsonResponse({"status": "error", "message": str(e)}, status=400)
+
+        data["performance"] = {"values": values, "directions": directions}
+        save_scenario_data(project, data)
+
+        result, skipped = compute_scenario_scores(project, data)
+        return JsonResponse({"status": "ok", "result": result, "skipped": skipped})
+
+    indicators = list(project.indicators.filter(accepted=True).order_by("order", "id"))
+    result, skipped = compute_scenario_scores(project, data)
+    # Observed data from Workshop 4.1 as a reference point for the performance table
+    baselines = project_dataset_stats(project)
+    for ind in indicators:
+        ind.baseline = baselines.get(ind.id)
+
+    return render(
+        request,
+        "workshops/scenario_scoring.html",
+        {
+            "project": project,
+            "scenarios": data.get("scenarios", []),
+            "indicators": indicators,
+            "performance": data.get("performance", {"values": {}, "directions": {}}),
+            "result": result,
+            "skipped": skipped,
+        },
+    )
+
+
+@require_POST
+@login_required
+async def save_scenario(request, project_id):
+    project = await aget_object_or_404(Project, id=project_id, owner=await request.auser())
     mode = request.POST.get("mode")
 
     # 1. DELETE Q-SORT
     if mode == "delete_qsort":
         qsort_id = request.POST.get("qsort_id")
         if qsort_id:
-            # Remove from JSON list
-            qsorts = data.get("qsorts", [])
-            data["qsorts"] = [q for q in qsorts if str(q["id"]) != str(qsort_id)]
-            save_scenario_data(project, data)
+            def remove(stored):
+                # Remove from JSON list
+                data = _scenario_defaults(stored)
+                data["qsorts"] = [q for q in data["qsorts"] if str(q["id"]) != str(qsort_id)]
+
+            await aupdate_project_json(project, "scenario_data", remove)
 
             # Also remove from SQL Model (for safety)
-            QSortResult.objects.filter(project=project, participant_id=qsort_id).delete()
+            await QSortResult.objects.filter(project=project, participant_id=qsort_id).adelete()
 
             return JsonResponse({"status": "ok", "message": "Deleted successfully"})
         return JsonResponse({"status": "error", "message": "Missing ID"}, status=400)
@@ -1482,44 +2099,47 @@ def save_scenario(request, project_id):
         except json.JSONDecodeError:
             return HttpResponseBadRequest("Invalid JSON")
 
-        qsorts = data.get("qsorts", [])
-
-        if edit_id:
-            # === UPDATE EXISTING ===
-            found = False
-            for q in qsorts:
-                if str(q["id"]) == str(edit_id):
-                    q["participant_label"] = participant_label
-                    q["role"] = role
-                    q["distribution"] = distribution
-                    q["updated_at"] = datetime.utcnow().isoformat()
-                    found = True
-                    break
-            if not found:
-                return JsonResponse({"status": "error", "message": "Sort ID not found"}, status=404)
-        else:
-            # === CREATE NEW ===
-            next_id = max([int(q["id"]) for q in qsorts], default=0) + 1
-            new_record = {
-                "id": next_id,
-                "participant_label": participant_label or f"Participant {next_id}",
-                "role": role or "Unspecified",
-                "created_at": datetime.utcnow().isoformat(),
-                "distribution": distribution,
-            }
-            qsorts.append(new_record)
-            edit_id = next_id  # For the return message
-
-        data["qsorts"] = qsorts
+        def upsert(stored):
+            # Applied to the freshly locked scenario_data, so two team members
+            # saving q-sorts at once both keep their entry. Returns the sort id.
+            data = _scenario_defaults(stored)
+            qsorts = data["qsorts"]
+
+            if edit_id:
+                # === UPDATE EXISTING ===
+                for q in qsorts:
+                    if str(q["id"]) == str(edit_id):
+                        q["participant_label"] = participant_label
+                        q["role"] = role
+                        q["distribution"] = distribution
+                        q["updated_at"] = datetime.utcnow().isoformat()
+                        break
+                else:
+                    raise LookupError("Sort ID not found")
+                qsort_id = edit_id
+            else:
+                # === CREATE NEW ===
+                qsort_id = max([int(q["id"]) for q in qsorts], default=0) + 1
+                qsorts.append({
+                    "id": qsort_id,
+                    "participant_label": participant_label or f"Participant {qsort_id}",
+                    "role": role or "Unspecified",
+                    "created_at": datetime.utcnow().isoformat(),
+                    "distribution": distribution,
+                })
 
-        # Update Analytics
-        analysis = data.get("analysis", {})
-        analysis["pearson_correlation"] = compute_pearson_correlation(data)
-        analysis["last_analyzed_at"] = datetime.utcnow().isoformat()
-        data["analysis"] = analysis
+            # Update Analytics
+            analysis = data.get("analysis", {})
+            analysis["pearson_correlation"] = compute_pearson_correlation(data)
+            analysis["last_analyzed_at"] = datetime.utcnow().isoformat()
+            data["analysis"] = analysis
+            return qsort_id
 
-        save_scenario_data(project, data)
-        return JsonResponse({"status": "ok", "qsort_id": edit_id})
+        try:
+            qsort_id = await aupdate_project_json(project, "scenario_data", upsert)
+        except LookupError as e:
+            return JsonResponse({"status": "error", "message": str(e)}, status=404)
+        return JsonResponse({"status": "ok", "qsort_id": qsort_id})
 
     # 3. SAVE ACTIONS (No changes needed here, but kept for completeness if you merged code)
     elif mode == "actions":
@@ -1545,9 +2165,11 @@ def final_review_view(request, project_id):
     except Exception:
         sdg_ids = ""
 
+    progress = get_progress(project)
+
     # Workshop 3 indicators
     selected_indicators = project.indicators.filter(accepted=True).order_by("order", "id")
-    ranked = bool(getattr(project, "indicator_ranking_order", None))
+    ranked = progress.ranking_done
     top_weights = selected_indicators.exclude(weight__isnull=True).order_by("-weight")[:10]
 
     # SWOT
@@ -1556,121 +2178,83 @@ def final_review_view(request, project_id):
     for item in swot_items:
         swot_by_cat.setdefault(item.category, []).append(item)
 
-    # Scenario JSON summary
-    scenario = project.scenario_data or {}
-    actions_count = len(scenario.get("actions", []) or [])
-    qsorts_count = len(scenario.get("qsorts", []) or [])
-    scenarios_count = len(scenario.get("scenarios", []) or [])
+    scoring, _ = compute_scenario_scores(project, get_scenario_data(project))
 
     context = {
         "project": project,
         "overview": overview,
         "sdg_ids": sdg_ids,
-        "stakeholders_count": project.stakeholders.count() if hasattr(project, "stakeholders") else 0,
-        "problems_count": project.problems.count() if hasattr(project, "problems") else 0,
-        "objectives_count": project.objectives.count() if hasattr(project, "objectives") else 0,
+        "progress": progress,
+        "stakeholders_count": progress.stakeholders_count,
+        "problems_count": progress.problems_count,
+        "objectives_count": progress.objectives_count,
         "selected_indicators": selected_indicators,
         "ranked": ranked,
         "top_weights": top_weights,
         "swot_by_cat": swot_by_cat,
         "scenario_summary": {
-            "actions": actions_count,
-            "qsorts": qsorts_count,
-            "scenarios": scenarios_count,
+            "actions": progress.actions_count,
+            "qsorts": progress.qsorts_count,
+            "scenarios": progress.scenarios_count,
         },
+        "scoring": scoring,
         "generated_at": timezone.now(),
     }
     return render(request, "workshops/final_review.html", context)
 
 
+PORTFOLIO_WAIT_SECONDS = 20
+
+
 @login_required
 def final_review_pdf(request, project_id):
     """
-    Server-side PDF export using reportlab.
-    If you don't have reportlab installed locally, install it:
-      pip install reportlab
+    Serve the portfolio PDF for the project's current revision.
+    Generation runs as a PortfolioJob (see utils/portfolio.py) and the
+    result is kept in media storage, so repeat downloads of an unchanged
+    project only stream the stored file. If generation takes longer than
+    PORTFOLIO_WAIT_SECONDS a "being generated" page is returned instead.
     """
     project = _get_project_for_user(request, project_id)
+    key = portfolio_key(project)
+    etag = f'"{key.rsplit("/", 1)[-1][:-4]}"'
 
-    try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.units import mm
-    except Exception:
-        return HttpResponse("reportlab is not installed. Run: pip install reportlab", status=500)
+    if request.headers.get("If-None-Match") == etag and default_storage.exists(key):
+        response = HttpResponseNotModified()
+    else:
+        if not default_storage.exists(key):
+            key = schedule_portfolio(project)
+            try:
+                ready = wait_for_portfolio(key, PORTFOLIO_WAIT_SECONDS)
+            except PortfolioFailed as e:
+                return HttpResponse(f"Portfolio generation failed: {e}", status=500)
+            if not ready:
+                return render(request, "workshops/portfolio_pending.html", {"project": project}, status=202)
+        response = FileResponse(
+            default_storage.open(key, "rb"),
+            as_attachment=True,
+            filename=f"Project_Portfolio_{project.id}.pdf",
+            content_type="application/pdf",
+        )
 
-    overview = project.overview or {}
-    sdg_ids = ""
-    if isinstance(overview.get("D2_SDGS"), dict):
-        sdg_ids = (overview.get("D2_SDGS") or {}).get("text", "")
-
-    def box_text(key):
-        v = overview.get(key)
-        if isinstance(v, dict):
-            return (v.get("text") or "").strip()
-        return ""
-
-    resp = HttpResponse(content_type="application/pdf")
-    resp["Content-Disposition"] = f'attachment; filename="Project_Portfolio_{project.id}.pdf"'
-
-    c = canvas.Canvas(resp, pagesize=A4)
-    w, h = A4
-    x = 18 * mm
-    y = h - 18 * mm
-
-    def line(txt, size=11, dy=6):
-        nonlocal y
-        c.setFont("Helvetica", size)
-        for part in (txt or "—").split("\n"):
-            c.drawString(x, y, part[:130])
-            y -= dy * mm
-            if y < 20 * mm:
-                c.showPage()
-                y = h - 18 * mm
-                c.setFont("Helvetica", size)
-
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(x, y, "Project Portfolio — Workshop 8")
-    y -= 8 * mm
-    c.setFont("Helvetica", 11)
-    c.drawString(x, y, f"Project: {project.title}")
-    y -= 6 * mm
-    c.drawString(x, y, f"Generated: {timezone.now().strftime('%Y-%m-%d %H:%M')}")
-    y -= 10 * mm
-
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(x, y, "Workshop 1 — Idea Canvas")
-    y -= 6 * mm
-    line(f"A1 Problem:\n{box_text('A1')}")
-    line(f"B1 Solution:\n{box_text('B1')}")
-    if sdg_ids:
-        line(f"Selected SDGs: {sdg_ids}")
-    y -= 2 * mm
-
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(x, y, "Workshop 2 — PCM Summary")
-    y -= 6 * mm
-    line(f"Stakeholders: {project.stakeholders.count() if hasattr(project, 'stakeholders') else 0}")
-    line(f"Problems: {project.problems.count() if hasattr(project, 'problems') else 0}")
-    line(f"Objectives: {project.objectives.count() if hasattr(project, 'objectives') else 0}")
-    y -= 2 * mm
-
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(x, y, "Workshop 3 — Indicators")
-    y -= 6 * mm
-    selected = project.indicators.filter(accepted=True).order_by("order", "id")
-    line(f"Selected indicators: {selected.count()}")
-    ranked = bool(getattr(project, "indicator_ranking_order", None))
-    line(f"Ranking computed: {'Yes' if ranked else 'No'}")
-    top = selected.exclude(weight__isnull=True).order_by("-weight")[:8]
-    if top.exists():
-        line("Top weights:")
-        for ind in top:
-            line(f" - {ind.name}  (w={ind.weight:.4f})", size=10, dy=5)
-
-    c.showPage()
-    c.save()
-    return resp
+    response["ETag"] = etag
+    # Private: portfolios are per-user. Revalidate so a new revision is picked up at once.
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+@login_required
+@require_POST
+def generate_portfolios_view(request):
+    """Staff only: queue portfolio generation for every project (e.g. before grading)."""
+    if not request.user.is_staff:
+        return JsonResponse({"status": "error", "message": "Permission denied."}, status=403)
+    queued = 0
+    for project in Project.objects.select_related("progress").order_by("id").iterator():
+        if not default_storage.exists(portfolio_key(project)):
+            schedule_portfolio(project)
+            queued += 1
+    return JsonResponse({"status": "ok", "queued": queued})
 
 # -------------------------
 # workshop 4.1 indicator analys
@@ -1684,15 +2268,37 @@ def indicator_analysis_view(request, project_id):
     # Fetch indicators that the user accepted in WS 3.1
     selected_indicators = project.indicators.filter(accepted=True) if hasattr(project, 'indicators') else []
 
-    # Create a dictionary of already uploaded images
+    # Uploaded images, keyed by indicator id
     uploaded_data = {
-        str(data.indicator_id): data.data_image.url if data.data_image else None
-        for data in IndicatorData.objects.filter(project=project)
+        str(data.indicator_id): data
+        for data in IndicatorData.objects.filter(project=project).exclude(data_image="")
+        if data.data_image
     }
 
-    # ✅ NEW: Attach the image URL directly to the indicator object
+    datasets = {d.indicator_id: d for d in project.datasets.all()}
+
+    # ✅ NEW: Attach the image URLs directly to the indicator object.
+    # Pages show the small variants; the original is only linked for download.
     for ind in selected_indicators:
-        ind.current_image = uploaded_data.get(str(ind.id))
+        ind.data_set = datasets.get(ind.id)
+        if ind.data_set is not None:
+            ind.data_stats = get_stats(ind.data_set)
+            ind.sparkline = sparkline_points(ind.data_stats.get("normalized"))
+        data = uploaded_data.get(str(ind.id))
+        ind.current_image = None
+        if data is None:
+            continue
+        ind.original_image = data.data_image.url
+        thumb = data.variants.get("thumb") if data.variant("thumb") else None
+        if thumb:
+            ind.current_image = default_storage.url(thumb["jpeg"])
+            ind.current_image_webp = default_storage.url(thumb["webp"])
+            ind.image_size = (thumb["width"], thumb["height"])
+            ind.display_image = default_storage.url(data.variants["display"]["jpeg"])
+        else:
+            # Variants still being built: fall back to the original for now
+            ind.current_image = ind.original_image
+            ind.display_image = ind.original_image
 
     return render(
         request,
@@ -1715,19 +2321,185 @@ def upload_indicator_image(request, project_id):
 
     if not indicator_id or not image_file:
         return JsonResponse({"status": "error", "message": "Missing file or ID"}, status=400)
+    try:
+        check_image(image_file)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
 
-    # Update or create the record
-    indicator_data, created = IndicatorData.objects.get_or_create(
-        project=project,
-        indicator_id=indicator_id,
-        defaults={'indicator_name': indicator_name}
-    )
+    # Update or create the record. One transaction, so the content storage's
+    # blob lock is held until the row references the stored file.
+    with transaction.atomic():
+        indicator_data, created = IndicatorData.objects.get_or_create(
+            project=project,
+            indicator_id=indicator_id,
+            defaults={'indicator_name': indicator_name}
+        )
 
-    # Save the new image
-    indicator_data.data_image = image_file
-    indicator_data.save()
+        # Save the new image
+        indicator_data.data_image = image_file
+        indicator_data.save()
+    # Thumbnails / display sizes are built off the request thread
+    schedule_variants(indicator_data)
 
     return JsonResponse({
         "status": "success",
-        "image_url": indicator_data.data_image.url
-    })
\ No newline at end of file
+        "image_url": indicator_data.data_image.url,
+        "variants": "pending",
+    })
+
+
+# -------------------------
+# Chunked, resumable uploads (initiate -> numbered chunks -> complete)
+# -------------------------
+
+def _upload_state(upload):
+    return {
+        "status": "ok",
+        "upload_id": str(upload.pk),
+        "chunk_size": upload.chunk_size,
+        "total_chunks": upload.total_chunks,
+        "next_chunk": upload.next_chunk,
+        "received_bytes": upload.received_bytes,
+    }
+
+
+def _upload_error(e):
+    return JsonResponse({"status": "error", "message": str(e), **e.extra}, status=e.status)
+
+
+@login_required
+@require_POST
+def start_chunked_upload(request, project_id):
+    """
+    Expects JSON: { "indicator_id", "indicator_name", "filename", "size", "sha256"? }
+    Returns the upload id, chunk size and the chunk to send next (non-zero when resuming).
+    """
+    project = _get_project_for_user(request, project_id)
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+        indicator_id = str(payload["indicator_id"])
+        size = int(payload["size"])
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"status": "error", "message": "Invalid payload"}, status=400)
+    try:
+        upload = start_upload(
+            project, indicator_id, payload.get("indicator_name"), payload.get("filename"), size,
+            payload.get("sha256") or "",
+        )
+    except UploadError as e:
+        return _upload_error(e)
+    return JsonResponse(_upload_state(upload))
+
+
+@login_required
+def chunked_upload_status(request, project_id, upload_id):
+    project = _get_project_for_user(request, project_id)
+    upload = get_object_or_404(ChunkedUpload, pk=upload_id, project=project, status="uploading")
+    return JsonResponse(_upload_state(upload))
+
+
+@login_required
+@require_POST
+def upload_chunk(request, project_id, upload_id, index):
+    """Raw chunk bytes as the request body; an optional X-Chunk-SHA256 header is verified."""
+    project = _get_project_for_user(request, project_id)
+    try:
+        # read the request as a stream: the body is never buffered in full
+        upload = write_chunk(upload_id, project, index, request, request.headers.get("X-Chunk-SHA256", ""))
+    except UploadError as e:
+        return _upload_error(e)
+    return JsonResponse(_upload_state(upload))
+
+
+@login_required
+@require_POST
+def complete_chunked_upload(request, project_id, upload_id):
+    project = _get_project_for_user(request, project_id)
+    try:
+        indicator_data = finish_upload(upload_id, project)
+    except UploadError as e:
+        return _upload_error(e)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+    return JsonResponse({
+        "status": "success",
+        "image_url": indicator_data.data_image.url,
+        "variants": "pending",
+    })
+
+
+
+# -------------------------
+# Workshop 4.1 numeric datasets (CSV -> columnar .npz + cached stats)
+# -------------------------
+
+def _dataset_json(dataset):
+    stats = get_stats(dataset)
+    return {
+        "status": "success",
+        "source_name": dataset.source_name,
+        "rows": dataset.rows,
+        "columns": dataset.columns,
+        "index_column": dataset.index_column,
+        "value_column": dataset.value_column,
+        "stats": {k: v for k, v in stats.items() if k not in ("chart", "normalized")},
+        "sparkline": sparkline_points(stats.get("normalized")),
+    }
+
+
+@login_required
+@require_POST
+def upload_indicator_dataset(request, project_id):
+    """
+    Multipart POST: indicator_id, dataset (CSV file), optional index_column / value_column.
+    Replaces the indicator's previous dataset.
+    """
+    project = _get_project_for_user(request, project_id)
+    indicator = get_object_or_404(Indicator, id=request.POST.get("indicator_id") or 0, project=project)
+    upload = request.FILES.get("dataset")
+    if upload is None:
+        return JsonResponse({"status": "error", "message": "Missing file"}, status=400)
+    try:
+        dataset = save_dataset(
+            indicator, upload, request.POST.get("index_column"), request.POST.get("value_column")
+        )
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+    return JsonResponse(_dataset_json(dataset))
+
+
+@login_required
+@require_http_methods(["GET", "POST"])
+def indicator_dataset(request, project_id, indicator_id):
+    """
+    GET: columns and stats of the indicator's dataset.
+    POST (JSON {index_column, value_column}): pick other columns; stats are recomputed from the stored file.
+    """
+    project = _get_project_for_user(request, project_id)
+    dataset = get_object_or_404(
+        IndicatorDataset.objects.select_related("indicator"), indicator_id=indicator_id, project=project
+    )
+    if request.method == "POST":
+        try:
+            payload = json.loads(request.body.decode("utf-8"))
+        except ValueError:
+            return JsonResponse({"status": "error", "message": "Invalid JSON"}, status=400)
+        names = {c["name"]: c["kind"] for c in dataset.columns}
+        index_column = payload.get("index_column", dataset.index_column)
+        value_column = payload.get("value_column", dataset.value_column)
+        if index_column not in names or names.get(value_column) != "number":
+            return JsonResponse({"status": "error", "message": "Unknown column or non-numeric value column"}, status=400)
+        dataset.index_column, dataset.value_column = index_column, value_column
+        dataset.stats = compute_stats(dataset)
+        dataset.save(update_fields=["index_column", "value_column", "stats"])
+    return JsonResponse(_dataset_json(dataset))
+
+
+@login_required
+@require_POST
+def delete_indicator_dataset(request, project_id, indicator_id):
+    project = _get_project_for_user(request, project_id)
+    deleted, _ = IndicatorDataset.objects.filter(indicator_id=indicator_id, project=project).delete()
+    if not deleted:
+        return JsonResponse({"status": "error", "message": "No dataset"}, status=404)
+    return JsonResponse({"status": "success"})